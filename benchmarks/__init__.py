@@ -0,0 +1 @@
+"""Benchmarks do sistema da academia (veja benchmarks/executar.py)."""
@@ -0,0 +1,195 @@
+"""Gerador de uma academia sintética para os benchmarks.
+
+Preenche o academia.db (Pessoa/Aluno/Instrutor/Modalidade/Matricula) e o banco do
+models/models.py (Membro/Instrutor/AulaGinastica/Reserva/Equipamento) com inserts
+em lote, usando uma semente fixa para que as execuções sejam comparáveis.
+"""
+
+import datetime
+import random
+
+from sqlalchemy import insert, update, select, func
+
+PRIMEIROS_NOMES = [
+    "Ana", "João", "Maria", "José", "Lucas", "Mariana", "Pedro", "Júlia", "Gabriel", "Beatriz",
+    "Rafael", "Letícia", "Mateus", "Camila", "Thiago", "Fernanda", "Bruno", "Patrícia", "André", "Luíza",
+]
+SOBRENOMES = [
+    "Silva", "Souza", "Oliveira", "Santos", "Pereira", "Costa", "Rodrigues", "Almeida", "Nascimento", "Lima",
+    "Araújo", "Fernandes", "Carvalho", "Gomes", "Martins", "Rocha", "Ribeiro", "Alves", "Monteiro", "Conceição",
+]
+MODALIDADES = [
+    "Musculação", "Natação", "Pilates", "Yoga", "Spinning", "Crossfit", "Judô", "Jiu-Jitsu", "Boxe", "Zumba",
+]
+TIPOS_SUBSCRICAO = ["Mensal", "Trimestral", "Semestral", "Anual"]
+ESTADOS_PAGAMENTO = ["Pago", "Pendente", "Atrasado"]
+TIPOS_EQUIPAMENTO = ["Cardio", "Musculação", "Peso Livre", "Funcional"]
+HORARIOS = ["Seg 07:00", "Ter 12:00", "Qua 18:00", "Qui 19:00", "Sex 07:00", "Sáb 09:00"]
+SALAS = ["Sala 1", "Sala 2", "Sala 3", "Estúdio", "Piscina", "Tatame"]
+DURACOES = [45, 60, 90]
+
+TAMANHO_LOTE = 5000
+
+
+class Quantidades:
+    """Tamanho de cada tabela da academia sintética."""
+
+    def __init__(self, alunos=10000, instrutores=200, modalidades=30, matriculas_por_aluno=3,
+                 membros=5000, aulas=500, reservas=10000, equipamentos=500):
+        self.alunos = alunos
+        self.instrutores = instrutores
+        self.modalidades = modalidades
+        self.matriculas_por_aluno = matriculas_por_aluno
+        self.membros = membros
+        self.aulas = aulas
+        self.reservas = reservas
+        self.equipamentos = equipamentos
+
+
+def _nome(aleatorio):
+    return f"{aleatorio.choice(PRIMEIROS_NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+
+
+def _inserir_em_lotes(conexao, tabela, linhas):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= TAMANHO_LOTE:
+            conexao.execute(insert(tabela), lote)
+            lote = []
+    if lote:
+        conexao.execute(insert(tabela), lote)
+
+
+def _nome_modalidade(indice):
+    base = MODALIDADES[indice % len(MODALIDADES)]
+    return base if indice < len(MODALIDADES) else f"{base} {indice // len(MODALIDADES) + 1}"
+
+
+def gerar_academia(engine, quantidades, semente=42):
+    """Preenche o academia.db vazio ligado a `engine`. Retorna os ids gerados."""
+    from models.pessoa import Pessoa
+    from models.aluno import Aluno
+    from models.instrutor import Instrutor
+    from models.modalidade import Modalidade
+    from models.matricula import Matricula
+
+    aleatorio = random.Random(semente)
+    q = quantidades
+    ids_alunos = list(range(1, q.alunos + 1))
+    ids_instrutores = list(range(q.alunos + 1, q.alunos + q.instrutores + 1))
+    ids_modalidades = list(range(1, q.modalidades + 1))
+
+    with engine.begin() as conexao:
+        _inserir_em_lotes(conexao, Pessoa.__table__, (
+            {"id": i, "nome": _nome(aleatorio), "idade": aleatorio.randint(14, 80), "tipo": "aluno"}
+            for i in ids_alunos
+        ))
+        _inserir_em_lotes(conexao, Pessoa.__table__, (
+            {"id": i, "nome": _nome(aleatorio), "idade": aleatorio.randint(21, 65), "tipo": "instrutor"}
+            for i in ids_instrutores
+        ))
+        _inserir_em_lotes(conexao, Aluno.__table__, ({"id": i, "matricula": i} for i in ids_alunos))
+        _inserir_em_lotes(conexao, Instrutor.__table__, (
+            {"id": i, "cref": f"{i:06d}-G/SP"} for i in ids_instrutores
+        ))
+        _inserir_em_lotes(conexao, Modalidade.__table__, (
+            {"id": i, "nome": _nome_modalidade(i - 1), "descricao": ""} for i in ids_modalidades
+        ))
+
+        def matriculas():
+            for aluno_id in ids_alunos:
+                quantidade = aleatorio.randint(0, min(q.matriculas_por_aluno * 2, q.modalidades))
+                for modalidade_id in aleatorio.sample(ids_modalidades, quantidade):
+                    yield {"aluno_id": aluno_id, "modalidade_id": modalidade_id}
+        _inserir_em_lotes(conexao, Matricula.__table__, matriculas())
+
+        # Os inserts diretos não passam pelo MatriculaService: preenche os contadores desnormalizados
+        for tabela, contador, coluna in (
+            (Modalidade.__table__, "total_matriculas", Matricula.modalidade_id),
+            (Aluno.__table__, "total_modalidades", Matricula.aluno_id),
+        ):
+            real = select(func.count(Matricula.id)).where(coluna == tabela.c.id).scalar_subquery()
+            conexao.execute(update(tabela).values({contador: real}))
+
+    return {"alunos": ids_alunos, "instrutores": ids_instrutores, "modalidades": ids_modalidades}
+
+
+def gerar_ginasio(engine, quantidades, semente=42):
+    """Preenche o banco do models/models.py ligado a `engine`. Retorna os ids gerados."""
+    from models import models as ginasio
+    from models.grade import interpretar_horario
+
+    aleatorio = random.Random(semente)
+    q = quantidades
+    ids_membros = list(range(1, q.membros + 1))
+    ids_instrutores = list(range(q.membros + 1, q.membros + q.instrutores + 1))
+    ids_aulas = list(range(1, q.aulas + 1))
+    hoje = datetime.date.today()
+    capacidades = {i: aleatorio.choice([10, 20, 30]) for i in ids_aulas}
+    horarios = {i: aleatorio.choice(HORARIOS) for i in ids_aulas}
+    # Reservas distintas por membro/aula, sem passar da capacidade de cada aula
+    reservas = {}
+    restantes = q.reservas if ids_membros else 0
+    for aula_id in ids_aulas:
+        ocupadas = min(aleatorio.randint(0, capacidades[aula_id]), restantes, len(ids_membros))
+        reservas[aula_id] = aleatorio.sample(ids_membros, ocupadas)
+        restantes -= ocupadas
+
+    with engine.begin() as conexao:
+        _inserir_em_lotes(conexao, ginasio.Pessoa.__table__, (
+            {"id": i, "nome": _nome(aleatorio), "contacto": f"pessoa{i}@exemplo.com", "tipo": "membro"}
+            for i in ids_membros
+        ))
+        _inserir_em_lotes(conexao, ginasio.Pessoa.__table__, (
+            {"id": i, "nome": _nome(aleatorio), "contacto": f"instrutor{i}@exemplo.com", "tipo": "instrutor_ginasio"}
+            for i in ids_instrutores
+        ))
+        _inserir_em_lotes(conexao, ginasio.Membro.__table__, (
+            {
+                "id": i,
+                "data_adesao": hoje - datetime.timedelta(days=aleatorio.randint(0, 1500)),
+                "tipo_subscricao": aleatorio.choice(TIPOS_SUBSCRICAO),
+                "estado_pagamento": aleatorio.choice(ESTADOS_PAGAMENTO),
+            }
+            for i in ids_membros
+        ))
+        _inserir_em_lotes(conexao, ginasio.Instrutor.__table__, (
+            {"id": i, "especializacao": aleatorio.choice(MODALIDADES)} for i in ids_instrutores
+        ))
+        _inserir_em_lotes(conexao, ginasio.AulaGinastica.__table__, (
+            {
+                "id": i,
+                "nome": aleatorio.choice(MODALIDADES),
+                "horario": horarios[i],
+                "capacidade_max": capacidades[i],
+                "vagas_ocupadas": len(reservas[i]),
+                "instrutor_id": aleatorio.choice(ids_instrutores) if ids_instrutores else None,
+            }
+            for i in ids_aulas
+        ))
+        # Uma ocorrência semanal por aula, no horário do texto livre (sem checar conflitos)
+        _inserir_em_lotes(conexao, ginasio.HorarioAula.__table__, (
+            {"aula_id": i, "dia_semana": dia, "inicio": inicio, "fim": inicio + aleatorio.choice(DURACOES),
+             "sala": aleatorio.choice(SALAS)}
+            for i in ids_aulas
+            for dia, inicio in [interpretar_horario(horarios[i])]
+        ))
+        _inserir_em_lotes(conexao, ginasio.Reserva.__table__, (
+            {"membro_id": membro_id, "aula_id": aula_id}
+            for aula_id, membros in reservas.items()
+            for membro_id in membros
+        ))
+        _inserir_em_lotes(conexao, ginasio.Equipamento.__table__, (
+            {
+                "nome": f"Equipamento {i}",
+                "tipo": tipo,
+                "data_ultima_manutencao": ultima,
+                "proxima_manutencao": ginasio.Equipamento.calcular_proxima_manutencao(tipo, ultima),
+            }
+            for i in range(1, q.equipamentos + 1)
+            for tipo, ultima in [(aleatorio.choice(TIPOS_EQUIPAMENTO),
+                                  hoje - datetime.timedelta(days=aleatorio.randint(0, 365)))]
+        ))
+
+    return {"membros": ids_membros, "aulas": ids_aulas}
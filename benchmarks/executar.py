@@ -0,0 +1,290 @@
+"""Benchmark das operações reais do sistema sobre uma academia sintética.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.executar --alunos 20000 --repeticoes 50
+    python -m benchmarks.executar --json resultado.json
+
+Cria bancos novos em uma pasta temporária, mede cada fluxo do menu (main.py) e
+cada método de models/servicos.py e informa percentis de latência, consultas SQL
+por operação e pico de memória.
+"""
+
+import argparse
+import builtins
+import contextlib
+import datetime
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.dados_sinteticos import Quantidades, gerar_academia, gerar_ginasio
+
+
+class ContadorConsultas:
+    """Conta os comandos SQL enviados pelos engines (evento before_cursor_execute)."""
+
+    def __init__(self, *engines):
+        from sqlalchemy import event
+        self.total = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._ao_executar)
+
+    def _ao_executar(self, *_args):
+        self.total += 1
+
+
+@contextlib.contextmanager
+def respostas(*valores):
+    """Responde aos input() do menu com `valores` e descarta o que for impresso."""
+    fila = iter(valores)
+    input_original = builtins.input
+    builtins.input = lambda _mensagem="": next(fila)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        builtins.input = input_original
+
+
+def _percentil(ordenados, p):
+    if len(ordenados) == 1:
+        return ordenados[0]
+    return statistics.quantiles(ordenados, n=100, method="inclusive")[p - 1]
+
+
+def medir(nome, operacao, repeticoes, contador):
+    """Executa `operacao(i)` `repeticoes` vezes e retorna um dicionário de métricas.
+
+    A memória é medida numa execução extra com tracemalloc, para não distorcer os tempos.
+    """
+    tempos = []
+    consultas = []
+    for i in range(repeticoes):
+        antes = contador.total
+        inicio = time.perf_counter()
+        operacao(i)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(contador.total - antes)
+
+    tracemalloc.start()
+    operacao(repeticoes)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tempos.sort()
+    return {
+        "operacao": nome,
+        "p50_ms": _percentil(tempos, 50),
+        "p95_ms": _percentil(tempos, 95),
+        "p99_ms": _percentil(tempos, 99),
+        "media_ms": statistics.fmean(tempos),
+        "consultas": statistics.fmean(consultas),
+        "pico_memoria_kib": pico / 1024,
+    }
+
+
+def montar_cenarios(main, ids, ginasio_sessao, ids_ginasio, repeticoes):
+    """Lista de (nome, operacao(i)) cobrindo os fluxos do menu e os serviços."""
+    from models.servicos import AlunoService, InstrutorService, ModalidadeService, MatriculaService
+    from models.relatorios import RelatorioService
+    from models.busca import BuscaService
+    from models import models as ginasio
+    from models.reservas import ReservaService
+    from models.frequencia import PresencaService, montar_evento
+    from models.exportacao import ExportacaoService
+    from models.grade import GradeService, GradeSemanal
+    from models.cobranca import CobrancaService
+    from models.manutencao import ManutencaoService
+    from models.instantaneo import Instantaneo
+    from models.indice_matriculas import IndiceMatriculasService, indice_matriculas
+
+    sessao = main.session
+    aleatorio = random.Random(7)
+    alunos = list(ids["alunos"])
+    aleatorio.shuffle(alunos)
+    modalidades = ids["modalidades"]
+    instrutores = ids["instrutores"]
+    # Cada cenário destrutivo consome seus próprios ids (repeticoes + 1 execuções)
+    por_cenario = repeticoes + 1
+    fatias = {nome: alunos[k * por_cenario:(k + 1) * por_cenario]
+              for k, nome in enumerate(["apagar_aluno", "excluir", "excluir_em_lote"])}
+    qualquer_aluno = lambda i: alunos[-(i % (len(alunos) // 2) + 1)]
+    qualquer_modalidade = lambda i: modalidades[i % len(modalidades)]
+    qualquer_instrutor = lambda i: instrutores[i % len(instrutores)]
+    nova_matricula = iter(range(10_000_000, 20_000_000))
+    inicio_presencas = datetime.datetime(2024, 3, 4, 6, 0)
+    pasta_exportacao = os.path.join(os.path.dirname(os.environ["ACADEMIA_DB_CAMINHO"]), "exportacao")
+    instrutores_ginasio = [linha.id for linha in ginasio_sessao.query(ginasio.Instrutor.id)]
+    lobby = lambda i: datetime.datetime(2024, 3, 4, 6, 0) + datetime.timedelta(minutes=i * 97)
+    instantaneo = Instantaneo(sessao.get_bind())
+
+    def no_instantaneo(relatorio):
+        def executar(i):
+            with instantaneo.sessao() as session:
+                return relatorio(session)
+        return executar
+
+    presencas = lambda i: [montar_evento(aluno_id=qualquer_aluno(i * 500 + k), modalidade_id=qualquer_modalidade(k),
+                                         momento=inicio_presencas + datetime.timedelta(minutes=i * 7 + k % 900))
+                           for k in range(500)]
+
+    def menu(funcao, *entradas):
+        def executar(i):
+            with respostas(*[e(i) if callable(e) else e for e in entradas]):
+                funcao()
+        return executar
+
+    cenarios = [
+        # --- Fluxos do menu (main.py) ---
+        ("menu: listar alunos", menu(main.listar_alunos, "q")),
+        ("menu: listar instrutores", menu(main.listar_instrutores, "q")),
+        ("menu: listar modalidades", menu(main.listar_modalidades)),
+        ("menu: modalidades de um aluno", menu(main.listar_matriculas_do_aluno, "q", lambda i: str(qualquer_aluno(i)))),
+        ("menu: buscar por nome", menu(main.buscar_pessoa_por_nome, lambda i: ["ana", "silva", "joao s", "mar"][i % 4])),
+        ("menu: adicionar aluno", menu(main.adicionar_aluno, "Aluno Benchmark", "30", lambda i: str(next(nova_matricula)))),
+        ("menu: matricular aluno", menu(main.matricular_aluno_em_modalidade, "q",
+                                        lambda i: str(qualquer_aluno(i)), lambda i: str(qualquer_modalidade(i)))),
+        ("menu: editar aluno", menu(main.editar_aluno, "q", lambda i: str(qualquer_aluno(i)), "Nome Editado", "", "")),
+        ("menu: editar instrutor", menu(main.editar_instrutor, "q", lambda i: str(qualquer_instrutor(i)), "", "41", "")),
+        ("menu: apagar aluno", menu(main.apagar_aluno, "q", lambda i: str(fatias["apagar_aluno"][i]), "s")),
+        # --- Serviços (models/servicos.py) ---
+        ("AlunoService.listar", lambda i: AlunoService.listar(sessao, prefixo_nome="Ma")),
+        ("AlunoService.editar", lambda i: AlunoService.editar(sessao, qualquer_aluno(i), idade=20 + i % 50)),
+        ("AlunoService.excluir", lambda i: AlunoService.excluir(sessao, fatias["excluir"][i])),
+        ("AlunoService.editar_em_lote (100)", lambda i: AlunoService.editar_em_lote(
+            sessao, [{"id": qualquer_aluno(i * 100 + k), "idade": 30} for k in range(100)])),
+        ("AlunoService.excluir_em_lote (simular 500)", lambda i: AlunoService.excluir_em_lote(
+            sessao, alunos[:500], simular=True)),
+        ("AlunoService.excluir_em_lote (1)", lambda i: AlunoService.excluir_em_lote(
+            sessao, [fatias["excluir_em_lote"][i]])),
+        ("InstrutorService.listar", lambda i: InstrutorService.listar(sessao)),
+        ("InstrutorService.editar", lambda i: InstrutorService.editar(sessao, qualquer_instrutor(i), idade=40)),
+        ("InstrutorService.editar_em_lote (10)", lambda i: InstrutorService.editar_em_lote(
+            sessao, [{"id": qualquer_instrutor(i + k), "idade": 45} for k in range(10)])),
+        ("ModalidadeService.editar", lambda i: ModalidadeService.editar(sessao, qualquer_modalidade(i), descricao=f"v{i}")),
+        ("ModalidadeService.excluir_em_lote (simular)", lambda i: ModalidadeService.excluir_em_lote(
+            sessao, [qualquer_modalidade(i)], simular=True)),
+        ("MatriculaService.matricular", lambda i: MatriculaService.matricular(sessao, qualquer_aluno(i), qualquer_modalidade(i + 1))),
+        ("MatriculaService.cancelar", lambda i: MatriculaService.cancelar(sessao, qualquer_aluno(i), qualquer_modalidade(i + 1))),
+        ("MatriculaService.listar_alunos_por_modalidade", lambda i: list(MatriculaService.listar_alunos_por_modalidade(
+            sessao, qualquer_modalidade(i)).alunos)),
+        ("MatriculaService.relatorio_quantidade_alunos_por_modalidade",
+         lambda i: MatriculaService.relatorio_quantidade_alunos_por_modalidade(sessao)),
+        ("RelatorioService.matriculas_por_faixa_etaria", lambda i: RelatorioService.matriculas_por_faixa_etaria(sessao)),
+        ("RelatorioService.alunos_sem_modalidade", lambda i: RelatorioService.alunos_sem_modalidade(sessao)),
+        ("IndiceMatriculas: montagem", lambda i: (indice_matriculas.invalidar(), indice_matriculas.bitmaps(sessao))),
+        ("IndiceMatriculasService.contar (A e B, não C)", lambda i: IndiceMatriculasService.contar(
+            sessao, todas=[qualquer_modalidade(i), qualquer_modalidade(i + 1)], nenhuma=[qualquer_modalidade(i + 2)])),
+        ("IndiceMatriculasService.alunos (3+ modalidades)", lambda i: IndiceMatriculasService.alunos(
+            sessao, minimo_modalidades=3)),
+        ("Instantaneo.atualizar", lambda i: instantaneo.atualizar()),
+        ("Instantaneo: matriculas_por_faixa_etaria",
+         no_instantaneo(RelatorioService.matriculas_por_faixa_etaria)),
+        ("Instantaneo: quantidade_alunos_por_modalidade",
+         no_instantaneo(RelatorioService.quantidade_alunos_por_modalidade)),
+        ("BuscaService.buscar", lambda i: BuscaService.buscar(sessao, "sil")),
+        ("PresencaService.gravar_lote (500)", lambda i: PresencaService.gravar_lote(sessao, presencas(i))),
+        ("PresencaService.ocupacao_por_hora", lambda i: PresencaService.ocupacao_por_hora(sessao, inicio_presencas.date())),
+        ("ExportacaoService.exportar (aluno csv.gz)", lambda i: ExportacaoService.exportar(
+            sessao, "aluno", pasta_exportacao, compressao="gzip")),
+        ("ExportacaoService.exportar (matricula jsonl)", lambda i: ExportacaoService.exportar(
+            sessao, "matricula", pasta_exportacao, formato="jsonl")),
+        # --- Entidades do models/models.py ---
+        ("ginásio: AulaGinastica.esta_cheia", lambda i: ginasio_sessao.get(
+            ginasio.AulaGinastica, ids_ginasio["aulas"][i % len(ids_ginasio["aulas"])]).esta_cheia()),
+        ("ginásio: membros atrasados", lambda i: ginasio_sessao.query(ginasio.Membro).filter(
+            ginasio.Membro.estado_pagamento == "Atrasado").count()),
+        ("ReservaService.reservar", lambda i: ReservaService.reservar(
+            ginasio_sessao, ids_ginasio["membros"][i % len(ids_ginasio["membros"])], ids_ginasio["aulas"][0])),
+        ("ReservaService.cancelar", lambda i: ReservaService.cancelar(
+            ginasio_sessao, ids_ginasio["membros"][i % len(ids_ginasio["membros"])], ids_ginasio["aulas"][0])),
+        ("CobrancaService.executar (simular)", lambda i: CobrancaService.executar(ginasio_sessao, simular=True)),
+        ("ManutencaoService.pendentes (semana)", lambda i: ManutencaoService.pendentes(
+            ginasio_sessao, datetime.date.today() + datetime.timedelta(days=7))),
+        ("ManutencaoService.fila + 10 itens", lambda i: ManutencaoService.fila(ginasio_sessao).proximos(10)),
+        ("ManutencaoService.registrar_em_lote (50)", lambda i: ManutencaoService.registrar_em_lote(
+            ginasio_sessao, range(i * 50 + 1, i * 50 + 51))),
+        ("GradeService.painel (cache)", lambda i: GradeService.painel(ginasio_sessao, lobby(i))),
+        ("GradeSemanal.carregar", lambda i: GradeSemanal.carregar(ginasio_sessao)),
+        ("GradeService.conflitos", lambda i: GradeService.conflitos(
+            ginasio_sessao, i % 7, "18:00", "19:00", sala="Sala 1", aula_id=ids_ginasio["aulas"][i % len(ids_ginasio["aulas"])])),
+        ("GradeService.conflitos_do_instrutor", lambda i: GradeService.conflitos_do_instrutor(
+            ginasio_sessao, instrutores_ginasio[i % len(instrutores_ginasio)])),
+    ]
+    return cenarios
+
+
+def imprimir_tabela(resultados):
+    cabecalho = f"{'Operação':<58} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'SQL/op':>7} {'Pico KiB':>9}"
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    for r in resultados:
+        print(f"{r['operacao']:<58} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['consultas']:>7.1f} {r['pico_memoria_kib']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do sistema da academia com dados sintéticos.")
+    padrao = Quantidades()
+    for campo, valor in vars(padrao).items():
+        parser.add_argument(f"--{campo.replace('_', '-')}", type=int, default=valor)
+    parser.add_argument("--repeticoes", type=int, default=30)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--filtro", help="Executa só as operações cujo nome contém este texto")
+    parser.add_argument("--json", help="Salva os resultados neste arquivo")
+    args = parser.parse_args()
+    quantidades = Quantidades(**{campo: getattr(args, campo) for campo in vars(padrao)})
+    # Os cenários de exclusão consomem ids da primeira metade dos alunos embaralhados
+    if quantidades.alunos < 6 * (args.repeticoes + 1):
+        parser.error("--alunos deve ser ao menos 6 x (repetições + 1) para os cenários de exclusão.")
+
+    with tempfile.TemporaryDirectory(prefix="academia-bench-") as pasta:
+        # O engine da aplicação é criado na importação de models.base, então a
+        # configuração precisa apontar para o banco temporário antes disso
+        os.environ["ACADEMIA_DB_URL"] = ""
+        os.environ["ACADEMIA_DB_CAMINHO"] = os.path.join(pasta, "academia.db")
+        os.environ["ACADEMIA_DB_ECHO"] = "nao"
+        import models
+        from models.models import setup_database, create_session
+
+        inicio = time.perf_counter()
+        models.preparar_banco()
+        ids = gerar_academia(models.engine, quantidades, args.semente)
+        engine_ginasio = setup_database(os.path.join(pasta, "ginasio.db"))
+        ids_ginasio = gerar_ginasio(engine_ginasio, quantidades, args.semente)
+        print(f"Dados sintéticos gerados em {time.perf_counter() - inicio:.1f}s "
+              f"({quantidades.alunos} alunos, {quantidades.membros} membros)", file=sys.stderr)
+
+        import main as menu_principal
+        menu_principal.carregar()
+        contador = ContadorConsultas(models.engine, engine_ginasio)
+        ginasio_sessao = create_session(engine_ginasio)
+
+        resultados = []
+        cenarios = montar_cenarios(menu_principal, ids, ginasio_sessao, ids_ginasio, args.repeticoes)
+        for nome, operacao in cenarios:
+            if args.filtro and args.filtro.lower() not in nome.lower():
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                resultado = medir(nome, operacao, args.repeticoes, contador)
+            resultados.append(resultado)
+
+        menu_principal.session.close()
+        ginasio_sessao.close()
+        engine_ginasio.dispose()
+        models.engine.dispose()
+
+    imprimir_tabela(resultados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as arquivo:
+            json.dump({"quantidades": vars(quantidades), "resultados": resultados}, arquivo, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
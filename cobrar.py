@@ -0,0 +1,66 @@
+"""Job noturno de cobrança dos membros do ginásio via linha de comando.
+
+Exemplos:
+    python cobrar.py                              # cobra até hoje, no academia.db
+    python cobrar.py --simular                    # só mostra o que mudaria
+    python cobrar.py --data 2024-03-31 --tolerancia 5
+    python cobrar.py --ginasio ginásio.db         # ginásio ainda não unificado
+
+Agende uma execução por dia (cron, Agendador de Tarefas); dias sem execução são
+cobrados na próxima.
+"""
+
+import argparse
+import datetime
+import time
+
+from models import garantir_esquema
+from models.base import Session
+from models.cobranca import CobrancaService, TOLERANCIA_DIAS
+
+
+def _data(texto):
+    try:
+        return datetime.date.fromisoformat(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"data inválida: {texto} (use AAAA-MM-DD)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Atualiza o estado de pagamento dos membros (Pago/Pendente/Atrasado).")
+    parser.add_argument("--data", type=_data, help="Data de referência AAAA-MM-DD (padrão: hoje)")
+    parser.add_argument("--tolerancia", type=int, default=TOLERANCIA_DIAS,
+                        help=f"Dias após o vencimento até o membro ficar Atrasado (padrão: {TOLERANCIA_DIAS})")
+    parser.add_argument("--simular", action="store_true", help="Só conta as mudanças, sem gravar")
+    parser.add_argument("--ginasio", help="Usa um ginásio.db separado em vez do academia.db")
+    args = parser.parse_args()
+
+    if args.ginasio:
+        from models.models import setup_database, create_session
+        session = create_session(setup_database(args.ginasio))
+    else:
+        try:
+            garantir_esquema()
+        except RuntimeError as e:
+            parser.exit(1, f"Erro: {e}\n")
+        session = Session()
+    try:
+        inicio = time.perf_counter()
+        resumo = CobrancaService.executar(session, args.data, tolerancia=args.tolerancia, simular=args.simular)
+    except ValueError as e:
+        parser.exit(1, f"Erro: {e}\n")
+    finally:
+        session.close()
+
+    desde = resumo.desde.isoformat() if resumo.desde else "primeira execução"
+    print(f"Cobrança de {resumo.data_referencia.isoformat()} (anterior: {desde})"
+          f"{' — simulação, nada foi gravado' if resumo.simulado else ''}")
+    print(f"{'Subscrição':<12} {'Pago→Pendente':>14} {'Pendente→Atrasado':>18}")
+    for transicao in resumo.por_subscricao:
+        print(f"{transicao.tipo_subscricao:<12} {transicao.novos_pendentes:>14} {transicao.novos_atrasados:>18}")
+    print(f"{'Total':<12} {resumo.novos_pendentes:>14} {resumo.novos_atrasados:>18}")
+    print(f"Tempo total: {time.perf_counter() - inicio:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,7 @@
-from models.base import Base, engine
-from models.pessoa import Pessoa
-from models.aluno import Aluno
-from models.instrutor import Instrutor
-from models.modalidade import Modalidade
+from models import preparar_banco
 
 
-Base.metadata.create_all(engine)
+# Passo único de instalação/atualização: create_all não altera tabelas existentes,
+# então índices, colunas novas e as tabelas do ginásio vêm das migrações
+preparar_banco()
 print("Tabelas criadas com sucesso.")
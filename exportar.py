@@ -0,0 +1,70 @@
+"""Exportação das entidades para CSV, JSONL ou Parquet via linha de comando.
+
+Exemplos:
+    python exportar.py --destino exportacao                        # todas as entidades, CSV
+    python exportar.py aluno matricula --formato jsonl --compressao gzip
+    python exportar.py --formato parquet --compressao zstd --incremental
+    python exportar.py membro reserva --ginasio ginásio.db         # tabelas de um ginásio.db separado
+"""
+
+import argparse
+import time
+
+from models import garantir_esquema
+from models.base import Session
+from models.exportacao import ExportacaoService, ENTIDADES, FORMATOS, TAMANHO_LOTE_PADRAO
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta os dados da academia em massa.")
+    parser.add_argument("entidades", nargs="*", metavar="entidade", help=f"Entidades a exportar (padrão: todas): {', '.join(ENTIDADES)}")
+    parser.add_argument("--destino", default="exportacao", help="Pasta de destino (padrão: exportacao)")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--compressao", help="gzip, bz2 ou xz (CSV/JSONL); snappy, gzip, zstd ou brotli (Parquet)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Só os registros com id acima da última exportação para o mesmo destino")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Linhas lidas por bloco")
+    parser.add_argument("--ginasio", help="Lê as tabelas do ginásio de um ginásio.db separado")
+    args = parser.parse_args()
+    invalidas = [entidade for entidade in args.entidades if entidade not in ENTIDADES]
+    if invalidas:
+        parser.error(f"entidade(s) inválida(s): {', '.join(invalidas)}")
+
+    try:
+        garantir_esquema()
+    except RuntimeError as e:
+        parser.exit(1, f"Erro: {e}\n")
+    sessao_ginasio = None
+    if args.ginasio:
+        from models.models import create_session
+        from models.unificacao import abrir_ginasio_somente_leitura
+        try:
+            sessao_ginasio = create_session(abrir_ginasio_somente_leitura(args.ginasio))
+        except ValueError as e:
+            parser.exit(1, f"Erro: {e}\n")
+    session = Session()
+    try:
+        inicio = time.perf_counter()
+        for entidade in args.entidades or ENTIDADES:
+            origem = session
+            if sessao_ginasio is not None and ExportacaoService.tabela_do_ginasio(entidade):
+                origem = sessao_ginasio
+            resultado = ExportacaoService.exportar(
+                origem, entidade, args.destino, formato=args.formato, compressao=args.compressao,
+                incremental=args.incremental, tamanho_lote=args.lote,
+            )
+            if resultado.arquivo is None:
+                print(f"{entidade}: nenhum registro novo (até o id {resultado.ultimo_id})")
+            else:
+                print(f"{entidade}: {resultado.registros} registro(s) em {resultado.arquivo}")
+        print(f"Tempo total: {time.perf_counter() - inicio:.2f}s")
+    except ValueError as e:
+        parser.exit(1, f"Erro: {e}\n")
+    finally:
+        session.close()
+        if sessao_ginasio is not None:
+            sessao_ginasio.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Importação em lote de alunos, instrutores ou modalidades via linha de comando.
+
+Exemplos:
+    python importar.py aluno alunos.csv
+    python importar.py instrutor instrutores.jsonl --lote 5000
+"""
+
+import argparse
+import time
+
+from models import garantir_esquema
+from models.base import Session
+from models.importacao import ImportacaoService, ler_registros, IMPORTADORES, TAMANHO_LOTE_PADRAO
+from models.resultados import formatar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa registros em lote para a academia.")
+    parser.add_argument("tipo", choices=sorted(IMPORTADORES), help="Tipo de registro a importar")
+    parser.add_argument("arquivo", help="Arquivo CSV (com cabeçalho) ou JSONL")
+    parser.add_argument("--formato", choices=["csv", "jsonl"], help="Força o formato do arquivo")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Registros por transação")
+    args = parser.parse_args()
+
+    try:
+        garantir_esquema()
+    except RuntimeError as e:
+        parser.exit(1, f"Erro: {e}\n")
+    session = Session()
+    try:
+        inicio = time.perf_counter()
+        relatorio = ImportacaoService.importar(
+            session, args.tipo, ler_registros(args.arquivo, args.formato), tamanho_lote=args.lote
+        )
+        print(formatar(relatorio.dados()))
+        print(f"Tempo total: {time.perf_counter() - inicio:.2f}s")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
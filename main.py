@@ -1,57 +1,140 @@
-import logging
-logging.basicConfig()
+import time
 
-logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+_INICIO = time.perf_counter()
 
-from models.base import Session
-from models.aluno import Aluno
-from models.instrutor import Instrutor
-from models.modalidade import Modalidade
-from sqlalchemy.orm import joinedload
-from sqlalchemy.exc import IntegrityError
-from models.matricula import Matricula
+import sys
+import threading
 
-# Cria uma sessão global para ser usada pelas funções
+# Só biblioteca padrão: o pacote models e o SQLAlchemy são carregados por _importar()
+from models.instrumentacao import medida, metricas, instrumentacao_ativa
+
+# Sessão global usada pelas funções, aberta por carregar()
 # (Para aplicações maiores, considerar padrões de gestão de sessão mais robustos)
-session = Session()
+session = None
+_trava_carga = threading.Lock()
+
+
+_importado = False
+
+
+def _importar():
+    """Importa o SQLAlchemy, os modelos e os serviços (só na primeira vez), sem abrir o banco.
+
+    O menu aparece antes disso; a importação é adiantada em segundo plano
+    enquanto o usuário escolhe a opção e, se ainda não terminou, a primeira
+    ação a aguarda.
+    """
+    global Aluno, Instrutor, Modalidade, Matricula, joinedload, IntegrityError
+    global AlunoService, InstrutorService, MatriculaService, BuscaService, CacheService
+    global simular_exclusao, formatar, _importado
+    with _trava_carga:
+        if _importado:
+            return
+        from sqlalchemy.orm import joinedload
+        from sqlalchemy.exc import IntegrityError
+        from models.base import configurar_logging
+        from models.aluno import Aluno
+        from models.instrutor import Instrutor
+        from models.modalidade import Modalidade
+        from models.matricula import Matricula
+        from models.servicos import AlunoService, InstrutorService, MatriculaService
+        from models.busca import BuscaService
+        from models.exclusao import simular_exclusao
+        from models.resultados import formatar
+        from models.cache import CacheService
+
+        configurar_logging()
+        _importado = True
+
+
+def carregar():
+    """Na primeira ação: conclui a importação, confere a versão do banco e abre a sessão global.
+
+    Levanta RuntimeError se o banco estiver desatualizado (veja garantir_esquema).
+    """
+    global session
+    _importar()
+    with _trava_carga:
+        if session is not None:
+            return
+        from models import garantir_esquema
+        from models.base import Session
+
+        garantir_esquema()
+        session = Session()
+
+
+def _importar_em_segundo_plano():
+    try:
+        _importar()
+    except Exception:
+        # O erro reaparece (e é exibido) quando a primeira ação chamar carregar()
+        pass
 
 # --- Funções de Listagem ---
 
+def _listar_paginado(listar_pagina, formatar, vazio):
+    """Exibe uma listagem página a página (cursor por nome/id).
+
+    Entre as páginas o usuário pode seguir (Enter), parar (q) ou digitar um
+    prefixo de nome para filtrar. Retorna True se algum registro foi exibido.
+    """
+    prefixo = None
+    cursor = None
+    exibiu = False
+    while True:
+        pagina = listar_pagina(session, cursor=cursor, prefixo_nome=prefixo)
+        if not pagina.itens:
+            if not prefixo:
+                print(vazio)
+                return exibiu
+            print(f"Nenhum registro começando com '{prefixo}'.")
+        for item in pagina.itens:
+            print(formatar(item))
+            exibiu = True
+        dica = "[Enter] próxima página | [q] encerrar lista" if pagina.proximo_cursor else "[Enter] encerrar lista"
+        escolha = input(f"{dica} | ou digite o início de um nome para filtrar: ").strip()
+        if escolha.lower() == "q" or (not escolha and pagina.proximo_cursor is None):
+            return exibiu
+        if escolha:
+            prefixo, cursor = escolha, None
+        else:
+            cursor = pagina.proximo_cursor
+
+@medida
 def listar_alunos():
-    """Lista todos os alunos cadastrados."""
+    """Lista os alunos cadastrados, uma página por vez."""
     try:
-        alunos = session.query(Aluno).order_by(Aluno._nome).all()
         print("\n=== Lista de Alunos ===")
-        if not alunos:
-            print("Nenhum aluno cadastrado.")
-            return False # Indica que a lista está vazia
-        for aluno in alunos:
-            # Usar o método exibir_detalhes se disponível e útil, ou formatar aqui
-            print(f"ID: {aluno.id}, Nome: {aluno.nome}, Idade: {aluno.idade}, Matrícula: {aluno.matricula}")
-        return True # Indica que há alunos para escolher
+        return _listar_paginado(
+            AlunoService.listar,
+            lambda a: f"ID: {a.id}, Nome: {a.nome}, Idade: {a.idade}, Matrícula: {a.matricula}",
+            "Nenhum aluno cadastrado.",
+        )
     except Exception as e:
         print(f"Erro ao listar alunos: {e}")
         return False
 
+@medida
 def listar_instrutores():
-    """Lista todos os instrutores cadastrados."""
+    """Lista os instrutores cadastrados, uma página por vez."""
     try:
-        instrutores = session.query(Instrutor).order_by(Instrutor._nome).all()
         print("\n=== Lista de Instrutores ===")
-        if not instrutores:
-            print("Nenhum instrutor cadastrado.")
-            return False
-        for instrutor in instrutores:
-            print(f"ID: {instrutor.id}, Nome: {instrutor.nome}, Idade: {instrutor.idade}, CREF: {instrutor.cref}")
-        return True
+        return _listar_paginado(
+            InstrutorService.listar,
+            lambda i: f"ID: {i.id}, Nome: {i.nome}, Idade: {i.idade}, CREF: {i.cref}",
+            "Nenhum instrutor cadastrado.",
+        )
     except Exception as e:
         print(f"Erro ao listar instrutores: {e}")
         return False
 
+@medida
 def listar_modalidades():
     """Lista todas as modalidades cadastradas."""
     try:
-        modalidades = session.query(Modalidade).order_by(Modalidade.nome).all()
+        # Catálogo em cache: listado antes de cada matrícula sem voltar ao banco
+        modalidades = CacheService.modalidades(session)
         print("\n=== Lista de Modalidades ===")
         if not modalidades:
             print("Nenhuma modalidade cadastrada.")
@@ -65,6 +148,7 @@ def listar_modalidades():
 
 # --- Funções de Consulta Específica ---
 
+@medida
 def listar_matriculas_do_aluno():
     """Lista as modalidades em que um aluno específico está matriculado."""
     if not listar_alunos(): # Só prossegue se houver alunos
@@ -95,8 +179,24 @@ def listar_matriculas_do_aluno():
     except Exception as e:
         print(f"Erro ao listar matrículas do aluno: {e}")
 
+@medida
+def buscar_pessoa_por_nome():
+    """Busca alunos e instrutores pelo nome (parcial, sem diferenciar acentos)."""
+    try:
+        termo = input("Digite o nome (ou parte dele) a buscar: ").strip()
+        resultados = BuscaService.buscar(session, termo)
+        print(f"\n=== Resultados para '{termo}' ===")
+        if not resultados:
+            print("Nenhuma pessoa encontrada.")
+            return
+        for pessoa in resultados:
+            print(f"ID: {pessoa.id}, Nome: {pessoa.nome}, Tipo: {pessoa.tipo.capitalize()}")
+    except Exception as e:
+        print(f"Erro ao buscar pessoas: {e}")
+
 # --- Funções de Adição ---
 
+@medida
 def adicionar_aluno():
     """Adiciona um novo aluno ao sistema."""
     try:
@@ -127,6 +227,7 @@ def adicionar_aluno():
         session.rollback()
         print(f"Erro inesperado ao adicionar aluno: {e}")
 
+@medida
 def adicionar_instrutor():
     """Adiciona um novo instrutor ao sistema."""
     try:
@@ -157,6 +258,7 @@ def adicionar_instrutor():
         session.rollback()
         print(f"Erro inesperado ao adicionar instrutor: {e}")
 
+@medida
 def adicionar_modalidade():
     """Adiciona uma nova modalidade ao sistema."""
     try:
@@ -185,15 +287,13 @@ def adicionar_modalidade():
 
 # --- Função de Matrícula (Revisada) ---
 
+@medida
 def matricular_aluno_em_modalidade():
     """Matricula um aluno existente em uma modalidade existente."""
     if not listar_alunos(): return
     try:
         aluno_id = int(input("\nDigite o ID do aluno que deseja matricular: "))
-        # Carrega o aluno e suas matrículas/modalidades associadas
-        aluno = session.query(Aluno).options(
-            joinedload(Aluno.matriculas).joinedload(Matricula.modalidade)
-        ).filter_by(id=aluno_id).first()
+        aluno = session.get(Aluno, aluno_id)
 
         if not aluno:
             print(f"Aluno com ID {aluno_id} não encontrado.")
@@ -201,32 +301,20 @@ def matricular_aluno_em_modalidade():
 
         if not listar_modalidades(): return
         mod_id = int(input("\nDigite o ID da modalidade para matrícula: "))
-        # Busca a modalidade pelo ID
-        modalidade = session.get(Modalidade, mod_id)
+        # Busca a modalidade pelo ID no catálogo em cache
+        modalidade = CacheService.modalidade(session, mod_id)
 
         if not modalidade:
             print(f"Modalidade com ID {mod_id} não encontrada.")
             return
 
-        # Verifica se a matrícula já existe na coleção carregada do aluno
-        # Esta verificação é feita em memória nos dados já carregados
-        matricula_existente = None
-        for m in aluno.matriculas:
-            if m.modalidade_id == modalidade.id:
-                matricula_existente = m
-                break
-
-        if matricula_existente:
+        # Insere direto com ON CONFLICT DO NOTHING: a verificação de duplicidade
+        # fica a cargo do índice único, sem carregar as matrículas do aluno
+        if not MatriculaService.inserir(session, aluno.id, modalidade.id):
             print(f"O aluno '{aluno.nome}' já está matriculado na modalidade '{modalidade.nome}'.")
+            session.rollback()
             return
 
-        # Se não existe, cria a nova matrícula
-        # O construtor da Matricula espera as instâncias de Aluno e Modalidade
-        nova_matricula = Matricula(aluno=aluno, modalidade=modalidade)
-        session.add(nova_matricula)
-        # Opcional: adicionar a nova matrícula à coleção do aluno em memória
-        # aluno.matriculas.append(nova_matricula) # SQLAlchemy geralmente faz isso automaticamente
-
         session.commit()
         print(f"Aluno '{aluno.nome}' matriculado com sucesso na modalidade '{modalidade.nome}'.")
 
@@ -244,6 +332,7 @@ def matricular_aluno_em_modalidade():
 
 # --- Funções de Edição --- (Implementação Nova)
 
+@medida
 def editar_aluno():
     """Edita os dados de um aluno existente."""
     if not listar_alunos(): return
@@ -263,16 +352,15 @@ def editar_aluno():
         nova_idade_str = input(f"Nova idade ({aluno.idade}): ").strip()
         nova_matricula_str = input(f"Nova matrícula ({aluno.matricula}): ").strip()
 
-        # Atualizar apenas se novos valores foram fornecidos
-        if novo_nome:
-            aluno.nome = novo_nome
-        if nova_idade_str:
-            aluno.idade = int(nova_idade_str) # Pode gerar ValueError
-        if nova_matricula_str:
-            aluno.matricula = int(nova_matricula_str) # Pode gerar ValueError ou IntegrityError
-
-        session.commit()
-        print(f"Dados do aluno '{aluno.nome}' atualizados com sucesso.")
+        # O serviço altera apenas os campos informados (None mantém o valor atual)
+        dados = AlunoService.editar(
+            session, aluno.id,
+            nome=novo_nome or None,
+            idade=int(nova_idade_str) if nova_idade_str else None, # Pode gerar ValueError
+            matricula=int(nova_matricula_str) if nova_matricula_str else None, # Pode gerar ValueError ou IntegrityError
+        )
+        print(f"Dados do aluno '{dados.nome}' atualizados com sucesso.")
+        print(formatar(dados))
 
     except ValueError:
         print("Erro: Idade e Matrícula devem ser números inteiros válidos.")
@@ -284,6 +372,7 @@ def editar_aluno():
         session.rollback()
         print(f"Erro inesperado ao editar aluno: {e}")
 
+@medida
 def editar_instrutor():
     """Edita os dados de um instrutor existente."""
     if not listar_instrutores(): return
@@ -303,16 +392,15 @@ def editar_instrutor():
         nova_idade_str = input(f"Nova idade ({instrutor.idade}): ").strip()
         novo_cref = input(f"Novo CREF ({instrutor.cref}): ").strip()
 
-        # Atualizar apenas se novos valores foram fornecidos
-        if novo_nome:
-            instrutor.nome = novo_nome
-        if nova_idade_str:
-            instrutor.idade = int(nova_idade_str) # Pode gerar ValueError
-        if novo_cref:
-            instrutor.cref = novo_cref # Pode gerar ValueError (validação no setter)
-
-        session.commit()
-        print(f"Dados do instrutor '{instrutor.nome}' atualizados com sucesso.")
+        # O serviço altera apenas os campos informados (None mantém o valor atual)
+        dados = InstrutorService.editar(
+            session, instrutor.id,
+            nome=novo_nome or None,
+            idade=int(nova_idade_str) if nova_idade_str else None, # Pode gerar ValueError
+            cref=novo_cref or None, # Pode gerar ValueError (validação no setter)
+        )
+        print(f"Dados do instrutor '{dados.nome}' atualizados com sucesso.")
+        print(formatar(dados))
 
     except ValueError as e:
         # Captura erros de validação dos setters (idade, cref)
@@ -327,6 +415,7 @@ def editar_instrutor():
 
 # --- Funções de Exclusão --- (Implementação Nova para Instrutor)
 
+@medida
 def apagar_aluno():
     """Apaga um aluno existente do sistema."""
     if not listar_alunos(): return
@@ -338,17 +427,16 @@ def apagar_aluno():
             print(f"Aluno com ID {aluno_id} não encontrado.")
             return
 
-        confirmacao = input(f"Tem certeza que deseja apagar o aluno '{aluno.nome}' (ID: {aluno.id})? \nIsso também removerá todas as suas matrículas. (s/n): ").lower()
+        # Conta antes (sem carregar as matrículas) para informar o que será removido
+        previsao = simular_exclusao(session, Aluno, [aluno.id])
+        confirmacao = input(f"Tem certeza que deseja apagar o aluno '{aluno.nome}' (ID: {aluno.id})? \nIsso também removerá {previsao.matriculas} matrícula(s). (s/n): ").lower()
 
         if confirmacao == 's':
-            # SQLAlchemy deve cuidar da exclusão em cascata das matrículas se configurado corretamente
-            # (cascade="all, delete-orphan" na relação Aluno.matriculas)
-            # Vamos verificar se a cascata está configurada em aluno.py
-            # Se não estiver, precisaríamos apagar as matrículas manualmente primeiro:
-            # session.query(Matricula).filter_by(aluno_id=aluno.id).delete()
-            session.delete(aluno)
-            session.commit()
-            print(f"Aluno '{aluno.nome}' apagado com sucesso.")
+            # DELETEs por conjunto (matrículas, alunos, pessoas) em vez de session.delete,
+            # que carregaria e apagaria cada matrícula individualmente
+            nome = aluno.nome
+            contagem = AlunoService.excluir(session, aluno.id)
+            print(f"Aluno '{nome}' apagado com sucesso ({contagem.matriculas} matrícula(s) removida(s)).")
         else:
             print("Operação cancelada.")
 
@@ -363,6 +451,7 @@ def apagar_aluno():
         session.rollback()
         print(f"Erro inesperado ao apagar aluno: {e}")
 
+@medida
 def apagar_instrutor():
     """Apaga um instrutor existente do sistema."""
     if not listar_instrutores(): return
@@ -389,9 +478,9 @@ def apagar_instrutor():
         confirmacao = input(f"Tem certeza que deseja apagar o instrutor '{instrutor.nome}' (ID: {instrutor.id})? (s/n): ").lower()
 
         if confirmacao == 's':
-            session.delete(instrutor)
-            session.commit()
-            print(f"Instrutor '{instrutor.nome}' apagado com sucesso.")
+            nome = instrutor.nome
+            InstrutorService.excluir(session, instrutor.id)
+            print(f"Instrutor '{nome}' apagado com sucesso.")
         else:
             print("Operação cancelada.")
 
@@ -428,12 +517,20 @@ def menu():
         print("--- Apagar ---")
         print("11 - Apagar Aluno")
         print("12 - Apagar Instrutor")
+        print("--- Buscar ---")
+        print("13 - Buscar Aluno/Instrutor por Nome")
         print("--- Sair ---")
-        print("13 - Sair")
+        print("14 - Sair")
         print("====================================================")
 
         opcao = input("Escolha uma opção: ").strip()
 
+        if opcao != "14":
+            try:
+                carregar()
+            except RuntimeError as e:
+                sys.exit(f"Erro: {e}")
+
         if opcao == "1":
             listar_alunos()
         elif opcao == "2":
@@ -459,6 +556,8 @@ def menu():
         elif opcao == "12":
             apagar_instrutor()
         elif opcao == "13":
+            buscar_pessoa_por_nome()
+        elif opcao == "14":
             print("Saindo do sistema...")
             break
         else:
@@ -466,13 +565,32 @@ def menu():
 
 # --- Ponto de Entrada --- 
 
+def medir_inicializacao():
+    """Imprime o tempo até o menu ficar interativo e o tempo da carga adiada (em ms)."""
+    pronto = time.perf_counter()
+    carregar()
+    carregado = time.perf_counter()
+    session.execute(Aluno.__table__.select().limit(1)).all()
+    primeira_consulta = time.perf_counter()
+    print(f"Menu interativo: {(pronto - _INICIO) * 1000:.1f} ms desde a importação do main.py")
+    print(f"Carga de modelos e serviços: {(carregado - pronto) * 1000:.1f} ms")
+    print(f"Primeira consulta: {(primeira_consulta - carregado) * 1000:.1f} ms")
+
+
 if __name__ == "__main__":
-    # Opcional: Criar tabelas se não existirem (geralmente feito separadamente)
-    # from models.base import Base, engine
-    # Base.metadata.create_all(engine)
-    
+    if "--medir-inicio" in sys.argv[1:]:
+        medir_inicializacao()
+        sys.exit(0)
+
+    # Criar e migrar o esquema é um passo à parte (create_tables.py, migrar.py); em segundo
+    # plano só se adiantam as importações: o banco é aberto na primeira ação do menu
+    threading.Thread(target=_importar_em_segundo_plano, name="carga", daemon=True).start()
     print("Bem-vindo ao Sistema de Gerenciamento da Academia!")
     menu() # Inicia o loop do menu
-    session.close() # Fecha a sessão ao sair do programa
+    if session is not None:
+        session.close() # Fecha a sessão ao sair do programa
+    if instrumentacao_ativa():
+        print("\n=== Métricas de consultas por operação ===")
+        metricas.exibir()
     print("Sessão com o banco de dados fechada.")
 
@@ -0,0 +1,90 @@
+"""Migrações do banco e unificação com um ginásio.db via linha de comando.
+
+Exemplos:
+    python migrar.py                            # versão do academia.db e migrações pendentes
+    python migrar.py aplicar                    # aplica as pendentes
+    python migrar.py aplicar --ginasio ginásio.db
+    python migrar.py unificar ginásio.db --lote 2000 --pausa 0.05
+    python migrar.py reconciliar --verificar    # confere os contadores de matrículas
+"""
+
+import argparse
+import time
+
+from models import preparar_banco
+from models.base import engine, Session
+from models.migracoes import MIGRACOES, MIGRACOES_GINASIO, aplicar_migracoes, migracoes_pendentes, versao_atual
+from models.unificacao import unificar_ginasio, TAMANHO_LOTE_PADRAO
+
+
+def _engine_ginasio(caminho):
+    from models.base import criar_engine
+    return criar_engine(f"sqlite:///{caminho}")
+
+
+def exibir_estado(engine_alvo, migracoes, descricao):
+    with engine_alvo.connect() as conexao:
+        versao = versao_atual(conexao)
+    pendentes = migracoes_pendentes(engine_alvo, migracoes)
+    print(f"{descricao}: versão {versao} de {len(migracoes)}")
+    for nome in pendentes:
+        print(f"  pendente: {nome}")
+    if not pendentes:
+        print("  Nenhuma migração pendente.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrações do banco da academia.")
+    subcomandos = parser.add_subparsers(dest="comando")
+    estado = subcomandos.add_parser("estado", help="Mostra a versão e as migrações pendentes (padrão)")
+    estado.add_argument("--ginasio", help="Consulta um ginásio.db separado em vez do academia.db")
+    aplicar = subcomandos.add_parser("aplicar", help="Aplica as migrações pendentes")
+    aplicar.add_argument("--ginasio", help="Migra um ginásio.db separado em vez do academia.db")
+    unificar = subcomandos.add_parser("unificar", help="Copia um ginásio.db para o academia.db")
+    unificar.add_argument("arquivo", help="Caminho do ginásio.db")
+    unificar.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="Registros por transação")
+    unificar.add_argument("--pausa", type=float, default=0.0, help="Segundos de espera entre lotes")
+    reconciliar = subcomandos.add_parser(
+        "reconciliar", help="Confere e corrige os contadores de matrículas (total_matriculas/total_modalidades)"
+    )
+    reconciliar.add_argument("--verificar", action="store_true", help="Só conta as divergências, sem corrigir")
+    args = parser.parse_args()
+
+    if args.comando in (None, "estado"):
+        caminho = getattr(args, "ginasio", None)
+        if caminho:
+            exibir_estado(_engine_ginasio(caminho), MIGRACOES_GINASIO, caminho)
+        else:
+            exibir_estado(engine, MIGRACOES, "academia.db")
+    elif args.comando == "aplicar":
+        if args.ginasio:
+            aplicadas = aplicar_migracoes(_engine_ginasio(args.ginasio), MIGRACOES_GINASIO)
+        else:
+            aplicadas = preparar_banco()
+        for nome in aplicadas:
+            print(f"Aplicada: {nome}")
+        print(f"{len(aplicadas)} migração(ões) aplicada(s).")
+    elif args.comando == "reconciliar":
+        from models.servicos import MatriculaService
+        with Session() as session:
+            divergencias = MatriculaService.reconciliar_contadores(session, corrigir=not args.verificar)
+        acao = "divergente(s)" if args.verificar else "corrigida(s)"
+        print(f"Modalidades: {divergencias.modalidades} {acao}")
+        print(f"Alunos: {divergencias.alunos} {acao}")
+    else:
+        inicio = time.perf_counter()
+        try:
+            resultados = unificar_ginasio(
+                engine, args.arquivo, tamanho_lote=args.lote, pausa=args.pausa,
+                ao_lote=lambda tabela, copiados: print(f"  {tabela}: {copiados} copiados".ljust(40), end="\r"),
+            )
+        except ValueError as e:
+            parser.exit(1, f"Erro: {e}\n")
+        print()
+        for resultado in resultados:
+            print(f"{resultado.tabela}: {resultado.copiados} copiados, {resultado.ignorados} ignorados")
+        print(f"Tempo total: {time.perf_counter() - inicio:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
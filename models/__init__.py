@@ -1,8 +1,80 @@
-from .base import Base, engine, Session
-from .pessoa import Pessoa
-from .aluno import Aluno
-from .instrutor import Instrutor
-from .modalidade import Modalidade
-from .matricula import Matricula
-
-Base.metadata.create_all(engine)
+"""Modelos da academia.
+
+Importar o pacote não carrega o SQLAlchemy nem abre o banco: os nomes abaixo são
+importados no primeiro acesso (ex.: `models.Aluno`). O esquema não é mais
+criado na importação; ele é preparado por preparar_banco() (create_tables.py,
+migrar.py). Na primeira ação, os programas chamam garantir_esquema(), que só
+consulta a versão do banco e recusa um banco desatualizado.
+"""
+
+import importlib
+
+# nome exportado -> submódulo onde ele é definido
+_EXPORTADOS = {
+    "Base": ".base",
+    "engine": ".base",
+    "Session": ".base",
+    "Pessoa": ".pessoa",
+    "Aluno": ".aluno",
+    "Instrutor": ".instrutor",
+    "Modalidade": ".modalidade",
+    "Matricula": ".matricula",
+    "Presenca": ".presenca",
+    "PresencaPorHora": ".presenca",
+    "PresencaPorDia": ".presenca",
+    "aplicar_migracoes": ".migracoes",
+}
+
+# Módulos com as tabelas do academia.db (Base.metadata)
+MODULOS_MODELOS = (".pessoa", ".aluno", ".instrutor", ".modalidade", ".matricula", ".presenca")
+
+
+def __getattr__(nome):
+    if nome not in _EXPORTADOS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(_EXPORTADOS[nome], __name__), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def carregar_modelos():
+    """Importa todos os modelos, registrando as tabelas e os mapeamentos."""
+    for modulo in MODULOS_MODELOS:
+        importlib.import_module(modulo, __name__)
+
+
+def preparar_banco(engine_alvo=None):
+    """Cria as tabelas que faltam e aplica as migrações pendentes. Retorna as migrações aplicadas."""
+    from .base import Base, engine
+    from .migracoes import aplicar_migracoes
+
+    engine_alvo = engine if engine_alvo is None else engine_alvo
+    carregar_modelos()
+    Base.metadata.create_all(engine_alvo)
+    return aplicar_migracoes(engine_alvo)
+
+
+def garantir_esquema(engine_alvo=None):
+    """Confere se o banco está na última migração; levanta RuntimeError se estiver atrás.
+
+    Custa um único `PRAGMA user_version`, sem a reflexão de tabelas do
+    create_all. As migrações podem excluir registros e recriar tabelas, então
+    nunca rodam aqui: são um passo à parte (`python migrar.py aplicar`). A
+    única exceção é um banco vazio, sem nenhuma tabela, que é criado direto na
+    última versão. Retorna as migrações aplicadas (só no banco vazio).
+    """
+    from sqlalchemy import text
+    from .base import engine
+    from .migracoes import MIGRACOES, versao_atual
+
+    engine_alvo = engine if engine_alvo is None else engine_alvo
+    with engine_alvo.connect() as conexao:
+        versao = versao_atual(conexao)
+        vazio = versao == 0 and conexao.execute(text("SELECT 1 FROM sqlite_master LIMIT 1")).first() is None
+    if vazio:
+        return preparar_banco(engine_alvo)
+    if versao < len(MIGRACOES):
+        raise RuntimeError(
+            f"Banco na versão {versao} de {len(MIGRACOES)}; aplique as migrações antes: python migrar.py aplicar"
+        )
+    return []
@@ -1,15 +1,19 @@
 from sqlalchemy import Column, Integer, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, object_session
 from models.pessoa import Pessoa
+from models.resultados import DadosAluno
 
 
 class Aluno(Pessoa):
     __tablename__ = "alunos"
 
-    id = Column(Integer, ForeignKey("pessoas.id"), primary_key=True)
+    id = Column(Integer, ForeignKey("pessoas.id", ondelete="CASCADE"), primary_key=True)
     _matricula = Column("matricula", Integer, unique=True)
+    # Contador desnormalizado de modalidades do aluno (veja Modalidade.total_matriculas)
+    total_modalidades = Column(Integer, nullable=False, default=0, server_default="0")
 
-    matriculas = relationship("Matricula", back_populates="aluno")  # relação 1:N
+    # relação 1:N; passive_deletes deixa o banco apagar as matrículas (ON DELETE CASCADE)
+    matriculas = relationship("Matricula", back_populates="aluno", cascade="all, delete-orphan", passive_deletes=True)
 
     __mapper_args__ = {
         "polymorphic_identity": "aluno",
@@ -25,14 +29,20 @@ class Aluno(Pessoa):
 
     @matricula.setter
     def matricula(self, valor):
+        self._matricula = Aluno.validar_matricula(valor)
+
+    @staticmethod
+    def validar_matricula(valor):
         if not isinstance(valor, int) or valor <= 0:
             raise ValueError("Matrícula deve ser um inteiro positivo.")
-        self._matricula = valor
-
-    def exibir_detalhes(self):
-        if self.matriculas:
-            nomes_modalidades = sorted([m.modalidade.nome for m in self.matriculas])
-            modalidades_str = " | ".join(nomes_modalidades)
+        return valor
+
+    def dados(self):
+        session = object_session(self)
+        if session is not None and self.id is not None:
+            # Resumo em cache (uma consulta com JOIN na falta), sem carregar cada matrícula
+            from models.cache import CacheService
+            nomes_modalidades = CacheService.modalidades_do_aluno(session, self.id)
         else:
-            modalidades_str = "Nenhuma modalidade cadastrada"
-        print(f"Aluno: {self.nome}, Idade: {self.idade}, Matrícula: {self.matricula}, Modalidades: {modalidades_str}")
+            nomes_modalidades = tuple(sorted(m.modalidade.nome for m in self.matriculas))
+        return DadosAluno(self.id, self.nome, self.idade, self.matricula, nomes_modalidades)
@@ -0,0 +1,472 @@
+"""Rotas JSON do modo servidor (servidor.py) sobre os serviços de models/servicos.py.
+
+Cada rota recebe a sessão da requisição, os parâmetros do caminho (ids), a
+query string e o corpo JSON já decodificado, e retorna (status HTTP, dados
+serializáveis). Erros esperados viram ErroApi com o status adequado.
+"""
+
+import base64
+import binascii
+import bisect
+import datetime
+import json
+import re
+from collections import namedtuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from models.aluno import Aluno
+from models.instrutor import Instrutor
+from models.modalidade import Modalidade
+from models.matricula import Matricula
+from models.servicos import AlunoService, InstrutorService, ModalidadeService, MatriculaService
+from models.relatorios import RelatorioService
+from models.busca import BuscaService
+from models.transacao import confirmar
+from models.cache import CacheService
+from models.frequencia import PresencaService, montar_evento
+from models.models import AulaGinastica
+from models.grade import GradeService, minutos, texto_minutos
+from models.manutencao import ManutencaoService
+from models.indice_matriculas import IndiceMatriculasService
+
+LIMITE_MAXIMO_PAGINA = 200
+LIMITE_EVENTOS_POR_REQUISICAO = 5000
+
+# instantaneo: leitura pesada que pode ser servida pelo instantâneo em memória (models/instantaneo.py)
+Rota = namedtuple("Rota", ["metodo", "padrao", "funcao", "instantaneo"], defaults=(False,))
+
+
+class ErroApi(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+# --- Conversões ---
+
+def _inteiro(valor, campo, padrao=None):
+    if valor is None or valor == "":
+        if padrao is None:
+            raise ErroApi(400, f"Campo '{campo}' é obrigatório.")
+        return padrao
+    if isinstance(valor, bool):
+        raise ErroApi(400, f"Campo '{campo}' deve ser um número inteiro.")
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErroApi(400, f"Campo '{campo}' deve ser um número inteiro.")
+
+
+def _opcional_inteiro(valor, campo):
+    return None if valor in (None, "") else _inteiro(valor, campo)
+
+
+def _data(valor, campo, padrao=None):
+    if not valor:
+        if padrao is None:
+            raise ErroApi(400, f"Campo '{campo}' é obrigatório.")
+        return padrao
+    try:
+        return datetime.date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ErroApi(400, f"Campo '{campo}' deve ser uma data AAAA-MM-DD.")
+
+
+def _momento(valor):
+    if valor in (None, ""):
+        return None
+    try:
+        return datetime.datetime.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ErroApi(400, "Campo 'momento' deve ser data e hora ISO 8601.")
+
+
+def _limite(consulta, padrao=20):
+    limite = _inteiro(consulta.get("limite"), "limite", padrao)
+    if not 0 < limite <= LIMITE_MAXIMO_PAGINA:
+        raise ErroApi(400, f"Limite deve estar entre 1 e {LIMITE_MAXIMO_PAGINA}.")
+    return limite
+
+
+def codificar_cursor(cursor):
+    """Transforma o cursor (nome, id) da paginação em um texto opaco para a URL."""
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(cursor)).encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor(texto):
+    if not texto:
+        return None
+    try:
+        nome, pessoa_id = json.loads(base64.urlsafe_b64decode(texto.encode("ascii")))
+        return nome, int(pessoa_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ErroApi(400, "Cursor inválido.")
+
+
+def _modalidades(valor):
+    """Lista separada por vírgulas de nomes ou ids de modalidades."""
+    itens = [item.strip() for item in (valor or "").split(",") if item.strip()]
+    return [int(item) if item.isdigit() else item for item in itens]
+
+
+def _pagina(pagina):
+    return {"itens": [dict(item._mapping) for item in pagina.itens],
+            "proximo_cursor": codificar_cursor(pagina.proximo_cursor)}
+
+
+def _linhas(linhas):
+    return [dict(linha._mapping) for linha in linhas]
+
+
+def _buscar_ou_404(session, modelo, registro_id, descricao):
+    registro = session.get(modelo, registro_id)
+    if registro is None:
+        raise ErroApi(404, f"{descricao} com ID {registro_id} não encontrado(a).")
+    return registro
+
+
+def _criar(session, registro, mensagem_conflito):
+    session.add(registro)
+    try:
+        confirmar(session)
+    except IntegrityError:
+        session.rollback()
+        raise ErroApi(409, mensagem_conflito)
+    return 201, {"id": registro.id}
+
+
+def _listar_pessoas(listar, consulta):
+    pagina = listar(
+        limite=_limite(consulta),
+        cursor=decodificar_cursor(consulta.get("cursor")),
+        prefixo_nome=consulta.get("prefixo") or None,
+        idade_min=_opcional_inteiro(consulta.get("idade_min"), "idade_min"),
+        idade_max=_opcional_inteiro(consulta.get("idade_max"), "idade_max"),
+    )
+    return 200, _pagina(pagina)
+
+
+# --- Alunos ---
+
+def listar_alunos(session, consulta, corpo):
+    return _listar_pessoas(lambda **filtros: AlunoService.listar(session, **filtros), consulta)
+
+
+def obter_aluno(session, consulta, corpo, aluno_id):
+    aluno = session.scalars(
+        select(Aluno).options(joinedload(Aluno.matriculas).joinedload(Matricula.modalidade)).where(Aluno.id == aluno_id)
+    ).unique().first()
+    if aluno is None:
+        raise ErroApi(404, f"Aluno com ID {aluno_id} não encontrado(a).")
+    modalidades = sorted(({"id": m.modalidade.id, "nome": m.modalidade.nome} for m in aluno.matriculas),
+                         key=lambda m: m["nome"])
+    return 200, {"id": aluno.id, "nome": aluno.nome, "idade": aluno.idade,
+                 "matricula": aluno.matricula, "modalidades": modalidades}
+
+
+def criar_aluno(session, consulta, corpo):
+    aluno = Aluno(corpo.get("nome"), _inteiro(corpo.get("idade"), "idade"), _inteiro(corpo.get("matricula"), "matricula"))
+    return _criar(session, aluno, "Já existe um aluno com essa matrícula.")
+
+
+def editar_aluno(session, consulta, corpo, aluno_id):
+    dados = AlunoService.editar(session, aluno_id, nome=corpo.get("nome"),
+                                idade=_opcional_inteiro(corpo.get("idade"), "idade"),
+                                matricula=_opcional_inteiro(corpo.get("matricula"), "matricula"))
+    if dados is None:
+        raise ErroApi(404, f"Aluno com ID {aluno_id} não encontrado(a).")
+    return 200, dados._asdict()
+
+
+def excluir_aluno(session, consulta, corpo, aluno_id):
+    contagem = AlunoService.excluir(session, aluno_id)
+    if not contagem.registros:
+        raise ErroApi(404, f"Aluno com ID {aluno_id} não encontrado(a).")
+    return 200, contagem._asdict()
+
+
+# --- Instrutores ---
+
+def listar_instrutores(session, consulta, corpo):
+    return _listar_pessoas(lambda **filtros: InstrutorService.listar(session, **filtros), consulta)
+
+
+def criar_instrutor(session, consulta, corpo):
+    instrutor = Instrutor(corpo.get("nome"), _inteiro(corpo.get("idade"), "idade"), corpo.get("cref"))
+    return _criar(session, instrutor, "Já existe um instrutor com esse CREF.")
+
+
+def editar_instrutor(session, consulta, corpo, instrutor_id):
+    dados = InstrutorService.editar(session, instrutor_id, nome=corpo.get("nome"),
+                                    idade=_opcional_inteiro(corpo.get("idade"), "idade"), cref=corpo.get("cref"))
+    if dados is None:
+        raise ErroApi(404, f"Instrutor com ID {instrutor_id} não encontrado(a).")
+    return 200, dados._asdict()
+
+
+def excluir_instrutor(session, consulta, corpo, instrutor_id):
+    contagem = InstrutorService.excluir(session, instrutor_id)
+    if not contagem.registros:
+        raise ErroApi(404, f"Instrutor com ID {instrutor_id} não encontrado(a).")
+    return 200, contagem._asdict()
+
+
+# --- Modalidades e matrículas ---
+
+def listar_modalidades(session, consulta, corpo):
+    return 200, _linhas(CacheService.modalidades(session))
+
+
+def criar_modalidade(session, consulta, corpo):
+    modalidade = Modalidade(Modalidade.validar_nome(corpo.get("nome")), corpo.get("descricao") or "")
+    return _criar(session, modalidade, "Já existe uma modalidade com esse nome.")
+
+
+def excluir_modalidade(session, consulta, corpo, modalidade_id):
+    contagem = ModalidadeService.excluir(session, modalidade_id)
+    if not contagem.registros:
+        raise ErroApi(404, f"Modalidade com ID {modalidade_id} não encontrado(a).")
+    return 200, contagem._asdict()
+
+
+def alunos_da_modalidade(session, consulta, corpo, modalidade_id):
+    _buscar_ou_404(session, Modalidade, modalidade_id, "Modalidade")
+    alunos = RelatorioService.alunos_por_modalidade(
+        session, modalidade_id, limite=_limite(consulta, 100),
+        apos_id=_opcional_inteiro(consulta.get("apos_id"), "apos_id"),
+    )
+    return 200, _linhas(alunos)
+
+
+def matricular(session, consulta, corpo):
+    aluno_id = _inteiro(corpo.get("aluno_id"), "aluno_id")
+    modalidade_id = _inteiro(corpo.get("modalidade_id"), "modalidade_id")
+    _buscar_ou_404(session, Aluno, aluno_id, "Aluno")
+    _buscar_ou_404(session, Modalidade, modalidade_id, "Modalidade")
+    if not MatriculaService.matricular(session, aluno_id, modalidade_id):
+        raise ErroApi(409, "Aluno já está matriculado nessa modalidade.")
+    return 201, {"aluno_id": aluno_id, "modalidade_id": modalidade_id}
+
+
+def cancelar_matricula(session, consulta, corpo, aluno_id, modalidade_id):
+    if not MatriculaService.cancelar(session, aluno_id, modalidade_id):
+        raise ErroApi(404, "Matrícula não encontrada.")
+    return 200, {"aluno_id": aluno_id, "modalidade_id": modalidade_id}
+
+
+# --- Busca e relatórios ---
+
+def buscar(session, consulta, corpo):
+    resultados = BuscaService.buscar(session, consulta.get("termo", ""), tipo=consulta.get("tipo") or None,
+                                     limite=_limite(consulta))
+    return 200, _linhas(resultados)
+
+
+def relatorio_quantidade_por_modalidade(session, consulta, corpo):
+    return 200, _linhas(CacheService.quantidade_alunos_por_modalidade(session))
+
+
+def relatorio_faixa_etaria(session, consulta, corpo):
+    largura = _inteiro(consulta.get("largura"), "largura", 10)
+    if largura <= 0:
+        raise ErroApi(400, "Largura da faixa deve ser positiva.")
+    return 200, _linhas(RelatorioService.matriculas_por_faixa_etaria(session, largura))
+
+
+def relatorio_segmento(session, consulta, corpo):
+    """Alunos por combinação de modalidades (todas, alguma, nenhuma, minimo), pelo índice de matrículas."""
+    ids = IndiceMatriculasService.alunos(
+        session, todas=_modalidades(consulta.get("todas")), alguma=_modalidades(consulta.get("alguma")),
+        nenhuma=_modalidades(consulta.get("nenhuma")),
+        minimo_modalidades=_opcional_inteiro(consulta.get("minimo"), "minimo"),
+    )
+    apos_id = _opcional_inteiro(consulta.get("apos_id"), "apos_id")
+    inicio = 0 if apos_id is None else bisect.bisect_right(ids, apos_id)
+    pagina = ids[inicio:inicio + _limite(consulta, 100)]
+    alunos = session.execute(
+        select(Aluno.id, Aluno._nome.label("nome"), Aluno._matricula.label("matricula"))
+        .where(Aluno.id.in_(pagina))
+        .order_by(Aluno.id)
+    )
+    return 200, {"quantidade": len(ids), "alunos": _linhas(alunos)}
+
+
+# --- Presenças (check-ins das catracas) ---
+
+def registrar_presencas(session, consulta, corpo):
+    """Aceita um check-in ou {"eventos": [...]} com vários, gravados em uma transação."""
+    eventos = corpo.get("eventos", [corpo])
+    if not isinstance(eventos, list) or not eventos:
+        raise ErroApi(400, "Campo 'eventos' deve ser uma lista não vazia.")
+    if len(eventos) > LIMITE_EVENTOS_POR_REQUISICAO:
+        raise ErroApi(413, f"No máximo {LIMITE_EVENTOS_POR_REQUISICAO} eventos por requisição.")
+    lote = []
+    for evento in eventos:
+        if not isinstance(evento, dict):
+            raise ErroApi(400, "Cada evento deve ser um objeto JSON.")
+        lote.append(montar_evento(
+            aluno_id=_opcional_inteiro(evento.get("aluno_id"), "aluno_id"),
+            membro_id=_opcional_inteiro(evento.get("membro_id"), "membro_id"),
+            modalidade_id=_opcional_inteiro(evento.get("modalidade_id"), "modalidade_id"),
+            momento=_momento(evento.get("momento")),
+            origem=evento.get("origem"),
+        ))
+    return 201, {"gravados": PresencaService.gravar_lote(session, lote)}
+
+
+def relatorio_ocupacao(session, consulta, corpo):
+    dia = _data(consulta.get("dia"), "dia", datetime.date.today())
+    ocupacao = PresencaService.ocupacao_por_hora(
+        session, dia, _opcional_inteiro(consulta.get("modalidade_id"), "modalidade_id")
+    )
+    return 200, [linha._asdict() for linha in ocupacao]
+
+
+def relatorio_presencas(session, consulta, corpo):
+    fim = _data(consulta.get("fim"), "fim", datetime.date.today())
+    inicio = _data(consulta.get("inicio"), "inicio", fim - datetime.timedelta(days=29))
+    if consulta.get("por") == "modalidade":
+        return 200, _linhas(PresencaService.presencas_por_modalidade(session, inicio, fim))
+    presencas = PresencaService.presencas_por_dia(
+        session, inicio, fim, _opcional_inteiro(consulta.get("modalidade_id"), "modalidade_id")
+    )
+    return 200, [linha._asdict() for linha in presencas]
+
+
+# --- Grade de aulas (models/grade.py) ---
+
+def _ocorrencia(ocorrencia):
+    dados = ocorrencia._asdict()
+    dados["inicio"], dados["fim"] = texto_minutos(ocorrencia.inicio), texto_minutos(ocorrencia.fim)
+    return dados
+
+
+def _minutos(valor, campo):
+    if valor in (None, ""):
+        raise ErroApi(400, f"Campo '{campo}' é obrigatório.")
+    try:
+        return minutos(valor)
+    except ValueError:
+        raise ErroApi(400, f"Campo '{campo}' deve ser um horário HH:MM.")
+
+
+def painel_da_grade(session, consulta, corpo):
+    """Aulas em andamento e próximas, para a tela da recepção."""
+    painel = GradeService.painel(session, _momento(consulta.get("momento")), _limite(consulta, 5))
+    return 200, {
+        "momento": painel.momento.isoformat(timespec="minutes"),
+        "agora": [_ocorrencia(ocorrencia) for ocorrencia in painel.agora],
+        "proximas": [dict(_ocorrencia(proxima.ocorrencia), comeca_em=proxima.comeca_em.isoformat(timespec="minutes"))
+                     for proxima in painel.proximas],
+    }
+
+
+def aulas_no_horario(session, consulta, corpo):
+    """Aulas em andamento no dia (0 = segunda) e hora informados; sem `hora`, a grade do dia inteiro."""
+    dia = _inteiro(consulta.get("dia"), "dia")
+    if not 0 <= dia <= 6:
+        raise ErroApi(400, "Campo 'dia' deve estar entre 0 (segunda) e 6 (domingo).")
+    grade = GradeService.grade_semanal(session)
+    if consulta.get("hora"):
+        ocorrencias = grade.no_horario(dia, _minutos(consulta.get("hora"), "hora"))
+    else:
+        ocorrencias = grade.sobrepostas(dia, 0, 24 * 60)
+    return 200, [_ocorrencia(ocorrencia) for ocorrencia in ocorrencias]
+
+
+def agendar_aula(session, consulta, corpo):
+    aula_id = _inteiro(corpo.get("aula_id"), "aula_id")
+    _buscar_ou_404(session, AulaGinastica, aula_id, "Aula")
+    resultado = GradeService.agendar(
+        session, aula_id, _inteiro(corpo.get("dia_semana"), "dia_semana"),
+        _minutos(corpo.get("inicio"), "inicio"), _minutos(corpo.get("fim"), "fim"),
+        sala=corpo.get("sala"), permitir_conflito=bool(corpo.get("permitir_conflito")),
+    )
+    conflitos = [_ocorrencia(conflito) for conflito in resultado.conflitos]
+    if resultado.id is None:
+        return 409, {"erro": "Horário em conflito com outras aulas.", "conflitos": conflitos}
+    return 201, {"id": resultado.id, "conflitos": conflitos}
+
+
+def remover_horario(session, consulta, corpo, horario_id):
+    if not GradeService.remover(session, horario_id):
+        raise ErroApi(404, f"Horário com ID {horario_id} não encontrado(a).")
+    return 200, {"id": horario_id}
+
+
+# --- Manutenção de equipamentos (models/manutencao.py) ---
+
+def manutencoes_pendentes(session, consulta, corpo):
+    """Equipamentos com manutenção vencida até `ate` (padrão: daqui a 7 dias), mais atrasados primeiro."""
+    ate = _data(consulta.get("ate"), "ate", datetime.date.today() + datetime.timedelta(days=7))
+    return 200, [item._asdict() for item in ManutencaoService.pendentes(session, ate, _limite(consulta, 50))]
+
+
+def registrar_manutencoes(session, consulta, corpo):
+    ids = corpo.get("equipamentos")
+    if not isinstance(ids, list) or not ids:
+        raise ErroApi(400, "Campo 'equipamentos' deve ser uma lista não vazia de ids.")
+    ids = [_inteiro(equipamento_id, "equipamentos") for equipamento_id in ids]
+    data = _data(corpo.get("data"), "data", datetime.date.today())
+    return 200, {"atualizados": ManutencaoService.registrar_em_lote(session, ids, data)}
+
+
+def saude(session, consulta, corpo):
+    session.execute(select(1))
+    return 200, {"status": "ok"}
+
+
+ROTAS = [
+    Rota("GET", r"/saude", saude),
+    Rota("GET", r"/alunos", listar_alunos),
+    Rota("POST", r"/alunos", criar_aluno),
+    Rota("GET", r"/alunos/(\d+)", obter_aluno),
+    Rota("PATCH", r"/alunos/(\d+)", editar_aluno),
+    Rota("DELETE", r"/alunos/(\d+)", excluir_aluno),
+    Rota("GET", r"/instrutores", listar_instrutores),
+    Rota("POST", r"/instrutores", criar_instrutor),
+    Rota("PATCH", r"/instrutores/(\d+)", editar_instrutor),
+    Rota("DELETE", r"/instrutores/(\d+)", excluir_instrutor),
+    Rota("GET", r"/modalidades", listar_modalidades),
+    Rota("POST", r"/modalidades", criar_modalidade),
+    Rota("DELETE", r"/modalidades/(\d+)", excluir_modalidade),
+    Rota("GET", r"/modalidades/(\d+)/alunos", alunos_da_modalidade, instantaneo=True),
+    Rota("POST", r"/matriculas", matricular),
+    Rota("DELETE", r"/matriculas/(\d+)/(\d+)", cancelar_matricula),
+    Rota("GET", r"/busca", buscar),
+    Rota("GET", r"/relatorios/quantidade-por-modalidade", relatorio_quantidade_por_modalidade, instantaneo=True),
+    Rota("GET", r"/relatorios/faixa-etaria", relatorio_faixa_etaria, instantaneo=True),
+    Rota("GET", r"/relatorios/segmento", relatorio_segmento),
+    Rota("POST", r"/presencas", registrar_presencas),
+    Rota("GET", r"/relatorios/ocupacao", relatorio_ocupacao, instantaneo=True),
+    Rota("GET", r"/relatorios/presencas", relatorio_presencas, instantaneo=True),
+    Rota("GET", r"/grade", aulas_no_horario),
+    Rota("POST", r"/grade", agendar_aula),
+    Rota("GET", r"/grade/agora", painel_da_grade),
+    Rota("DELETE", r"/grade/(\d+)", remover_horario),
+    Rota("GET", r"/manutencao", manutencoes_pendentes),
+    Rota("POST", r"/manutencao", registrar_manutencoes),
+]
+
+_ROTAS_COMPILADAS = [(rota, re.compile(rota.padrao + r"/?\Z")) for rota in ROTAS]
+
+
+def resolver(metodo, caminho):
+    """Retorna (Rota, ids do caminho) ou levanta ErroApi 404/405."""
+    metodos_do_caminho = False
+    for rota, padrao in _ROTAS_COMPILADAS:
+        encontrado = padrao.match(caminho)
+        if encontrado is None:
+            continue
+        metodos_do_caminho = True
+        if rota.metodo == metodo:
+            return rota, [int(grupo) for grupo in encontrado.groups()]
+    if metodos_do_caminho:
+        raise ErroApi(405, f"Método {metodo} não permitido em {caminho}.")
+    raise ErroApi(404, f"Caminho {caminho} não encontrado.")
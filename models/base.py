@@ -1,17 +1,11 @@
+import configparser
 import logging
+import os
 
-# Remove handlers antigos e configura do zero
-for handler in logging.root.handlers[:]:
-    logging.root.removeHandler(handler)
-
-logging.basicConfig(level=logging.WARNING)
-logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
-
-
-
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base, DeclarativeMeta
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker, declarative_base, DeclarativeMeta, Mapper
 from abc import ABCMeta
 
 # Metaclass para resolver conflito entre SQLAlchemy e ABC (abstração)
@@ -21,10 +15,145 @@ class BaseMeta(DeclarativeMeta, ABCMeta):
 # Base declarativa usando a metaclass personalizada
 Base = declarative_base(metaclass=BaseMeta)
 
-# Criação do engine SQLite (arquivo academia.db no mesmo diretório)
-engine = create_engine("sqlite:///academia.db", echo=True)
+
+def configurar_logging(nivel=logging.WARNING):
+    """Configura o logging raiz do zero; chamado pelos programas (main.py, servidor.py), não na importação."""
+    for handler in logging.root.handlers[:]:
+        logging.root.removeHandler(handler)
+    logging.basicConfig(level=nivel)
+    logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
+
+
+@event.listens_for(Mapper, "before_configured")
+def _carregar_modelos():
+    # Os relacionamentos usam nomes de classe ("Matricula", "Aluno"): todos os modelos
+    # precisam estar importados quando o SQLAlchemy configura os mapeamentos
+    from models import carregar_modelos
+    carregar_modelos()
+
+
+# Pasta raiz do projeto (onde ficam main.py e academia.db)
+PASTA_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Valores padrão; podem ser sobrescritos pela seção [banco] do arquivo academia.ini
+# (ou do arquivo em ACADEMIA_CONFIG) e por variáveis ACADEMIA_DB_<CHAVE>, ex.: ACADEMIA_DB_URL
+CONFIGURACAO_PADRAO = {
+    "url": "",                   # qualquer URL SQLAlchemy; vazio = SQLite em `caminho`
+    "caminho": "academia.db",    # relativo à pasta do projeto, não ao diretório atual
+    "echo": "nao",
+    "pool_size": "5",
+    "max_overflow": "10",
+    "timeout": "15",             # segundos esperando o lock de escrita do SQLite
+    "cache_size": "-65536",      # negativo = KiB (64 MiB)
+    "mmap_size": "268435456",    # 256 MiB
+    "instrumentacao": "nao",     # métricas por operação e avisos de N+1 (models/instrumentacao.py)
+}
+
+
+def carregar_configuracao():
+    """Lê a configuração do banco: variáveis de ambiente têm prioridade sobre o arquivo."""
+    config = dict(CONFIGURACAO_PADRAO)
+    arquivo = os.environ.get("ACADEMIA_CONFIG", os.path.join(PASTA_PROJETO, "academia.ini"))
+    parser = configparser.ConfigParser()
+    if parser.read(arquivo, encoding="utf-8") and parser.has_section("banco"):
+        config.update({chave: valor for chave, valor in parser["banco"].items() if chave in config})
+    for chave in config:
+        valor = os.environ.get(f"ACADEMIA_DB_{chave.upper()}")
+        if valor is not None:
+            config[chave] = valor
+    return config
+
+
+def _booleano(valor):
+    return str(valor).strip().lower() in ("1", "sim", "s", "true", "yes", "on")
+
+
+def _configurar_sqlite(config, em_memoria):
+    """Retorna o listener que aplica os PRAGMAs em cada nova conexão SQLite."""
+    def ao_conectar(conexao_dbapi, _registro):
+        cursor = conexao_dbapi.cursor()
+        if not em_memoria:
+            # WAL: leitores não bloqueiam o escritor; NORMAL é seguro com WAL e evita fsync por commit
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA mmap_size={int(config['mmap_size'])}")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA cache_size={int(config['cache_size'])}")
+        cursor.close()
+    return ao_conectar
+
+
+def _preparar_engine(url, sobrescritas):
+    """Resolve a URL e as opções do engine; usado pelas versões síncrona e assíncrona."""
+    config = carregar_configuracao()
+    config.update({chave: str(valor) for chave, valor in sobrescritas.items()})
+    if url is None:
+        url = config["url"] or "sqlite:///" + os.path.join(PASTA_PROJETO, config["caminho"])
+    url = make_url(url)
+
+    opcoes = {"echo": _booleano(config["echo"])}
+    em_memoria = url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+    if not em_memoria:
+        # Pool com várias conexões para uso por múltiplas threads
+        opcoes["pool_size"] = int(config["pool_size"])
+        opcoes["max_overflow"] = int(config["max_overflow"])
+    if url.get_backend_name() == "sqlite":
+        opcoes["connect_args"] = {"timeout": float(config["timeout"])}
+    else:
+        opcoes["pool_pre_ping"] = True
+    return url, opcoes, config, em_memoria
+
+
+def criar_engine(url=None, **sobrescritas):
+    """Cria o engine a partir da configuração (arquivo/ambiente) e de `sobrescritas`."""
+    url, opcoes, config, em_memoria = _preparar_engine(url, sobrescritas)
+    novo_engine = create_engine(url, **opcoes)
+    if url.get_backend_name() == "sqlite":
+        event.listen(novo_engine, "connect", _configurar_sqlite(config, em_memoria))
+    return novo_engine
+
+
+def criar_engine_async(url=None, **sobrescritas):
+    """Como criar_engine, mas para AsyncSession (veja models/servicos_async.py).
+
+    Requer `pip install "sqlalchemy[asyncio]" aiosqlite`; URLs SQLite passam a usar
+    o driver aiosqlite. Para outros bancos informe uma URL com driver assíncrono.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url, opcoes, config, em_memoria = _preparar_engine(url, sobrescritas)
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    novo_engine = create_async_engine(url, **opcoes)
+    if url.get_backend_name() == "sqlite":
+        # Os PRAGMAs são aplicados pela conexão adaptada, igual ao engine síncrono
+        event.listen(novo_engine.sync_engine, "connect", _configurar_sqlite(config, em_memoria))
+    return novo_engine
+
+
+# insert() com ON CONFLICT (on_conflict_do_nothing/do_update) por dialeto suportado
+_INSERT_COM_CONFLITO = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def insert_com_conflito(session, modelo):
+    """insert() do dialeto do banco da sessão, que aceita ON CONFLICT.
+
+    Levanta RuntimeError para bancos sem ON CONFLICT (só SQLite e PostgreSQL são suportados).
+    """
+    dialeto = session.get_bind().dialect.name
+    if dialeto not in _INSERT_COM_CONFLITO:
+        raise RuntimeError(f"Banco '{dialeto}' não suportado: INSERT ... ON CONFLICT requer SQLite ou PostgreSQL.")
+    return _INSERT_COM_CONFLITO[dialeto](modelo)
+
+
+# Engine padrão da aplicação (academia.db na pasta do projeto, salvo configuração em contrário)
+engine = criar_engine()
 
 # Criação da sessão para operar no banco
 Session = sessionmaker(bind=engine)
 
+if _booleano(carregar_configuracao()["instrumentacao"]):
+    from models.instrumentacao import instrumentar
+    instrumentar(Session, engine)
+
 
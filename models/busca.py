@@ -0,0 +1,50 @@
+"""Busca de alunos e instrutores por nome usando o índice FTS5 `pessoas_fts`.
+
+O índice é criado e mantido em sincronia por gatilhos (veja models/migracoes.py).
+"""
+
+import re
+
+from sqlalchemy import text, bindparam
+
+TIPOS_BUSCAVEIS = ("aluno", "instrutor")
+
+
+def montar_consulta_fts(termo):
+    """Converte o texto digitado em uma consulta FTS5 por prefixo.
+
+    Cada palavra vira um prefixo entre aspas e todas precisam aparecer:
+    "ana sil" -> "ana"* "sil"*. Aspas e operadores digitados são descartados.
+    """
+    palavras = re.findall(r"\w+", termo or "")
+    return " ".join(f'"{palavra}"*' for palavra in palavras)
+
+
+def consulta_busca(termo, tipo=None, limite=20):
+    """Retorna (consulta, parâmetros) da busca, ou None se o termo não tiver palavras."""
+    consulta_fts = montar_consulta_fts(termo)
+    if not consulta_fts:
+        return None
+    if tipo is not None and tipo not in TIPOS_BUSCAVEIS:
+        raise ValueError(f"Tipo de busca inválido: {tipo}")
+    tipos = (tipo,) if tipo else TIPOS_BUSCAVEIS
+    consulta = text(
+        "SELECT p.id, p.nome, p.tipo FROM pessoas_fts"
+        " JOIN pessoas p ON p.id = pessoas_fts.rowid"
+        " WHERE pessoas_fts MATCH :consulta AND p.tipo IN :tipos"
+        " ORDER BY bm25(pessoas_fts), p.nome LIMIT :limite"
+    ).bindparams(bindparam("tipos", expanding=True))
+    return consulta, {"consulta": consulta_fts, "tipos": list(tipos), "limite": limite}
+
+
+class BuscaService:
+    @staticmethod
+    def buscar(session, termo, tipo=None, limite=20):
+        """Retorna (id, nome, tipo) das pessoas cujo nome combina com `termo`, por relevância.
+
+        `tipo` restringe a "aluno" ou "instrutor"; sem ele, ambos são retornados.
+        """
+        busca = consulta_busca(termo, tipo, limite)
+        if busca is None:
+            return []
+        return session.execute(*busca).all()
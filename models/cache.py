@@ -0,0 +1,244 @@
+"""Cache em processo (LRU com TTL) para leituras repetidas no balcão.
+
+Guarda o catálogo de modalidades, o resumo das modalidades de cada aluno, a
+contagem de alunos por modalidade e a grade semanal das aulas (models/grade.py). As leituras passam por CacheService
+(read-through): na falta, consultam o banco e guardam o resultado.
+
+A invalidação é automática para escritas feitas por qualquer Session deste
+processo: os flushes e comandos DML que tocam modalidades, matrículas, alunos
+ou horários de aulas são anotados e aplicados no fim da transação (commit ou rollback).
+Enquanto a sessão tem escritas não confirmadas, as leituras dela vão direto ao
+banco e não são guardadas; o mesmo vale para as faltas lidas de um instantâneo
+(models/instantaneo.py). Escritas de outros processos só aparecem depois do TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session as SessaoOrm
+
+from models.aluno import Aluno
+from models.modalidade import Modalidade
+from models.matricula import Matricula
+from models.relatorios import RelatorioService
+from models.models import AulaGinastica, HorarioAula
+from models.instantaneo import CHAVE_INSTANTANEO
+
+TTL_PADRAO = 300  # segundos
+CAPACIDADE_RESUMOS = 10000
+TTL_GRADE = 60  # segundos; a recepção vê nomes editados de instrutores depois disso
+
+_AUSENTE = object()
+_CHAVE_PENDENTES = "cache_invalidacoes_pendentes"
+_TODOS = "*"
+
+
+class CacheLRU:
+    """Dicionário limitado (descarta o menos usado) com expiração por tempo, seguro para threads.
+
+    A `versao` muda a cada invalidação: uma leitura que começou antes dela não
+    grava o resultado (que pode já estar desatualizado).
+    """
+
+    def __init__(self, nome, capacidade=1000, ttl=TTL_PADRAO):
+        self.nome = nome
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self.versao = 0
+        self._itens = OrderedDict()  # chave -> (expira_em, valor)
+        self._lock = threading.Lock()
+        self.acertos = self.falhas = self.expirados = self.descartados = self.invalidacoes = 0
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                if item[0] > time.monotonic():
+                    self._itens.move_to_end(chave)
+                    self.acertos += 1
+                    return item[1]
+                del self._itens[chave]
+                self.expirados += 1
+            self.falhas += 1
+            return _AUSENTE
+
+    def guardar(self, chave, valor, versao):
+        with self._lock:
+            if versao != self.versao:
+                return
+            self._itens[chave] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+                self.descartados += 1
+
+    def invalidar(self, chave=_TODOS):
+        with self._lock:
+            self.versao += 1
+            self.invalidacoes += 1
+            if chave == _TODOS:
+                self._itens.clear()
+            else:
+                self._itens.pop(chave, None)
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "cache": self.nome,
+                "itens": len(self._itens),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "expirados": self.expirados,
+                "descartados": self.descartados,
+                "invalidacoes": self.invalidacoes,
+            }
+
+    def ler(self, session, chave, carregar):
+        """Read-through: retorna o valor guardado ou `carregar()` (e guarda o resultado)."""
+        if session.info.get(_CHAVE_PENDENTES):
+            # A sessão enxerga as próprias escritas ainda não confirmadas
+            return carregar()
+        valor = self.obter(chave)
+        if valor is _AUSENTE and session.info.get(CHAVE_INSTANTANEO):
+            # Instantâneo (models/instantaneo.py): pode ser mais antigo que a última invalidação
+            return carregar()
+        if valor is _AUSENTE:
+            versao = self.versao
+            valor = carregar()
+            self.guardar(chave, valor, versao)
+        return valor
+
+
+catalogo_modalidades = CacheLRU("catalogo_modalidades", capacidade=1)
+resumos_matriculas = CacheLRU("resumos_matriculas", capacidade=CAPACIDADE_RESUMOS)
+contagens_modalidades = CacheLRU("contagens_modalidades", capacidade=1)
+# Uma grade por banco (academia.db unificado ou ginásio.db)
+grades_semanais = CacheLRU("grades_semanais", capacidade=4, ttl=TTL_GRADE)
+CACHES = (catalogo_modalidades, resumos_matriculas, contagens_modalidades, grades_semanais)
+
+
+class CacheService:
+    @staticmethod
+    def modalidades(session):
+        """Tupla de (id, nome, descricao) de todas as modalidades, por nome."""
+        consulta = select(Modalidade.id, Modalidade.nome, Modalidade.descricao).order_by(Modalidade.nome)
+        return catalogo_modalidades.ler(session, "todas", lambda: tuple(session.execute(consulta).all()))
+
+    @staticmethod
+    def modalidade(session, modalidade_id):
+        """(id, nome, descricao) da modalidade pelo catálogo em cache, ou None."""
+        for modalidade in CacheService.modalidades(session):
+            if modalidade.id == modalidade_id:
+                return modalidade
+        return None
+
+    @staticmethod
+    def modalidades_do_aluno(session, aluno_id):
+        """Tupla com os nomes das modalidades do aluno, em ordem alfabética."""
+        consulta = (
+            select(Modalidade.nome)
+            .join(Matricula, Matricula.modalidade_id == Modalidade.id)
+            .where(Matricula.aluno_id == aluno_id)
+            .order_by(Modalidade.nome)
+        )
+        return resumos_matriculas.ler(session, aluno_id, lambda: tuple(session.scalars(consulta)))
+
+    @staticmethod
+    def quantidade_alunos_por_modalidade(session):
+        """Como RelatorioService.quantidade_alunos_por_modalidade, em cache."""
+        return contagens_modalidades.ler(
+            session, "todas", lambda: tuple(RelatorioService.quantidade_alunos_por_modalidade(session))
+        )
+
+    @staticmethod
+    def estatisticas():
+        return [cache.estatisticas() for cache in CACHES]
+
+    @staticmethod
+    def limpar():
+        for cache in CACHES:
+            cache.invalidar()
+
+
+# --- Invalidação ligada às sessões ---
+
+def _pendentes(session):
+    return session.info.setdefault(_CHAVE_PENDENTES, set())
+
+
+def _anotar_tabelas(session, tabelas):
+    pendentes = _pendentes(session)
+    if "modalidades" in tabelas:
+        pendentes.update({("catalogo", _TODOS), ("resumo", _TODOS), ("contagens", _TODOS)})
+    if tabelas & {"matriculas", "alunos", "pessoas"}:
+        # Comando por conjunto: não se sabe quais alunos foram afetados
+        pendentes.update({("resumo", _TODOS), ("contagens", _TODOS)})
+    if "horarios_aulas" in tabelas:
+        # `aulas` fica de fora: o UPDATE de vagas das reservas não muda a grade
+        pendentes.add(("grade", _TODOS))
+
+
+def _ao_flush(session, _contexto):
+    pendentes = _pendentes(session)
+    for objeto in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(objeto, Modalidade):
+            # Só a coleção de matrículas mudou (nova matrícula): o catálogo continua válido
+            if objeto in session.dirty and not session.is_modified(objeto, include_collections=False):
+                continue
+            _anotar_tabelas(session, {"modalidades"})
+        elif isinstance(objeto, Matricula):
+            pendentes.add(("contagens", _TODOS))
+            if objeto in session.dirty or objeto.aluno_id is None:
+                # Matrícula alterada pode ter mudado de aluno
+                pendentes.add(("resumo", _TODOS))
+            else:
+                pendentes.add(("resumo", objeto.aluno_id))
+        elif isinstance(objeto, Aluno) and objeto in session.deleted:
+            pendentes.update({("resumo", objeto.id), ("contagens", _TODOS)})
+        elif isinstance(objeto, (AulaGinastica, HorarioAula)):
+            pendentes.add(("grade", _TODOS))
+
+
+def _ao_executar(estado):
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    if estado.execution_options.get("apenas_contadores"):
+        # Contadores desnormalizados de matrícula: só as contagens mudam
+        _pendentes(estado.session).add(("contagens", _TODOS))
+        return
+    matricula = estado.execution_options.get("indice_matricula")
+    if matricula is not None:
+        # Matrícula criada ou cancelada por MatriculaService: só o resumo desse aluno muda
+        _pendentes(estado.session).update({("resumo", matricula[0]), ("contagens", _TODOS)})
+        return
+    tabelas = {tabela.name for mapper in estado.all_mappers for tabela in mapper.tables}
+    tabela = getattr(estado.statement, "table", None)
+    if getattr(tabela, "name", None):
+        tabelas.add(tabela.name)
+    _anotar_tabelas(estado.session, tabelas)
+
+
+_CACHE_POR_TIPO = {
+    "catalogo": catalogo_modalidades,
+    "resumo": resumos_matriculas,
+    "contagens": contagens_modalidades,
+    "grade": grades_semanais,
+}
+
+
+def _ao_encerrar_transacao(session):
+    # Também no rollback: leituras feitas durante a transação podem ter visto dados desfeitos
+    for tipo, chave in session.info.pop(_CHAVE_PENDENTES, ()):
+        _CACHE_POR_TIPO[tipo].invalidar(chave)
+
+
+# Registrado na classe Session: vale para toda sessão do processo (menu, servidor, run_sync)
+if not event.contains(SessaoOrm, "after_commit", _ao_encerrar_transacao):
+    event.listen(SessaoOrm, "after_flush", _ao_flush)
+    event.listen(SessaoOrm, "do_orm_execute", _ao_executar)
+    event.listen(SessaoOrm, "after_commit", _ao_encerrar_transacao)
+    event.listen(SessaoOrm, "after_rollback", _ao_encerrar_transacao)
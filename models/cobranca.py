@@ -0,0 +1,194 @@
+"""Job noturno de cobrança: transições de Membro.estado_pagamento por conjunto.
+
+Os vencimentos saem de `data_adesao` e `tipo_subscricao`: o ciclo de N meses
+(Mensal 1, Trimestral 3, Semestral 6, Anual 12) vence no mesmo dia da adesão,
+ou no último dia do mês quando ele não tem esse dia. A cada execução, para a
+data de referência D e a execução anterior P:
+
+- Pago -> Pendente: um vencimento caiu em (P, D] e `pago_ate` não passa de D
+  (começou um ciclo não pago; quem pagou no próprio vencimento já está quitado
+  até o seguinte). Sem `pago_ate` (registros anteriores à coluna) vale só o vencimento;
+- Pendente -> Atrasado: o último vencimento tem mais de TOLERANCIA_DIAS dias.
+
+Os membros não são carregados. Como o vencimento depende só da data de adesão
+e do tipo de subscrição, as datas de adesão que satisfazem cada regra são
+calculadas em Python (uma por dia do calendário, não por membro) e cada
+transição é um UPDATE por tipo de subscrição, filtrado por estado, data de
+adesão e pago_ate, que é o índice (estado_pagamento, data_adesao, pago_ate). Executar de novo no
+mesmo dia não muda nada; se dias forem pulados, a próxima execução cobra os
+ciclos que venceram no intervalo.
+"""
+
+import calendar
+import datetime
+from collections import namedtuple
+
+from sqlalchemy import select, update, func, or_, and_
+
+from models.models import Membro, ExecucaoCobranca
+from models.transacao import confirmar
+
+PAGO = "Pago"
+PENDENTE = "Pendente"
+ATRASADO = "Atrasado"
+TOLERANCIA_DIAS = 10
+
+# tipo_subscricao -> meses do ciclo; tipos desconhecidos (ou vazios) são cobrados como Mensal
+MESES_POR_SUBSCRICAO = {"Mensal": 1, "Trimestral": 3, "Semestral": 6, "Anual": 12}
+_SUBSCRICAO_PADRAO = "Mensal"
+
+TransicoesSubscricao = namedtuple("TransicoesSubscricao", ["tipo_subscricao", "novos_pendentes", "novos_atrasados"])
+# desde: data da execução anterior (None na primeira); por_subscricao: tupla de TransicoesSubscricao
+ResumoCobranca = namedtuple(
+    "ResumoCobranca",
+    ["data_referencia", "desde", "novos_pendentes", "novos_atrasados", "por_subscricao", "simulado"],
+)
+
+
+def _somar_meses(data, meses):
+    ano, mes = divmod(data.month - 1 + meses, 12)
+    ano += data.year
+    return datetime.date(ano, mes + 1, min(data.day, calendar.monthrange(ano, mes + 1)[1]))
+
+
+def _meses_ate_ultimo_vencimento(data_adesao, meses_ciclo, data):
+    meses = (data.year - data_adesao.year) * 12 + data.month - data_adesao.month
+    if _somar_meses(data_adesao, meses) > data:
+        meses -= 1
+    return meses // meses_ciclo * meses_ciclo
+
+
+def ultimo_vencimento(data_adesao, meses_ciclo, data):
+    """Vencimento mais recente em ou antes de `data` (a própria adesão no primeiro ciclo)."""
+    return _somar_meses(data_adesao, _meses_ate_ultimo_vencimento(data_adesao, meses_ciclo, data))
+
+
+def proximo_vencimento(data_adesao, tipo_subscricao, data=None):
+    """Primeiro vencimento depois de `data` (hoje, por padrão)."""
+    data = data or datetime.date.today()
+    meses_ciclo = MESES_POR_SUBSCRICAO.get(tipo_subscricao, MESES_POR_SUBSCRICAO[_SUBSCRICAO_PADRAO])
+    if data_adesao > data:
+        return data_adesao
+    # Sempre a partir da adesão: um vencimento ajustado ao fim do mês não desloca os seguintes
+    return _somar_meses(data_adesao, _meses_ate_ultimo_vencimento(data_adesao, meses_ciclo, data) + meses_ciclo)
+
+
+def _dias(inicio, fim):
+    dia = inicio
+    while dia <= fim:
+        yield dia
+        dia += datetime.timedelta(days=1)
+
+
+def _adesoes_com_vencimento(primeira, meses_ciclo, desde, data):
+    """Datas de adesão (a partir de `primeira`) com um vencimento em (desde, data]."""
+    return [
+        adesao for adesao in _dias(primeira, data)
+        if adesao > desde or ultimo_vencimento(adesao, meses_ciclo, data) > desde
+    ]
+
+
+def _adesoes_em_tolerancia(primeira, meses_ciclo, data, tolerancia):
+    """Datas de adesão cujo último vencimento ainda está dentro da tolerância em `data`."""
+    return [
+        adesao for adesao in _dias(primeira, data)
+        if (data - ultimo_vencimento(adesao, meses_ciclo, data)).days <= tolerancia
+    ]
+
+
+def _filtro_subscricao(tipo):
+    membros = Membro.__table__
+    if tipo != _SUBSCRICAO_PADRAO:
+        return membros.c.tipo_subscricao == tipo
+    return or_(
+        membros.c.tipo_subscricao == tipo,
+        membros.c.tipo_subscricao.is_(None),
+        membros.c.tipo_subscricao.not_in(list(MESES_POR_SUBSCRICAO)),
+    )
+
+
+def _primeira_adesao(session, estados, data):
+    # MIN sobre o prefixo do índice (estado_pagamento, data_adesao): uma busca por estado
+    membros = Membro.__table__
+    datas = [
+        session.scalar(
+            select(func.min(membros.c.data_adesao))
+            .where(membros.c.estado_pagamento == estado, membros.c.data_adesao <= data)
+        )
+        for estado in estados
+    ]
+    datas = [data for data in datas if data is not None]
+    return min(datas) if datas else None
+
+
+def _contar(session, estado, *condicoes):
+    membros = Membro.__table__
+    return session.scalar(
+        select(func.count()).select_from(membros).where(membros.c.estado_pagamento == estado, *condicoes)
+    )
+
+
+def _transicionar(session, estado, novo_estado, *condicoes):
+    membros = Membro.__table__
+    return session.execute(
+        update(membros).where(membros.c.estado_pagamento == estado, *condicoes).values(estado_pagamento=novo_estado)
+    ).rowcount
+
+
+class CobrancaService:
+    @staticmethod
+    def ultima_execucao(session):
+        """Data de referência da execução anterior do job, ou None."""
+        return session.scalar(select(func.max(ExecucaoCobranca.data_referencia)))
+
+    @staticmethod
+    def executar(session, data=None, tolerancia=TOLERANCIA_DIAS, simular=False):
+        """Aplica as transições de estado de pagamento até `data` (hoje, por padrão). Retorna ResumoCobranca.
+
+        Com `simular`, só conta quem mudaria, sem gravar nem registrar a execução.
+        Levanta ValueError se `data` for anterior à última execução.
+        """
+        data = data or datetime.date.today()
+        if tolerancia < 0:
+            raise ValueError("Tolerância deve ser zero ou positiva.")
+        desde = CobrancaService.ultima_execucao(session)
+        if desde is not None and data < desde:
+            raise ValueError(f"Data de referência {data} anterior à última execução ({desde}).")
+        # Na primeira execução só conta o que vence no próprio dia
+        inicio = desde if desde is not None else data - datetime.timedelta(days=1)
+        primeira = _primeira_adesao(session, (PAGO, PENDENTE), data)
+        adesao = Membro.__table__.c.data_adesao
+        pago_ate = Membro.__table__.c.pago_ate
+        ciclo_nao_pago = or_(pago_ate.is_(None), pago_ate <= data)
+
+        por_subscricao = []
+        for tipo, meses_ciclo in MESES_POR_SUBSCRICAO.items():
+            pendentes = atrasados = 0
+            if primeira is not None:
+                subscricao = _filtro_subscricao(tipo).self_group()
+                # IN com as datas (e não BETWEEN por faixa): o SQLite faz uma busca no índice por data
+                vencidos = and_(adesao.in_(_adesoes_com_vencimento(primeira, meses_ciclo, inicio, data)),
+                                ciclo_nao_pago.self_group())
+                atraso = and_(adesao <= data,
+                              adesao.not_in(_adesoes_em_tolerancia(primeira, meses_ciclo, data, tolerancia)))
+                # Pago -> Pendente antes do atraso: quem ficou dias sem execução cai no atraso na mesma rodada
+                if simular:
+                    pendentes = _contar(session, PAGO, subscricao, vencidos)
+                    atrasados = (_contar(session, PENDENTE, subscricao, atraso)
+                                 + _contar(session, PAGO, subscricao, vencidos, atraso))
+                else:
+                    pendentes = _transicionar(session, PAGO, PENDENTE, subscricao, vencidos)
+                    atrasados = _transicionar(session, PENDENTE, ATRASADO, subscricao, atraso)
+            por_subscricao.append(TransicoesSubscricao(tipo, pendentes, atrasados))
+
+        resumo = ResumoCobranca(
+            data, desde, sum(t.novos_pendentes for t in por_subscricao),
+            sum(t.novos_atrasados for t in por_subscricao), tuple(por_subscricao), simular,
+        )
+        if simular:
+            return resumo
+        session.add(ExecucaoCobranca(
+            data_referencia=data, novos_pendentes=resumo.novos_pendentes, novos_atrasados=resumo.novos_atrasados,
+        ))
+        confirmar(session)
+        return resumo
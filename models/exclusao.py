@@ -0,0 +1,106 @@
+"""Exclusão em massa de alunos, instrutores e modalidades com comandos por conjunto.
+
+Em vez de carregar cada Matricula para o ORM apagar uma a uma, as matrículas,
+as linhas da subclasse (alunos/instrutores) e as de pessoas são removidas com
+um DELETE ... WHERE id IN (...) por tabela e bloco de ids. O esquema também
+declara ON DELETE CASCADE, então um DELETE feito direto no banco não deixa órfãos.
+Antes de apagar as matrículas, os contadores desnormalizados do outro lado
+(Modalidade.total_matriculas ou Aluno.total_modalidades) são descontados com um
+UPDATE por bloco.
+"""
+
+from collections import namedtuple
+
+from sqlalchemy import delete, select, update, func
+
+from models.pessoa import Pessoa
+from models.aluno import Aluno
+from models.instrutor import Instrutor
+from models.modalidade import Modalidade
+from models.matricula import Matricula
+
+# Quantidade máxima de ids por comando IN (...), abaixo do limite de parâmetros do SQLite
+TAMANHO_BLOCO_IDS = 500
+
+# registros: alunos/instrutores/modalidades apagados; matriculas: matrículas removidas junto
+ContagemExclusao = namedtuple("ContagemExclusao", ["registros", "matriculas"])
+
+# Coluna de Matricula que aponta para cada modelo (instrutores não têm matrículas)
+_COLUNA_MATRICULA = {
+    Aluno: Matricula.aluno_id,
+    Modalidade: Matricula.modalidade_id,
+    Instrutor: None,
+}
+
+
+# Contador mantido do outro lado da matrícula: (tabela, coluna do contador, coluna de Matricula)
+_CONTADOR_OPOSTO = {
+    Aluno: (Modalidade.__table__, "total_matriculas", Matricula.modalidade_id),
+    Modalidade: (Aluno.__table__, "total_modalidades", Matricula.aluno_id),
+}
+
+
+def em_blocos(ids, tamanho=TAMANHO_BLOCO_IDS):
+    ids = list(ids)
+    for inicio in range(0, len(ids), tamanho):
+        yield ids[inicio:inicio + tamanho]
+
+
+def _validar_modelo(modelo):
+    if modelo not in _COLUNA_MATRICULA:
+        raise ValueError(f"Exclusão em massa não suportada para {modelo.__name__}.")
+
+
+def simular_exclusao(session, modelo, ids):
+    """Conta o que seria apagado, sem alterar nada (dry-run)."""
+    _validar_modelo(modelo)
+    registros = matriculas = 0
+    coluna = _COLUNA_MATRICULA[modelo]
+    for bloco in em_blocos(ids):
+        registros += session.scalar(select(func.count()).select_from(modelo).where(modelo.id.in_(bloco)))
+        if coluna is not None:
+            matriculas += session.scalar(select(func.count(Matricula.id)).where(coluna.in_(bloco)))
+    return ContagemExclusao(registros, matriculas)
+
+
+def excluir_em_cascata(session, modelo, ids):
+    """Apaga os registros e suas matrículas. Não faz commit (fica com quem chamou)."""
+    _validar_modelo(modelo)
+    registros = matriculas = 0
+    coluna = _COLUNA_MATRICULA[modelo]
+    for bloco in em_blocos(ids):
+        if coluna is not None:
+            _descontar_contadores(session, modelo, coluna, bloco)
+            matriculas += session.execute(delete(Matricula).where(coluna.in_(bloco))).rowcount
+        if modelo is Modalidade:
+            registros += session.execute(delete(Modalidade).where(Modalidade.id.in_(bloco))).rowcount
+        else:
+            registros += _excluir_pessoas(session, modelo, bloco)
+    return ContagemExclusao(registros, matriculas)
+
+
+def _descontar_contadores(session, modelo, coluna, ids):
+    tabela, contador, coluna_oposta = _CONTADOR_OPOSTO[modelo]
+    removidas = (
+        select(func.count(Matricula.id))
+        .where(coluna.in_(ids), coluna_oposta == tabela.c.id)
+        .scalar_subquery()
+    )
+    session.execute(
+        update(tabela)
+        .where(tabela.c.id.in_(select(coluna_oposta).where(coluna.in_(ids))))
+        .values({contador: tabela.c[contador] - removidas})
+        .execution_options(apenas_contadores=True)
+    )
+
+
+def _excluir_pessoas(session, modelo, ids):
+    # Herança joined-table: apaga a linha da subclasse e depois a de pessoas
+    tabela_pessoas = Pessoa.__table__
+    tabela_subclasse = modelo.__table__
+    identidade = modelo.__mapper__.polymorphic_identity
+    session.execute(delete(tabela_subclasse).where(tabela_subclasse.c.id.in_(ids)))
+    resultado = session.execute(
+        delete(tabela_pessoas).where(tabela_pessoas.c.id.in_(ids), tabela_pessoas.c.tipo == identidade)
+    )
+    return resultado.rowcount
@@ -0,0 +1,272 @@
+"""Exportação em massa das entidades para CSV, JSONL ou Parquet.
+
+As linhas são lidas com `yield_per` (o cursor entrega blocos de `tamanho_lote`
+linhas) e gravadas bloco a bloco, então a memória usada não depende do tamanho
+da tabela. Cada exportação grava primeiro um arquivo `.parcial` e só o renomeia
+no fim: um arquivo com o nome final está sempre completo.
+
+Exportação incremental: o maior id exportado de cada entidade fica em
+`marcas_exportacao.json`, na pasta de destino. Com `incremental=True`, só saem
+os registros com id acima dessa marca, em um arquivo separado
+(`aluno_apos_1500.csv`). Como a marca é o id, registros alterados depois de
+exportados não são reenviados; para isso, faça uma exportação completa.
+
+Parquet requer a dependência opcional pyarrow: pip install pyarrow
+"""
+
+import bz2
+import csv
+import datetime
+import gzip
+import json
+import lzma
+import os
+from collections import namedtuple
+
+from sqlalchemy import select, Integer, Date, DateTime
+
+from models.pessoa import Pessoa
+from models.aluno import Aluno
+from models.instrutor import Instrutor
+from models.modalidade import Modalidade
+from models.matricula import Matricula
+from models import models as ginasio
+
+TAMANHO_LOTE_PADRAO = 5000
+ARQUIVO_MARCAS = "marcas_exportacao.json"
+FORMATOS = ("csv", "jsonl", "parquet")
+
+# Compressões de fluxo para CSV/JSONL: nome -> (função de abertura, extensão)
+_COMPRESSOES_TEXTO = {"gzip": (gzip.open, ".gz"), "bz2": (bz2.open, ".bz2"), "xz": (lzma.open, ".xz")}
+# Parquet comprime por coluna, dentro do próprio arquivo
+_COMPRESSOES_PARQUET = ("snappy", "gzip", "zstd", "brotli")
+
+# arquivo: caminho gravado (None se não havia registros novos); ultimo_id: marca após a exportação
+ResultadoExportacao = namedtuple("ResultadoExportacao", ["entidade", "arquivo", "registros", "ultimo_id"])
+
+
+def _consulta_aluno():
+    pessoas, alunos = Pessoa.__table__, Aluno.__table__
+    return select(
+        pessoas.c.id, pessoas.c.nome, pessoas.c.idade, pessoas.c.contacto, alunos.c.matricula,
+        alunos.c.total_modalidades,
+    ).join_from(pessoas, alunos, alunos.c.id == pessoas.c.id)
+
+
+def _consulta_instrutor():
+    pessoas, instrutores = Pessoa.__table__, Instrutor.__table__
+    return select(
+        pessoas.c.id, pessoas.c.nome, pessoas.c.idade, pessoas.c.contacto, instrutores.c.cref,
+        instrutores.c.especializacao,
+    ).join_from(pessoas, instrutores, instrutores.c.id == pessoas.c.id).where(pessoas.c.tipo == "instrutor")
+
+
+def _consulta_instrutor_ginasio():
+    # No academia.db unificado os instrutores do ginásio dividem `instrutores` com os da academia
+    pessoas, instrutores = ginasio.Pessoa.__table__, ginasio.Instrutor.__table__
+    return select(
+        pessoas.c.id, pessoas.c.nome, pessoas.c.contacto, instrutores.c.especializacao,
+    ).join_from(pessoas, instrutores, instrutores.c.id == pessoas.c.id).where(pessoas.c.tipo == "instrutor_ginasio")
+
+
+def _consulta_membro():
+    pessoas, membros = ginasio.Pessoa.__table__, ginasio.Membro.__table__
+    return select(
+        pessoas.c.id, pessoas.c.nome, pessoas.c.contacto, membros.c.data_adesao, membros.c.tipo_subscricao,
+        membros.c.estado_pagamento, membros.c.pago_ate,
+    ).join_from(pessoas, membros, membros.c.id == pessoas.c.id)
+
+
+def _consulta_tabela(tabela):
+    return lambda: select(tabela)
+
+
+# entidade -> (função que monta a consulta, True se a tabela é do ginásio)
+ENTIDADES = {
+    "aluno": (_consulta_aluno, False),
+    "instrutor": (_consulta_instrutor, False),
+    "modalidade": (_consulta_tabela(Modalidade.__table__), False),
+    "matricula": (_consulta_tabela(Matricula.__table__), False),
+    "membro": (_consulta_membro, True),
+    "instrutor_ginasio": (_consulta_instrutor_ginasio, True),
+    "aula": (_consulta_tabela(ginasio.AulaGinastica.__table__), True),
+    "horario_aula": (_consulta_tabela(ginasio.HorarioAula.__table__), True),
+    "reserva": (_consulta_tabela(ginasio.Reserva.__table__), True),
+    "lista_espera": (_consulta_tabela(ginasio.ListaEspera.__table__), True),
+    "equipamento": (_consulta_tabela(ginasio.Equipamento.__table__), True),
+}
+
+
+def _texto(valor):
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    return valor
+
+
+class _EscritorCsv:
+    def __init__(self, arquivo, colunas):
+        self._escritor = csv.writer(arquivo)
+        self._escritor.writerow(colunas)
+
+    def escrever(self, linhas):
+        self._escritor.writerows([_texto(valor) for valor in linha] for linha in linhas)
+
+    def fechar(self):
+        pass
+
+
+class _EscritorJsonl:
+    def __init__(self, arquivo, colunas):
+        self._arquivo = arquivo
+        self._colunas = colunas
+
+    def escrever(self, linhas):
+        self._arquivo.writelines(
+            json.dumps(dict(zip(self._colunas, linha)), ensure_ascii=False, default=_texto) + "\n"
+            for linha in linhas
+        )
+
+    def fechar(self):
+        pass
+
+
+def _tipo_arrow(pa, tipo):
+    if isinstance(tipo, Integer):
+        return pa.int64()
+    if isinstance(tipo, DateTime):
+        return pa.timestamp("us")
+    if isinstance(tipo, Date):
+        return pa.date32()
+    return pa.string()
+
+
+class _EscritorParquet:
+    """Grava um row group por bloco lido, com o esquema derivado dos tipos das colunas."""
+
+    def __init__(self, caminho, colunas, tipos, compressao):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Exportação Parquet requer o pyarrow: pip install pyarrow") from None
+        self._pa = pa
+        self._esquema = pa.schema([(nome, _tipo_arrow(pa, tipo)) for nome, tipo in zip(colunas, tipos)])
+        self._escritor = pq.ParquetWriter(caminho, self._esquema, compression=compressao or "none")
+
+    def escrever(self, linhas):
+        colunas = list(zip(*linhas))
+        self._escritor.write_batch(self._pa.record_batch(
+            [self._pa.array(valores, type=campo.type) for valores, campo in zip(colunas, self._esquema)],
+            schema=self._esquema,
+        ))
+
+    def fechar(self):
+        self._escritor.close()
+
+
+def _validar_opcoes(entidade, formato, compressao, tamanho_lote):
+    if entidade not in ENTIDADES:
+        raise ValueError(f"Entidade de exportação inválida: {entidade}")
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+    validas = _COMPRESSOES_PARQUET if formato == "parquet" else tuple(_COMPRESSOES_TEXTO)
+    if compressao is not None and compressao not in validas:
+        raise ValueError(f"Compressão inválida para {formato}: {compressao} (use {', '.join(validas)})")
+    if tamanho_lote <= 0:
+        raise ValueError("Tamanho do lote deve ser inteiro positivo.")
+
+
+def ler_marcas(diretorio):
+    """{entidade: maior id já exportado} da pasta de destino ({} se ainda não houve exportação)."""
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_MARCAS), encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {}
+
+
+def _gravar_marca(diretorio, entidade, ultimo_id):
+    marcas = ler_marcas(diretorio)
+    marcas[entidade] = ultimo_id
+    caminho = os.path.join(diretorio, ARQUIVO_MARCAS)
+    with open(caminho + ".parcial", "w", encoding="utf-8") as arquivo:
+        json.dump(marcas, arquivo, indent=2, sort_keys=True)
+    os.replace(caminho + ".parcial", caminho)
+
+
+def _nome_arquivo(entidade, formato, compressao, apos):
+    nome = entidade if apos is None else f"{entidade}_apos_{apos}"
+    nome += f".{formato}"
+    if formato != "parquet" and compressao:
+        nome += _COMPRESSOES_TEXTO[compressao][1]
+    return nome
+
+
+def _abrir_escritor(caminho, formato, compressao, consulta):
+    """(escritor, arquivo de texto aberto ou None para Parquet)."""
+    colunas = [coluna.name for coluna in consulta.selected_columns]
+    if formato == "parquet":
+        tipos = [coluna.type for coluna in consulta.selected_columns]
+        return _EscritorParquet(caminho, colunas, tipos, compressao), None
+    abrir = _COMPRESSOES_TEXTO[compressao][0] if compressao else open
+    arquivo = abrir(caminho, "wt", encoding="utf-8", newline="")
+    classe = _EscritorCsv if formato == "csv" else _EscritorJsonl
+    return classe(arquivo, colunas), arquivo
+
+
+class ExportacaoService:
+    @staticmethod
+    def tabela_do_ginasio(entidade):
+        """True se a entidade vem das tabelas do models/models.py (ginásio)."""
+        return ENTIDADES[entidade][1]
+
+    @staticmethod
+    def exportar(session, entidade, diretorio, formato="csv", compressao=None, incremental=False,
+                 tamanho_lote=TAMANHO_LOTE_PADRAO):
+        """Exporta a entidade para `diretorio` e retorna ResultadoExportacao.
+
+        A marca de exportação incremental é atualizada também nas exportações
+        completas, para que a próxima incremental continue a partir delas. Ela
+        supõe ids crescentes e nunca reaproveitados, o que só vale para tabelas
+        criadas com AUTOINCREMENT (bancos novos): nas antigas o SQLite reaproveita
+        o maior id depois de uma exclusão, e o registro novo não sai na
+        incremental. Registros alterados também não voltam numa incremental.
+        """
+        _validar_opcoes(entidade, formato, compressao, tamanho_lote)
+        os.makedirs(diretorio, exist_ok=True)
+        apos = ler_marcas(diretorio).get(entidade, 0) if incremental else None
+
+        consulta = ENTIDADES[entidade][0]()
+        coluna_id = consulta.selected_columns.id
+        if apos is not None:
+            consulta = consulta.where(coluna_id > apos)
+        consulta = consulta.order_by(coluna_id)
+        posicao_id = [coluna.name for coluna in consulta.selected_columns].index("id")
+
+        caminho = os.path.join(diretorio, _nome_arquivo(entidade, formato, compressao, apos))
+        parcial = caminho + ".parcial"
+        escritor, arquivo = _abrir_escritor(parcial, formato, compressao, consulta)
+        registros = 0
+        ultimo_id = apos or 0
+        try:
+            resultado = session.execute(consulta, execution_options={"yield_per": tamanho_lote})
+            for linhas in resultado.partitions():
+                escritor.escrever(linhas)
+                registros += len(linhas)
+                ultimo_id = linhas[-1][posicao_id]
+            escritor.fechar()
+        except BaseException:
+            if arquivo is not None:
+                arquivo.close()
+            os.remove(parcial)
+            raise
+        if arquivo is not None:
+            arquivo.close()
+
+        if incremental and not registros:
+            # Nada novo desde a última exportação: não deixa arquivo vazio
+            os.remove(parcial)
+            return ResultadoExportacao(entidade, None, 0, ultimo_id)
+        os.replace(parcial, caminho)
+        _gravar_marca(diretorio, entidade, ultimo_id)
+        return ResultadoExportacao(entidade, caminho, registros, ultimo_id)
@@ -0,0 +1,284 @@
+"""Frequência: ingestão dos check-ins das catracas e agregados de ocupação.
+
+As catracas geram milhares de eventos por hora. Gravar cada um com o seu próprio
+commit disputaria o lock de escrita do SQLite com o balcão, então os eventos
+passam por um RegistradorPresencas, que os acumula em memória e grava em lotes:
+cada lote é uma única transação com um INSERT em massa no log (`presencas`) e um
+upsert por tabela de agregado (`presencas_por_hora`, `presencas_por_dia`).
+
+    with RegistradorPresencas() as registrador:       # inicia a thread de gravação
+        registrador.registrar(aluno_id=12, modalidade_id=3, origem="catraca-1")
+    # ao sair, o que restou no buffer é gravado
+
+Os painéis de ocupação leem só os agregados (uma linha por hora/dia e
+modalidade), sem percorrer o log. Os agregados contam check-ins, não pessoas
+distintas.
+"""
+
+import datetime
+import logging
+import threading
+from collections import Counter, namedtuple
+
+from sqlalchemy import select, delete, func, insert as insert_padrao
+
+from models.base import Session, insert_com_conflito
+from models.modalidade import Modalidade
+from models.presenca import Presenca, PresencaPorHora, PresencaPorDia, SEM_MODALIDADE
+from models.transacao import confirmar
+
+TAMANHO_LOTE_PADRAO = 500
+INTERVALO_PADRAO = 1.0  # segundos entre gravações da thread de fundo
+# Acima disso, registrar() grava o buffer na própria thread (freia a catraca em vez de perder eventos)
+CAPACIDADE_PADRAO = 50_000
+
+logger = logging.getLogger("academia.frequencia")
+
+OcupacaoHora = namedtuple("OcupacaoHora", ["hora", "quantidade"])
+PresencasDia = namedtuple("PresencasDia", ["dia", "quantidade"])
+
+
+def _hora_cheia(momento):
+    return momento.replace(minute=0, second=0, microsecond=0)
+
+
+def _inteiro_opcional(valor, campo):
+    if valor is None:
+        return None
+    if isinstance(valor, bool) or not isinstance(valor, int):
+        raise ValueError(f"{campo} deve ser um número inteiro.")
+    return valor
+
+
+def montar_evento(aluno_id=None, membro_id=None, modalidade_id=None, momento=None, origem=None):
+    """Valida um check-in e retorna o dicionário de colunas de `presencas`."""
+    aluno_id = _inteiro_opcional(aluno_id, "aluno_id")
+    membro_id = _inteiro_opcional(membro_id, "membro_id")
+    if (aluno_id is None) == (membro_id is None):
+        raise ValueError("Informe exatamente um entre aluno_id e membro_id.")
+    if momento is None:
+        momento = datetime.datetime.now()
+    elif not isinstance(momento, datetime.datetime):
+        raise ValueError("momento deve ser um datetime.")
+    return {
+        "momento": momento,
+        "aluno_id": aluno_id,
+        "membro_id": membro_id,
+        "modalidade_id": _inteiro_opcional(modalidade_id, "modalidade_id"),
+        "origem": origem,
+    }
+
+
+def _somar_agregado(session, modelo, coluna_tempo, contagem):
+    comando = insert_com_conflito(session, modelo)
+    comando = comando.on_conflict_do_update(
+        index_elements=[coluna_tempo, "modalidade_id"],
+        set_={"quantidade": modelo.quantidade + comando.excluded.quantidade},
+    )
+    session.execute(comando, [
+        {coluna_tempo: tempo, "modalidade_id": modalidade_id, "quantidade": quantidade}
+        for (tempo, modalidade_id), quantidade in contagem.items()
+    ])
+
+
+class PresencaService:
+    @staticmethod
+    def gravar_lote(session, eventos):
+        """Grava os eventos (dicionários de montar_evento) e soma os agregados, em uma transação.
+
+        Retorna quantos check-ins foram gravados.
+        """
+        if not eventos:
+            return 0
+        por_hora = Counter()
+        por_dia = Counter()
+        for evento in eventos:
+            modalidade_id = evento["modalidade_id"] or SEM_MODALIDADE
+            por_hora[(_hora_cheia(evento["momento"]), modalidade_id)] += 1
+            por_dia[(evento["momento"].date(), modalidade_id)] += 1
+
+        session.execute(insert_padrao(Presenca), eventos)
+        _somar_agregado(session, PresencaPorHora, "hora", por_hora)
+        _somar_agregado(session, PresencaPorDia, "dia", por_dia)
+        confirmar(session)
+        return len(eventos)
+
+    @staticmethod
+    def ocupacao_por_hora(session, dia, modalidade_id=None):
+        """(hora, quantidade) de check-ins no dia, só das horas com movimento.
+
+        Sem `modalidade_id`, soma todas as modalidades (e a entrada geral).
+        """
+        inicio = datetime.datetime.combine(dia, datetime.time())
+        consulta = (
+            select(PresencaPorHora.hora, func.sum(PresencaPorHora.quantidade))
+            .where(PresencaPorHora.hora >= inicio, PresencaPorHora.hora < inicio + datetime.timedelta(days=1))
+            .group_by(PresencaPorHora.hora)
+            .order_by(PresencaPorHora.hora)
+        )
+        if modalidade_id is not None:
+            consulta = consulta.where(PresencaPorHora.modalidade_id == modalidade_id)
+        return [OcupacaoHora(*linha) for linha in session.execute(consulta)]
+
+    @staticmethod
+    def presencas_por_dia(session, inicio, fim, modalidade_id=None):
+        """(dia, quantidade) de check-ins entre as datas `inicio` e `fim` (inclusive)."""
+        consulta = (
+            select(PresencaPorDia.dia, func.sum(PresencaPorDia.quantidade))
+            .where(PresencaPorDia.dia.between(inicio, fim))
+            .group_by(PresencaPorDia.dia)
+            .order_by(PresencaPorDia.dia)
+        )
+        if modalidade_id is not None:
+            consulta = consulta.where(PresencaPorDia.modalidade_id == modalidade_id)
+        return [PresencasDia(*linha) for linha in session.execute(consulta)]
+
+    @staticmethod
+    def presencas_por_modalidade(session, inicio, fim):
+        """(modalidade_id, nome, quantidade) entre as datas; nome é None para a entrada geral."""
+        quantidade = func.sum(PresencaPorDia.quantidade).label("quantidade")
+        consulta = (
+            select(PresencaPorDia.modalidade_id, Modalidade.nome, quantidade)
+            .outerjoin(Modalidade, Modalidade.id == PresencaPorDia.modalidade_id)
+            .where(PresencaPorDia.dia.between(inicio, fim))
+            .group_by(PresencaPorDia.modalidade_id, Modalidade.nome)
+            .order_by(quantidade.desc())
+        )
+        return session.execute(consulta).all()
+
+    @staticmethod
+    def historico(session, aluno_id=None, membro_id=None, limite=50):
+        """Últimos check-ins de um aluno ou membro: (momento, modalidade_id, origem)."""
+        if (aluno_id is None) == (membro_id is None):
+            raise ValueError("Informe exatamente um entre aluno_id e membro_id.")
+        coluna = Presenca.aluno_id if aluno_id is not None else Presenca.membro_id
+        consulta = (
+            select(Presenca.momento, Presenca.modalidade_id, Presenca.origem)
+            .where(coluna == (aluno_id if aluno_id is not None else membro_id))
+            .order_by(Presenca.momento.desc())
+            .limit(limite)
+        )
+        return session.execute(consulta).all()
+
+    @staticmethod
+    def reconstruir_agregados(session):
+        """Recalcula os agregados a partir do log (após cargas feitas fora do registrador).
+
+        Retorna a quantidade de check-ins no log.
+        """
+        modalidade = func.coalesce(Presenca.modalidade_id, SEM_MODALIDADE)
+        # Mesmo formato de texto com que o SQLAlchemy grava DateTime e Date no SQLite
+        hora = func.strftime("%Y-%m-%d %H:00:00.000000", Presenca.momento)
+        dia = func.date(Presenca.momento)
+        session.execute(delete(PresencaPorHora))
+        session.execute(delete(PresencaPorDia))
+        session.execute(insert_padrao(PresencaPorHora).from_select(
+            ["hora", "modalidade_id", "quantidade"],
+            select(hora, modalidade, func.count()).group_by(hora, modalidade),
+        ))
+        session.execute(insert_padrao(PresencaPorDia).from_select(
+            ["dia", "modalidade_id", "quantidade"],
+            select(dia, modalidade, func.count()).group_by(dia, modalidade),
+        ))
+        total = session.scalar(select(func.count(Presenca.id)))
+        confirmar(session)
+        return total
+
+
+class RegistradorPresencas:
+    """Buffer de check-ins, seguro para threads, gravado em lotes por PresencaService.gravar_lote.
+
+    Com iniciar() (ou `with`), uma thread de fundo grava o buffer a cada
+    `intervalo` segundos ou assim que ele chega a `tamanho_lote` eventos. Sem a
+    thread, o buffer é gravado ao atingir `tamanho_lote` ou ao chamar descarregar().
+    Se a gravação falhar, os eventos voltam para o buffer e são tentados de novo.
+    """
+
+    def __init__(self, fabrica_sessao=Session, tamanho_lote=TAMANHO_LOTE_PADRAO,
+                 intervalo=INTERVALO_PADRAO, capacidade=CAPACIDADE_PADRAO):
+        if tamanho_lote <= 0:
+            raise ValueError("Tamanho do lote deve ser inteiro positivo.")
+        self.fabrica_sessao = fabrica_sessao
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.capacidade = max(capacidade, tamanho_lote)
+        self.gravados = self.lotes = self.falhas = 0
+        self._pendentes = []
+        self._trava = threading.Lock()            # protege _pendentes
+        self._trava_gravacao = threading.Lock()   # um lote por vez, na ordem de chegada
+        self._acordar = threading.Event()
+        self._encerrar = threading.Event()
+        self._thread = None
+
+    def registrar(self, aluno_id=None, membro_id=None, modalidade_id=None, momento=None, origem=None):
+        """Enfileira um check-in (levanta ValueError se for inválido). Não acessa o banco,
+        exceto para gravar o buffer quando ele enche."""
+        evento = montar_evento(aluno_id, membro_id, modalidade_id, momento, origem)
+        with self._trava:
+            self._pendentes.append(evento)
+            pendentes = len(self._pendentes)
+        if pendentes >= self.capacidade or (pendentes >= self.tamanho_lote and self._thread is None):
+            self.descarregar()
+        elif pendentes >= self.tamanho_lote:
+            self._acordar.set()
+
+    def pendentes(self):
+        with self._trava:
+            return len(self._pendentes)
+
+    def descarregar(self):
+        """Grava tudo o que está no buffer, em lotes de `tamanho_lote`. Retorna quantos gravou."""
+        total = 0
+        with self._trava_gravacao:
+            with self._trava:
+                eventos, self._pendentes = self._pendentes, []
+            for inicio in range(0, len(eventos), self.tamanho_lote):
+                lote = eventos[inicio:inicio + self.tamanho_lote]
+                try:
+                    with self.fabrica_sessao() as session:
+                        PresencaService.gravar_lote(session, lote)
+                except Exception:
+                    self.falhas += 1
+                    with self._trava:
+                        # Devolve ao início do buffer o que não foi gravado, mantendo a ordem
+                        self._pendentes[:0] = eventos[inicio:]
+                    raise
+                total += len(lote)
+                self.lotes += 1
+            self.gravados += total
+        return total
+
+    def iniciar(self):
+        if self._thread is not None:
+            return
+        self._encerrar.clear()
+        self._thread = threading.Thread(target=self._executar, name="registrador-presencas", daemon=True)
+        self._thread.start()
+
+    def encerrar(self):
+        """Para a thread de fundo e grava o que restou no buffer."""
+        if self._thread is not None:
+            self._encerrar.set()
+            self._acordar.set()
+            self._thread.join()
+            self._thread = None
+        return self.descarregar()
+
+    def _executar(self):
+        while not self._encerrar.is_set():
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            try:
+                self.descarregar()
+            except Exception:
+                logger.exception("Falha ao gravar lote de presenças; nova tentativa em %s s", self.intervalo)
+
+    def estatisticas(self):
+        return {"pendentes": self.pendentes(), "gravados": self.gravados, "lotes": self.lotes, "falhas": self.falhas}
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *_excecao):
+        self.encerrar()
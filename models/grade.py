@@ -0,0 +1,416 @@
+"""Grade semanal das aulas do ginásio: horários estruturados, conflitos e painel da recepção.
+
+Cada ocorrência semanal de uma AulaGinastica é um HorarioAula (dia da semana,
+início e fim em minutos desde 00:00, sala). O texto livre `aulas.horario`
+continua existindo para exibição; a migração v7/g2 preenche a grade a partir
+dele quando o texto é reconhecido ("Seg 07:00").
+
+Conflitos são verificados no banco, com comparações de intervalo cobertas pelos
+índices (dia_semana, inicio, fim) e (sala, dia_semana, inicio): duas ocorrências
+no mesmo dia se sobrepõem quando `a.inicio < b.fim AND a.fim > b.inicio`. O
+agendamento grava com um único INSERT ... SELECT ... WHERE NOT EXISTS, então
+dois agendamentos simultâneos não ocupam o mesmo horário.
+
+Para as leituras da recepção ("o que acontece agora", "próximas aulas") a grade
+da semana inteira fica em memória (GradeSemanal), em uma árvore de intervalos
+sobre os minutos da semana, no cache `grades_semanais` (models/cache.py). Ela é
+descartada quando uma sessão deste processo altera aulas ou horários; nomes de
+instrutores editados aparecem após o TTL.
+"""
+
+import bisect
+import datetime
+import re
+from collections import namedtuple
+
+from sqlalchemy import select, insert, delete, literal, exists, or_, and_
+from sqlalchemy.orm import aliased
+
+from models.models import AulaGinastica, HorarioAula, Pessoa
+from models.transacao import confirmar
+from models.cache import grades_semanais
+
+DIAS_SEMANA = ("Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom")  # índice = datetime.weekday()
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+DURACAO_PADRAO = 60  # minutos, para horários criados a partir do texto livre
+
+# Motivos de conflito
+MESMA_AULA = "aula"
+MESMA_SALA = "sala"
+MESMO_INSTRUTOR = "instrutor"
+
+OcorrenciaAula = namedtuple(
+    "OcorrenciaAula",
+    ["horario_id", "aula_id", "aula", "instrutor_id", "instrutor", "dia_semana", "inicio", "fim", "sala"],
+)
+# motivos: tupla com MESMA_AULA, MESMA_SALA e/ou MESMO_INSTRUTOR
+ConflitoHorario = namedtuple(
+    "ConflitoHorario", ["horario_id", "aula_id", "aula", "dia_semana", "inicio", "fim", "sala", "motivos"]
+)
+# Duas aulas do mesmo instrutor que se sobrepõem; inicio/fim delimitam o trecho em comum
+SobreposicaoInstrutor = namedtuple(
+    "SobreposicaoInstrutor",
+    ["dia_semana", "inicio", "fim", "horario_id", "aula_id", "aula", "outro_horario_id", "outra_aula_id",
+     "outra_aula"],
+)
+# id: horário criado (ou aula atualizada); None quando os conflitos impediram a gravação
+ResultadoAgendamento = namedtuple("ResultadoAgendamento", ["id", "conflitos"])
+ProximaAula = namedtuple("ProximaAula", ["comeca_em", "ocorrencia"])
+PainelAulas = namedtuple("PainelAulas", ["momento", "agora", "proximas"])
+
+_TEXTO_HORARIO = re.compile(r"^\s*([A-Za-zÀ-ÿ]{3})[A-Za-zÀ-ÿ\-]*\.?\s+(\d{1,2})[:hH](\d{2})\s*$")
+_DIAS_POR_PREFIXO = {"seg": 0, "ter": 1, "qua": 2, "qui": 3, "sex": 4, "sáb": 5, "sab": 5, "dom": 6}
+
+
+# --- Conversões ---
+
+def interpretar_horario(texto):
+    """(dia_semana, minuto de início) de um texto como "Seg 07:00" ou "quarta 18h30"; None se não reconhecido."""
+    encontrado = _TEXTO_HORARIO.match(texto or "")
+    if encontrado is None:
+        return None
+    dia = _DIAS_POR_PREFIXO.get(encontrado.group(1).lower())
+    hora, minuto = int(encontrado.group(2)), int(encontrado.group(3))
+    if dia is None or hora > 23 or minuto > 59:
+        return None
+    return dia, hora * 60 + minuto
+
+
+def minutos(valor):
+    """Minutos desde 00:00 de um inteiro, datetime.time ou texto "HH:MM" ("24:00" = fim do dia)."""
+    if isinstance(valor, datetime.time):
+        return valor.hour * 60 + valor.minute
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return valor
+    if isinstance(valor, str):
+        partes = valor.strip().split(":")
+        if len(partes) == 2 and all(parte.isdigit() for parte in partes):
+            hora, minuto = int(partes[0]), int(partes[1])
+            if minuto < 60 and hora * 60 + minuto <= MINUTOS_DIA:
+                return hora * 60 + minuto
+    raise ValueError(f"Horário inválido: {valor!r} (use HH:MM).")
+
+
+def texto_minutos(valor):
+    """"HH:MM" de um minuto do dia."""
+    return f"{valor // 60:02d}:{valor % 60:02d}"
+
+
+def texto_ocorrencia(dia_semana, inicio, fim):
+    """Ex.: "Seg 07:00-08:00"."""
+    return f"{DIAS_SEMANA[dia_semana]} {texto_minutos(inicio)}-{texto_minutos(fim)}"
+
+
+def _validar_intervalo(dia_semana, inicio, fim):
+    if not isinstance(dia_semana, int) or not 0 <= dia_semana <= 6:
+        raise ValueError("Dia da semana deve estar entre 0 (segunda) e 6 (domingo).")
+    if not 0 <= inicio < fim <= MINUTOS_DIA:
+        raise ValueError("Horário inválido: o início deve ser anterior ao fim, dentro do mesmo dia.")
+
+
+def _posicao_na_semana(momento):
+    return momento.weekday() * MINUTOS_DIA + momento.hour * 60 + momento.minute
+
+
+# --- Grade em memória ---
+
+class ArvoreIntervalos:
+    """Árvore de intervalos estática sobre [inicio, fim), montada uma vez a partir de uma lista.
+
+    Os intervalos ficam ordenados por início; a árvore é implícita (o meio de
+    cada faixa é a raiz dela) e cada nó guarda o maior `fim` da sua subárvore,
+    o que permite descartar subárvores inteiras que terminam antes da consulta.
+    Uma consulta custa O(log n + k) para k resultados.
+    """
+
+    def __init__(self, intervalos):
+        self._itens = sorted(intervalos, key=lambda item: (item[0], item[1]))
+        self.inicios = [item[0] for item in self._itens]
+        self._maior_fim = [0] * len(self._itens)
+        self._montar(0, len(self._itens))
+
+    def __len__(self):
+        return len(self._itens)
+
+    def _montar(self, esquerda, direita):
+        if esquerda >= direita:
+            return 0
+        meio = (esquerda + direita) // 2
+        maior = max(self._itens[meio][1], self._montar(esquerda, meio), self._montar(meio + 1, direita))
+        self._maior_fim[meio] = maior
+        return maior
+
+    def sobrepostos(self, inicio, fim):
+        """Valores dos intervalos que se sobrepõem a [inicio, fim), em ordem de início."""
+        encontrados = []
+        self._buscar(0, len(self._itens), inicio, fim, encontrados)
+        return encontrados
+
+    def no_ponto(self, ponto):
+        return self.sobrepostos(ponto, ponto + 1)
+
+    def item(self, posicao):
+        """(inicio, fim, valor) na posição `posicao` da ordem por início."""
+        return self._itens[posicao]
+
+    def _buscar(self, esquerda, direita, inicio, fim, encontrados):
+        if esquerda >= direita:
+            return
+        meio = (esquerda + direita) // 2
+        if self._maior_fim[meio] <= inicio:
+            # Nada nesta subárvore termina depois do início da consulta
+            return
+        self._buscar(esquerda, meio, inicio, fim, encontrados)
+        comeco, termino, valor = self._itens[meio]
+        if comeco >= fim:
+            # Este e todos à direita começam depois do fim da consulta
+            return
+        if termino > inicio:
+            encontrados.append(valor)
+        self._buscar(meio + 1, direita, inicio, fim, encontrados)
+
+
+def _consulta_ocorrencias():
+    pessoas = Pessoa.__table__
+    return (
+        select(HorarioAula.id, HorarioAula.aula_id, AulaGinastica.nome, AulaGinastica.instrutor_id,
+               pessoas.c.nome, HorarioAula.dia_semana, HorarioAula.inicio, HorarioAula.fim, HorarioAula.sala)
+        .join(AulaGinastica, AulaGinastica.id == HorarioAula.aula_id)
+        .outerjoin(pessoas, pessoas.c.id == AulaGinastica.instrutor_id)
+        .order_by(HorarioAula.dia_semana, HorarioAula.inicio, HorarioAula.id)
+    )
+
+
+class GradeSemanal:
+    """Todas as ocorrências da semana em memória, indexadas por minuto da semana (segunda 00:00 = 0)."""
+
+    def __init__(self, ocorrencias):
+        self.ocorrencias = tuple(ocorrencias)
+        self._arvore = ArvoreIntervalos(
+            (o.dia_semana * MINUTOS_DIA + o.inicio, o.dia_semana * MINUTOS_DIA + o.fim, o)
+            for o in self.ocorrencias
+        )
+        self.salas = tuple(sorted({o.sala for o in self.ocorrencias if o.sala}))
+
+    @classmethod
+    def carregar(cls, session):
+        return cls(OcorrenciaAula(*linha) for linha in session.execute(_consulta_ocorrencias()))
+
+    def __len__(self):
+        return len(self.ocorrencias)
+
+    def sobrepostas(self, dia_semana, inicio, fim):
+        """Ocorrências que se sobrepõem a [inicio, fim) no dia."""
+        base = dia_semana * MINUTOS_DIA
+        return self._arvore.sobrepostos(base + inicio, base + fim)
+
+    def no_horario(self, dia_semana, minuto):
+        """Ocorrências em andamento no minuto do dia."""
+        return self._arvore.no_ponto(dia_semana * MINUTOS_DIA + minuto)
+
+    def em_andamento(self, momento):
+        return self._arvore.no_ponto(_posicao_na_semana(momento))
+
+    def proximas(self, momento, limite=5):
+        """As `limite` próximas ocorrências que começam depois de `momento`, com a data e hora de início.
+
+        Depois de domingo a busca continua na segunda-feira seguinte.
+        """
+        total = len(self._arvore)
+        if not total or limite <= 0:
+            return []
+        posicao = _posicao_na_semana(momento)
+        inicio_semana = (momento - datetime.timedelta(minutes=posicao)).replace(second=0, microsecond=0)
+        # Quem começa neste minuto já está em andamento
+        primeiro = bisect.bisect_right(self._arvore.inicios, posicao)
+        proximas = []
+        for deslocamento in range(min(limite, total)):
+            indice = primeiro + deslocamento
+            semanas, indice = divmod(indice, total)
+            comeco, _fim, ocorrencia = self._arvore.item(indice)
+            comeca_em = inicio_semana + datetime.timedelta(minutes=comeco + semanas * MINUTOS_SEMANA)
+            proximas.append(ProximaAula(comeca_em, ocorrencia))
+        return proximas
+
+    def salas_livres(self, dia_semana, inicio, fim):
+        """Salas da grade sem nenhuma ocorrência em [inicio, fim) no dia."""
+        ocupadas = {o.sala for o in self.sobrepostas(dia_semana, inicio, fim)}
+        return [sala for sala in self.salas if sala not in ocupadas]
+
+    def do_instrutor(self, instrutor_id):
+        return [o for o in self.ocorrencias if o.instrutor_id == instrutor_id]
+
+
+# --- Consultas no banco ---
+
+def _filtro_conflitos(dia_semana, inicio, fim, aula_id, instrutor_id, sala):
+    """Condição (sobre HorarioAula junto de AulaGinastica) dos horários que conflitam com o informado."""
+    recursos = [HorarioAula.aula_id == aula_id]
+    if sala:
+        recursos.append(HorarioAula.sala == sala)
+    if instrutor_id is not None:
+        recursos.append(AulaGinastica.instrutor_id == instrutor_id)
+    return and_(
+        HorarioAula.dia_semana == dia_semana,
+        HorarioAula.inicio < fim,
+        HorarioAula.fim > inicio,
+        or_(*recursos),
+    )
+
+
+def _conflitos(session, dia_semana, inicio, fim, aula_id, instrutor_id, sala, ignorar_id=None):
+    consulta = (
+        select(HorarioAula.id, HorarioAula.aula_id, AulaGinastica.nome, AulaGinastica.instrutor_id,
+               HorarioAula.dia_semana, HorarioAula.inicio, HorarioAula.fim, HorarioAula.sala)
+        .join(AulaGinastica, AulaGinastica.id == HorarioAula.aula_id)
+        .where(_filtro_conflitos(dia_semana, inicio, fim, aula_id, instrutor_id, sala))
+        .order_by(HorarioAula.inicio, HorarioAula.id)
+    )
+    if ignorar_id is not None:
+        consulta = consulta.where(HorarioAula.id != ignorar_id)
+    conflitos = []
+    for linha in session.execute(consulta):
+        motivos = []
+        if linha.aula_id == aula_id:
+            motivos.append(MESMA_AULA)
+        if sala and linha.sala == sala:
+            motivos.append(MESMA_SALA)
+        if instrutor_id is not None and linha.instrutor_id == instrutor_id:
+            motivos.append(MESMO_INSTRUTOR)
+        conflitos.append(ConflitoHorario(
+            linha.id, linha.aula_id, linha.nome, linha.dia_semana, linha.inicio, linha.fim, linha.sala,
+            tuple(motivos),
+        ))
+    return conflitos
+
+
+def _instrutor_da_aula(session, aula_id):
+    encontrada = session.execute(select(AulaGinastica.instrutor_id).where(AulaGinastica.id == aula_id)).first()
+    if encontrada is None:
+        raise ValueError(f"Aula com ID {aula_id} não encontrada.")
+    return encontrada.instrutor_id
+
+
+class GradeService:
+    @staticmethod
+    def agendar(session, aula_id, dia_semana, inicio, fim, sala=None, permitir_conflito=False):
+        """Acrescenta uma ocorrência semanal à aula. `inicio`/`fim` em minutos, "HH:MM" ou datetime.time.
+
+        Conflitam os horários sobrepostos da mesma aula, da mesma sala ou de
+        outra aula do mesmo instrutor. Com conflito o horário não é gravado (a
+        menos que `permitir_conflito`) e o ResultadoAgendamento traz id None e
+        os conflitos encontrados.
+        """
+        inicio, fim = minutos(inicio), minutos(fim)
+        _validar_intervalo(dia_semana, inicio, fim)
+        sala = sala.strip() if sala and sala.strip() else None
+        instrutor_id = _instrutor_da_aula(session, aula_id)
+
+        if permitir_conflito:
+            conflitos = _conflitos(session, dia_semana, inicio, fim, aula_id, instrutor_id, sala)
+            horario = HorarioAula(aula_id, dia_semana, inicio, fim, sala)
+            session.add(horario)
+            session.flush()
+            horario_id = horario.id
+        else:
+            # Verificação e gravação no mesmo comando: um agendamento simultâneo não passa pelo meio
+            livre = ~exists(
+                select(HorarioAula.id)
+                .join(AulaGinastica, AulaGinastica.id == HorarioAula.aula_id)
+                .where(_filtro_conflitos(dia_semana, inicio, fim, aula_id, instrutor_id, sala))
+            )
+            horario_id = session.execute(
+                insert(HorarioAula)
+                .from_select(
+                    ["aula_id", "dia_semana", "inicio", "fim", "sala"],
+                    select(literal(aula_id), literal(dia_semana), literal(inicio), literal(fim), literal(sala))
+                    .where(livre),
+                )
+                .returning(HorarioAula.id)
+            ).scalar()
+            conflitos = []
+            if horario_id is None:
+                conflitos = _conflitos(session, dia_semana, inicio, fim, aula_id, instrutor_id, sala)
+        confirmar(session)
+        return ResultadoAgendamento(horario_id, conflitos)
+
+    @staticmethod
+    def remover(session, horario_id):
+        """Remove a ocorrência; False se ela não existir."""
+        removido = session.execute(delete(HorarioAula).where(HorarioAula.id == horario_id)).rowcount
+        confirmar(session)
+        return bool(removido)
+
+    @staticmethod
+    def atribuir_instrutor(session, aula_id, instrutor_id, permitir_conflito=False):
+        """Troca o instrutor da aula, recusando se ele já dá outra aula em algum dos horários dela."""
+        aula = session.get(AulaGinastica, aula_id)
+        if aula is None:
+            raise ValueError(f"Aula com ID {aula_id} não encontrada.")
+        conflitos = []
+        if instrutor_id is not None:
+            for horario in aula.horarios:
+                conflitos.extend(
+                    conflito
+                    for conflito in _conflitos(session, horario.dia_semana, horario.inicio, horario.fim,
+                                               None, instrutor_id, None)
+                    if conflito.aula_id != aula_id
+                )
+        if conflitos and not permitir_conflito:
+            return ResultadoAgendamento(None, conflitos)
+        aula.instrutor_id = instrutor_id
+        confirmar(session)
+        return ResultadoAgendamento(aula_id, conflitos)
+
+    @staticmethod
+    def conflitos(session, dia_semana, inicio, fim, sala=None, instrutor_id=None, aula_id=None):
+        """Lista de ConflitoHorario que um agendamento em [inicio, fim) no dia encontraria."""
+        inicio, fim = minutos(inicio), minutos(fim)
+        _validar_intervalo(dia_semana, inicio, fim)
+        if aula_id is not None and instrutor_id is None:
+            instrutor_id = _instrutor_da_aula(session, aula_id)
+        return _conflitos(session, dia_semana, inicio, fim, aula_id, instrutor_id, sala)
+
+    @staticmethod
+    def conflitos_do_instrutor(session, instrutor_id):
+        """Pares de horários sobrepostos entre as aulas do instrutor (lista de SobreposicaoInstrutor)."""
+        h1, h2 = aliased(HorarioAula), aliased(HorarioAula)
+        a1, a2 = aliased(AulaGinastica), aliased(AulaGinastica)
+        consulta = (
+            select(h1.dia_semana, h1.inicio, h1.fim, h2.inicio.label("outro_inicio"), h2.fim.label("outro_fim"),
+                   h1.id, a1.id, a1.nome, h2.id, a2.id, a2.nome)
+            .join(a1, a1.id == h1.aula_id)
+            .join(h2, and_(h2.dia_semana == h1.dia_semana, h2.inicio < h1.fim, h2.fim > h1.inicio, h2.id > h1.id))
+            .join(a2, and_(a2.id == h2.aula_id, a2.instrutor_id == a1.instrutor_id))
+            .where(a1.instrutor_id == instrutor_id)
+            .order_by(h1.dia_semana, h1.inicio, h1.id, h2.id)
+        )
+        return [
+            SobreposicaoInstrutor(dia, max(inicio, outro_inicio), min(fim, outro_fim), *horarios)
+            for dia, inicio, fim, outro_inicio, outro_fim, *horarios in session.execute(consulta)
+        ]
+
+    @staticmethod
+    def grade_semanal(session):
+        """GradeSemanal do banco da sessão, em cache."""
+        return grades_semanais.ler(
+            session, str(session.get_bind().url), lambda: GradeSemanal.carregar(session)
+        )
+
+    @staticmethod
+    def aulas_no_horario(session, dia_semana, minuto):
+        return GradeService.grade_semanal(session).no_horario(dia_semana, minutos(minuto))
+
+    @staticmethod
+    def salas_livres(session, dia_semana, inicio, fim):
+        inicio, fim = minutos(inicio), minutos(fim)
+        _validar_intervalo(dia_semana, inicio, fim)
+        return GradeService.grade_semanal(session).salas_livres(dia_semana, inicio, fim)
+
+    @staticmethod
+    def painel(session, momento=None, limite=5):
+        """PainelAulas para a tela da recepção: aulas em andamento e as próximas a começar."""
+        momento = momento or datetime.datetime.now()
+        grade = GradeService.grade_semanal(session)
+        return PainelAulas(momento, grade.em_andamento(momento), grade.proximas(momento, limite))
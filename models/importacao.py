@@ -0,0 +1,201 @@
+"""Importação em lote de alunos, instrutores e modalidades a partir de CSV/JSONL."""
+
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from models.pessoa import Pessoa
+from models.aluno import Aluno
+from models.instrutor import Instrutor
+from models.modalidade import Modalidade
+from models.resultados import ResumoImportacao, formatar
+
+TAMANHO_LOTE_PADRAO = 1000
+
+
+def ler_registros(caminho, formato=None):
+    """Lê o arquivo linha a linha (streaming), gerando (numero_linha, dict).
+
+    O formato é deduzido pela extensão (.csv, .jsonl/.ndjson) se não for informado.
+    """
+    if formato is None:
+        extensao = os.path.splitext(caminho)[1].lower()
+        formato = "csv" if extensao == ".csv" else "jsonl"
+
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        if formato == "csv":
+            # A linha 1 é o cabeçalho, então os dados começam na linha 2
+            for numero, linha in enumerate(csv.DictReader(arquivo), start=2):
+                yield numero, linha
+        elif formato == "jsonl":
+            for numero, linha in enumerate(arquivo, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    yield numero, json.loads(linha)
+                except json.JSONDecodeError as e:
+                    yield numero, e
+        else:
+            raise ValueError(f"Formato de importação desconhecido: {formato}")
+
+
+def _inteiro(valor):
+    # CSV traz tudo como texto; JSON já pode trazer números
+    if isinstance(valor, str):
+        valor = valor.strip()
+        return int(valor) if valor.lstrip("-").isdigit() else valor
+    return valor
+
+
+class RelatorioImportacao:
+    """Resultado de uma importação: total inserido e rejeições por linha."""
+
+    def __init__(self):
+        self.inseridos = 0
+        self.rejeitados = []  # lista de (numero_linha, motivo)
+
+    def rejeitar(self, numero, motivo):
+        self.rejeitados.append((numero, motivo))
+
+    def dados(self):
+        return ResumoImportacao(self.inseridos, tuple(self.rejeitados))
+
+    def exibir_detalhes(self):
+        print(formatar(self.dados()))
+
+
+class _Importador(ABC):
+    """Define como validar e inserir um tipo de entidade.
+
+    `chave` é o atributo único usado para detectar duplicatas (matrícula, CREF, nome).
+    """
+    modelo = None
+    chave = None
+    descricao_chave = None
+
+    @abstractmethod
+    def validar(self, registro):
+        """Dict de colunas validadas do registro; levanta ValueError se for inválido."""
+
+    def existentes(self, session, chaves):
+        coluna = getattr(self.modelo, self.chave)
+        consulta = select(coluna).where(coluna.in_(chaves))
+        return set(session.scalars(consulta))
+
+
+class _ImportadorAluno(_Importador):
+    modelo = Aluno
+    chave = "_matricula"
+    descricao_chave = "matrícula"
+
+    def validar(self, registro):
+        return {
+            "_nome": Pessoa.validar_nome(registro.get("nome")),
+            "_idade": Pessoa.validar_idade(_inteiro(registro.get("idade"))),
+            "_matricula": Aluno.validar_matricula(_inteiro(registro.get("matricula"))),
+        }
+
+
+class _ImportadorInstrutor(_Importador):
+    modelo = Instrutor
+    chave = "_cref"
+    descricao_chave = "CREF"
+
+    def validar(self, registro):
+        return {
+            "_nome": Pessoa.validar_nome(registro.get("nome")),
+            "_idade": Pessoa.validar_idade(_inteiro(registro.get("idade"))),
+            "_cref": Instrutor.validar_cref(registro.get("cref")),
+        }
+
+
+class _ImportadorModalidade(_Importador):
+    modelo = Modalidade
+    chave = "nome"
+    descricao_chave = "nome de modalidade"
+
+    def validar(self, registro):
+        return {
+            "nome": Modalidade.validar_nome(registro.get("nome")),
+            "descricao": registro.get("descricao") or "",
+        }
+
+
+IMPORTADORES = {
+    "aluno": _ImportadorAluno(),
+    "instrutor": _ImportadorInstrutor(),
+    "modalidade": _ImportadorModalidade(),
+}
+
+
+class ImportacaoService:
+    @staticmethod
+    def importar(session, tipo, registros, tamanho_lote=TAMANHO_LOTE_PADRAO):
+        """Importa `registros` (iterável de (numero_linha, dict)) em lotes.
+
+        Cada lote é gravado em uma única transação. Linhas inválidas ou duplicadas
+        são rejeitadas individualmente sem interromper o restante da carga.
+        """
+        if tipo not in IMPORTADORES:
+            raise ValueError(f"Tipo de importação inválido: {tipo}")
+        if tamanho_lote <= 0:
+            raise ValueError("Tamanho do lote deve ser inteiro positivo.")
+        importador = IMPORTADORES[tipo]
+        relatorio = RelatorioImportacao()
+        vistos = set()  # chaves já aceitas neste arquivo
+        lote = []
+
+        for numero, registro in registros:
+            if isinstance(registro, Exception):
+                relatorio.rejeitar(numero, f"Linha mal formada: {registro}")
+                continue
+            try:
+                valores = importador.validar(registro)
+            except (ValueError, TypeError, AttributeError) as e:
+                relatorio.rejeitar(numero, str(e))
+                continue
+            if valores[importador.chave] in vistos:
+                relatorio.rejeitar(numero, f"{importador.descricao_chave} duplicada no arquivo")
+                continue
+            vistos.add(valores[importador.chave])
+            lote.append((numero, valores))
+            if len(lote) >= tamanho_lote:
+                ImportacaoService._gravar_lote(session, importador, lote, relatorio)
+                lote = []
+
+        if lote:
+            ImportacaoService._gravar_lote(session, importador, lote, relatorio)
+        return relatorio
+
+    @staticmethod
+    def _gravar_lote(session, importador, lote, relatorio):
+        # Remove do lote o que já existe no banco (uma consulta por lote)
+        existentes = importador.existentes(session, [v[importador.chave] for _, v in lote])
+        validos = []
+        for numero, valores in lote:
+            if valores[importador.chave] in existentes:
+                relatorio.rejeitar(numero, f"{importador.descricao_chave} já cadastrada: {valores[importador.chave]}")
+            else:
+                validos.append((numero, valores))
+        if not validos:
+            return
+
+        try:
+            session.execute(insert(importador.modelo), [valores for _, valores in validos])
+            session.commit()
+            relatorio.inseridos += len(validos)
+        except IntegrityError:
+            # Conflito concorrente: refaz o lote linha a linha para isolar as rejeições
+            session.rollback()
+            for numero, valores in validos:
+                try:
+                    session.execute(insert(importador.modelo), [valores])
+                    session.commit()
+                    relatorio.inseridos += 1
+                except IntegrityError as e:
+                    session.rollback()
+                    relatorio.rejeitar(numero, f"Erro de integridade: {e.orig}")
@@ -0,0 +1,288 @@
+"""Índice em memória das matrículas para consultas de conjunto entre modalidades.
+
+Cada modalidade tem um bitmap com os ids dos seus alunos (um int do Python: o
+bit N ligado = aluno N matriculado). Perguntas como "alunos de Musculação e
+Natação, mas não de Pilates" ou "alunos em 3 ou mais modalidades" viram
+operações AND/OR/NOT entre poucos inteiros, em vez de percorrer
+Aluno.matriculas de cada aluno; contar é contar bits.
+
+O índice é montado em uma passada por `matriculas` na primeira consulta e
+mantido pelos mesmos eventos de Session do cache (models/cache.py): matrículas
+criadas e canceladas por MatriculaService (e pelo ORM) são aplicadas no commit;
+comandos por conjunto que tocam matrículas, alunos ou modalidades (exclusão em
+lote, importação) marcam o índice para ser remontado na próxima consulta. Assim
+como o cache, reflete só dados confirmados, e gravações de outros processos só
+aparecem depois do TTL.
+"""
+
+import sys
+import threading
+import time
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session as SessaoOrm
+
+from models.aluno import Aluno
+from models.modalidade import Modalidade
+from models.matricula import Matricula
+from models.cache import CacheService
+
+TTL_PADRAO = 300  # segundos
+
+# bytes: memória ocupada pelos bitmaps (modalidades e alunos existentes)
+MemoriaIndice = namedtuple("MemoriaIndice", ["modalidades", "alunos", "matriculas", "bytes"])
+
+_CHAVE_PENDENTES = "indice_matriculas_pendentes"
+_RECONSTRUIR = ("reconstruir",)
+# Posições dos bits ligados de cada valor de byte, para converter bitmap -> ids
+_BITS_DO_BYTE = [tuple(bit for bit in range(8) if valor >> bit & 1) for valor in range(256)]
+
+
+def _marcar(bits, numero):
+    posicao = numero >> 3
+    if posicao >= len(bits):
+        bits.extend(bytes(posicao - len(bits) + 1))
+    bits[posicao] |= 1 << (numero & 7)
+
+
+def ids_do_bitmap(bitmap):
+    """Ids (em ordem crescente) dos bits ligados."""
+    dados = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    return [posicao * 8 + bit for posicao, valor in enumerate(dados) if valor for bit in _BITS_DO_BYTE[valor]]
+
+
+def contar_bitmap(bitmap):
+    return bin(bitmap).count("1")
+
+
+def com_pelo_menos(bitmaps, quantidade):
+    """Bitmap dos ids presentes em pelo menos `quantidade` dos bitmaps.
+
+    Contagem por limiar: acima[j] guarda quem já apareceu em j ou mais bitmaps,
+    então são len(bitmaps) * quantidade operações entre inteiros.
+    """
+    acima = [-1] + [0] * quantidade
+    for bitmap in bitmaps:
+        for j in range(quantidade, 0, -1):
+            acima[j] |= acima[j - 1] & bitmap
+    return acima[quantidade]
+
+
+def _carregar(conexao):
+    """(bitmap por modalidade_id, bitmap dos alunos) em uma passada por tabela."""
+    matriculas = Matricula.__table__
+    bits = {modalidade_id: bytearray() for modalidade_id in conexao.scalars(select(Modalidade.__table__.c.id))}
+    for modalidade_id, aluno_id in conexao.execute(select(matriculas.c.modalidade_id, matriculas.c.aluno_id)):
+        _marcar(bits.setdefault(modalidade_id, bytearray()), aluno_id)
+    alunos = bytearray()
+    for aluno_id in conexao.scalars(select(Aluno.__table__.c.id)):
+        _marcar(alunos, aluno_id)
+    return (
+        {modalidade_id: int.from_bytes(valor, "little") for modalidade_id, valor in bits.items()},
+        int.from_bytes(alunos, "little"),
+    )
+
+
+class IndiceMatriculas:
+    """Bitmaps das matrículas por modalidade, seguro para threads.
+
+    A `versao` muda a cada alteração aplicada: uma montagem que começou antes
+    dela não é guardada (pode não ter visto a alteração).
+    """
+
+    def __init__(self, ttl=TTL_PADRAO):
+        self.ttl = ttl
+        self.versao = 0
+        self._modalidades = {}
+        self._alunos = 0
+        self._montado_em = None
+        self._lock = threading.Lock()
+        self.montagens = 0
+
+    def bitmaps(self, session):
+        """(dict modalidade_id -> bitmap, bitmap dos alunos), montando o índice se preciso."""
+        with self._lock:
+            if self._montado_em is not None and time.monotonic() - self._montado_em < self.ttl:
+                return dict(self._modalidades), self._alunos
+            versao = self.versao
+        # Conexão própria: a transação da sessão pode estar aberta há tempo e ver dados antigos
+        with session.get_bind().connect() as conexao:
+            modalidades, alunos = _carregar(conexao)
+        with self._lock:
+            self.montagens += 1
+            if versao == self.versao:
+                self._modalidades, self._alunos = modalidades, alunos
+                self._montado_em = time.monotonic()
+        return dict(modalidades), alunos
+
+    def aplicar(self, alteracoes):
+        """Aplica as alterações anotadas por uma transação confirmada."""
+        with self._lock:
+            self.versao += 1
+            if self._montado_em is None:
+                return
+            if _RECONSTRUIR in alteracoes:
+                self._descartar()
+                return
+            modalidades = self._modalidades
+            for tipo, *ids in alteracoes:
+                if tipo == "matricula":
+                    aluno_id, modalidade_id = ids
+                    modalidades[modalidade_id] = modalidades.get(modalidade_id, 0) | 1 << aluno_id
+                elif tipo == "cancelamento":
+                    aluno_id, modalidade_id = ids
+                    modalidades[modalidade_id] = modalidades.get(modalidade_id, 0) & ~(1 << aluno_id)
+                elif tipo == "aluno":
+                    self._alunos |= 1 << ids[0]
+                elif tipo == "aluno_excluido":
+                    bit = ~(1 << ids[0])
+                    self._alunos &= bit
+                    for modalidade_id, bitmap in modalidades.items():
+                        modalidades[modalidade_id] = bitmap & bit
+                elif tipo == "modalidade":
+                    modalidades.setdefault(ids[0], 0)
+                elif tipo == "modalidade_excluida":
+                    modalidades.pop(ids[0], None)
+
+    def invalidar(self):
+        with self._lock:
+            self.versao += 1
+            self._descartar()
+
+    def _descartar(self):
+        self._montado_em = None
+        self._modalidades, self._alunos = {}, 0
+
+    def memoria(self):
+        """MemoriaIndice do índice montado (zeros se ainda não foi montado)."""
+        with self._lock:
+            bitmaps = list(self._modalidades.values())
+            alunos = self._alunos
+            tamanho = sys.getsizeof(self._modalidades) + sys.getsizeof(alunos)
+        tamanho += sum(sys.getsizeof(bitmap) for bitmap in bitmaps)
+        return MemoriaIndice(len(bitmaps), contar_bitmap(alunos), sum(map(contar_bitmap, bitmaps)), tamanho)
+
+
+indice_matriculas = IndiceMatriculas()
+
+
+def _ids_modalidades(session, modalidades):
+    """Ids das modalidades informadas por id ou por nome (sem diferenciar maiúsculas)."""
+    por_nome = None
+    ids = []
+    for modalidade in modalidades:
+        if isinstance(modalidade, str):
+            if por_nome is None:
+                por_nome = {nome.casefold(): modalidade_id for modalidade_id, nome, _ in CacheService.modalidades(session)}
+            modalidade_id = por_nome.get(modalidade.strip().casefold())
+            if modalidade_id is None:
+                raise ValueError(f"Modalidade '{modalidade}' não encontrada.")
+            ids.append(modalidade_id)
+        else:
+            ids.append(modalidade)
+    return ids
+
+
+class IndiceMatriculasService:
+    @staticmethod
+    def selecionar(session, todas=(), alguma=(), nenhuma=(), minimo_modalidades=None):
+        """Bitmap dos alunos matriculados em `todas`, em ao menos uma de `alguma` e em nenhuma de `nenhuma`.
+
+        As modalidades podem ser ids ou nomes. Com `minimo_modalidades`, só os
+        alunos matriculados em pelo menos essa quantidade de modalidades (de
+        qualquer uma). Critérios vazios não filtram: sem nenhum, são todos os alunos.
+        """
+        if minimo_modalidades is not None and minimo_modalidades < 0:
+            raise ValueError("Quantidade mínima de modalidades não pode ser negativa.")
+        todas, alguma, nenhuma = (_ids_modalidades(session, grupo) for grupo in (todas, alguma, nenhuma))
+        modalidades, bitmap = indice_matriculas.bitmaps(session)
+        for modalidade_id in todas:
+            bitmap &= modalidades.get(modalidade_id, 0)
+        if alguma:
+            bitmap &= reduce(or_, (modalidades.get(modalidade_id, 0) for modalidade_id in alguma))
+        for modalidade_id in nenhuma:
+            bitmap &= ~modalidades.get(modalidade_id, 0)
+        if minimo_modalidades:
+            bitmap &= com_pelo_menos(modalidades.values(), minimo_modalidades)
+        return bitmap
+
+    @staticmethod
+    def alunos(session, todas=(), alguma=(), nenhuma=(), minimo_modalidades=None):
+        """Ids dos alunos que atendem aos critérios (veja selecionar), em ordem crescente."""
+        return ids_do_bitmap(IndiceMatriculasService.selecionar(session, todas, alguma, nenhuma, minimo_modalidades))
+
+    @staticmethod
+    def contar(session, todas=(), alguma=(), nenhuma=(), minimo_modalidades=None):
+        return contar_bitmap(IndiceMatriculasService.selecionar(session, todas, alguma, nenhuma, minimo_modalidades))
+
+    @staticmethod
+    def memoria(session):
+        """MemoriaIndice com o tamanho do índice, montando-o se preciso."""
+        indice_matriculas.bitmaps(session)
+        return indice_matriculas.memoria()
+
+
+# --- Manutenção ligada às sessões ---
+
+def _pendentes(session):
+    return session.info.setdefault(_CHAVE_PENDENTES, [])
+
+
+def _ao_flush(session, _contexto):
+    pendentes = _pendentes(session)
+    for objeto in session.new:
+        if isinstance(objeto, Matricula):
+            pendentes.append(("matricula", objeto.aluno_id, objeto.modalidade_id))
+        elif isinstance(objeto, Aluno):
+            pendentes.append(("aluno", objeto.id))
+        elif isinstance(objeto, Modalidade):
+            pendentes.append(("modalidade", objeto.id))
+    for objeto in session.deleted:
+        if isinstance(objeto, Matricula):
+            pendentes.append(("cancelamento", objeto.aluno_id, objeto.modalidade_id))
+        elif isinstance(objeto, Aluno):
+            pendentes.append(("aluno_excluido", objeto.id))
+        elif isinstance(objeto, Modalidade):
+            pendentes.append(("modalidade_excluida", objeto.id))
+    if any(isinstance(objeto, Matricula) for objeto in session.dirty):
+        # Matrícula trocada de aluno ou modalidade: os valores antigos já não estão no objeto
+        pendentes.append(_RECONSTRUIR)
+
+
+def _ao_executar(estado):
+    if not (estado.is_insert or estado.is_update or estado.is_delete):
+        return
+    matricula = estado.execution_options.get("indice_matricula")
+    if matricula is not None:
+        # Comandos de MatriculaService: o bitmap é um conjunto, então repetir ou
+        # desfazer algo que não existia não tem efeito
+        pendentes = _pendentes(estado.session)
+        pendentes.append(("matricula" if estado.is_insert else "cancelamento", *matricula))
+        return
+    tabelas = {tabela.name for mapper in estado.all_mappers for tabela in mapper.tables}
+    tabela = getattr(estado.statement, "table", None)
+    if getattr(tabela, "name", None):
+        tabelas.add(tabela.name)
+    # UPDATE de alunos e modalidades (ex.: contadores) não muda quem está matriculado onde
+    if "matriculas" in tabelas or (not estado.is_update and tabelas & {"alunos", "modalidades"}):
+        _pendentes(estado.session).append(_RECONSTRUIR)
+
+
+def _ao_confirmar(session):
+    alteracoes = session.info.pop(_CHAVE_PENDENTES, None)
+    if alteracoes:
+        indice_matriculas.aplicar(alteracoes)
+
+
+def _ao_desfazer(session):
+    session.info.pop(_CHAVE_PENDENTES, None)
+
+
+if not event.contains(SessaoOrm, "after_commit", _ao_confirmar):
+    event.listen(SessaoOrm, "after_flush", _ao_flush)
+    event.listen(SessaoOrm, "do_orm_execute", _ao_executar)
+    event.listen(SessaoOrm, "after_commit", _ao_confirmar)
+    event.listen(SessaoOrm, "after_rollback", _ao_desfazer)
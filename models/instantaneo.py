@@ -0,0 +1,164 @@
+"""Instantâneo em memória do academia.db para relatórios e listagens pesadas.
+
+Instantaneo copia o banco para um SQLite em memória com a API de backup online
+do SQLite e abre sessões somente leitura sobre a cópia. Os relatórios passam a
+disputar o lock da cópia, não o do arquivo: um GROUP BY sobre todas as
+matrículas não segura as gravações do balcão, e a cópia não sofre com o
+checkpoint do WAL.
+
+A cópia é atualizada sob demanda (atualizar) ou de tempos em tempos por uma
+thread (iniciar); os dados lidos têm no máximo esse atraso. Cada atualização
+monta uma cópia nova e só então troca as sessões para ela, então as leituras em
+andamento terminam na cópia anterior, que é mantida até a atualização seguinte.
+No WAL a cópia é uma transação de leitura no arquivo, que não bloqueia
+escritores. Ocupa em memória aproximadamente duas vezes o tamanho do banco.
+"""
+
+import datetime
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+# Marca em Session.info das sessões abertas sobre um instantâneo (veja models/cache.py)
+CHAVE_INSTANTANEO = "instantaneo"
+
+CONEXOES_POR_COPIA = 8
+
+logger = logging.getLogger("academia.instantaneo")
+
+# atualizado_em: datetime da cópia; duracao: segundos gastos copiando
+ResumoAtualizacao = namedtuple("ResumoAtualizacao", ["atualizado_em", "duracao", "paginas"])
+
+_geracoes = itertools.count(1)
+
+
+def _somente_leitura(conexao_dbapi, _registro):
+    conexao_dbapi.execute("PRAGMA query_only=ON")
+
+
+class _Copia:
+    """Um banco em memória compartilhado (cache=shared) e o engine que o lê.
+
+    A conexão `guardia` mantém o banco vivo: um banco em memória some quando a
+    última conexão com ele é fechada. Depois de `fechar`, conectar à mesma URI
+    criaria um banco novo e vazio; por isso novas conexões passam a falhar, e
+    só as já abertas (transações em andamento) terminam de ler a cópia.
+    """
+
+    def __init__(self):
+        self.uri = f"file:instantaneo_{next(_geracoes)}?mode=memory&cache=shared"
+        self.fechada = False
+        self.guardia = self._conectar()
+        self.engine = create_engine(
+            "sqlite://", creator=self._conectar, poolclass=QueuePool,
+            pool_size=CONEXOES_POR_COPIA, max_overflow=CONEXOES_POR_COPIA,
+        )
+        event.listen(self.engine, "connect", _somente_leitura)
+
+    def _conectar(self):
+        if self.fechada:
+            raise RuntimeError("Cópia do instantâneo já descartada; abra uma nova sessão com Instantaneo.sessao().")
+        return sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+    def fechar(self):
+        self.fechada = True
+        self.engine.dispose()
+        self.guardia.close()
+
+
+class Instantaneo:
+    """Cópia em memória de um banco SQLite, com sessões somente leitura sobre ela.
+
+    Uso:
+        instantaneo = Instantaneo()           # copia o academia.db agora
+        instantaneo.iniciar(60)               # e de novo a cada minuto, em segundo plano
+        with instantaneo.sessao() as session:
+            RelatorioService.matriculas_por_faixa_etaria(session)
+    """
+
+    def __init__(self, engine_origem=None):
+        if engine_origem is None:
+            from models.base import engine as engine_origem
+        if engine_origem.url.get_backend_name() != "sqlite":
+            raise ValueError("Instantâneo em memória só é suportado para bancos SQLite.")
+        self.engine_origem = engine_origem
+        self.atualizado_em = None
+        self._fabrica = sessionmaker(info={CHAVE_INSTANTANEO: True})
+        self._atual = self._anterior = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self.atualizar()
+
+    def atualizar(self):
+        """Copia o banco de origem para uma cópia nova e passa as sessões novas para ela. Retorna ResumoAtualizacao."""
+        with self._lock:
+            inicio = time.perf_counter()
+            copia = _Copia()
+            try:
+                with self.engine_origem.connect() as conexao:
+                    # Um passo só (pages=-1): uma única transação de leitura, sem recomeçar
+                    # a cópia quando outra conexão grava no arquivo
+                    conexao.connection.driver_connection.backup(copia.guardia)
+                paginas = copia.guardia.execute("PRAGMA page_count").fetchone()[0]
+            except Exception:
+                copia.fechar()
+                raise
+            if self._anterior is not None:
+                self._anterior.fechar()
+            self._anterior, self._atual = self._atual, copia
+            self.atualizado_em = datetime.datetime.now()
+            resumo = ResumoAtualizacao(self.atualizado_em, time.perf_counter() - inicio, paginas)
+        logger.info("Instantâneo atualizado: %d páginas em %.3fs", paginas, resumo.duracao)
+        return resumo
+
+    def idade(self):
+        """Segundos desde a última atualização."""
+        return (datetime.datetime.now() - self.atualizado_em).total_seconds()
+
+    def sessao(self):
+        """Nova Session somente leitura sobre a cópia mais recente (use com `with` ou feche ao final).
+
+        A cópia vale até a segunda atualização seguinte: uma sessão mantida além
+        disso levanta RuntimeError ao abrir uma nova conexão, em vez de ler um banco vazio.
+        """
+        return self._fabrica(bind=self._atual.engine)
+
+    def iniciar(self, intervalo):
+        """Atualiza a cópia a cada `intervalo` segundos, em uma thread em segundo plano."""
+        if intervalo <= 0:
+            raise ValueError("Intervalo de atualização deve ser positivo.")
+        if self._thread is not None:
+            raise ValueError("Atualização periódica já iniciada.")
+        self._parar.clear()
+        self._thread = threading.Thread(
+            target=self._atualizar_periodicamente, args=(intervalo,), name="academia-instantaneo", daemon=True
+        )
+        self._thread.start()
+
+    def _atualizar_periodicamente(self, intervalo):
+        while not self._parar.wait(intervalo):
+            try:
+                self.atualizar()
+            except Exception:
+                # Banco ocupado ou indisponível: os relatórios seguem na cópia anterior
+                logger.exception("Falha ao atualizar o instantâneo")
+
+    def fechar(self):
+        """Para a atualização periódica e libera as cópias."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            for copia in (self._anterior, self._atual):
+                if copia is not None:
+                    copia.fechar()
+            self._anterior = self._atual = None
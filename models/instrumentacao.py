@@ -0,0 +1,260 @@
+"""Instrumentação opcional das consultas: quantidade, tempo, linhas e cargas preguiçosas.
+
+Ligada com `instrumentacao = sim` na seção [banco] do academia.ini ou com
+ACADEMIA_DB_INSTRUMENTACAO=sim; desligada, nenhum listener é registrado. As
+métricas ficam no registro `metricas`, agrupadas pela operação em andamento:
+
+    with operacao("relatório mensal"):
+        RelatorioService.matriculas_por_faixa_etaria(session)
+    metricas.exibir()
+
+Se uma mesma execução de operação disparar várias cargas preguiçosas do mesmo
+relacionamento (por exemplo `m.modalidade` para cada matrícula em
+Aluno.exibir_detalhes) é emitido um AvisoNMais1 sugerindo joinedload/selectinload.
+"""
+
+import contextvars
+import functools
+import itertools
+import threading
+import time
+import warnings
+from collections import Counter
+from contextlib import contextmanager
+
+SEM_OPERACAO = "(sem operação)"
+
+# Cargas preguiçosas do mesmo relacionamento, numa execução, a partir das quais há suspeita de N+1
+LIMIAR_N_MAIS_1 = 5
+
+_CHAVE_EXECUCAO_SESSAO = "instrumentacao_execucao"
+_CHAVE_INICIOS_CONEXAO = "instrumentacao_inicios"
+
+
+class AvisoNMais1(UserWarning):
+    """Várias cargas preguiçosas do mesmo relacionamento dentro de uma operação."""
+
+
+class EstatisticaOperacao:
+    """Totais acumulados de uma operação (todas as suas execuções)."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.execucoes = 0
+        self.consultas = 0
+        self.tempo_total_ms = 0.0
+        self.tempo_maximo_ms = 0.0
+        self.linhas = 0
+        self.cargas_preguicosas = Counter()  # "Classe.relacionamento" -> quantidade
+        self.suspeitas_n_mais_1 = 0
+
+    @property
+    def tempo_medio_ms(self):
+        return self.tempo_total_ms / self.consultas if self.consultas else 0.0
+
+    def como_dict(self):
+        return {
+            "operacao": self.nome,
+            "execucoes": self.execucoes,
+            "consultas": self.consultas,
+            "tempo_total_ms": self.tempo_total_ms,
+            "tempo_medio_ms": self.tempo_medio_ms,
+            "tempo_maximo_ms": self.tempo_maximo_ms,
+            "linhas": self.linhas,
+            "cargas_preguicosas": dict(self.cargas_preguicosas),
+            "suspeitas_n_mais_1": self.suspeitas_n_mais_1,
+        }
+
+
+class RegistroMetricas:
+    """Registro em memória das métricas por operação, seguro para várias threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operacoes = {}
+
+    def _estatistica(self, nome):
+        estatistica = self._operacoes.get(nome)
+        if estatistica is None:
+            estatistica = self._operacoes[nome] = EstatisticaOperacao(nome)
+        return estatistica
+
+    def registrar_execucao(self, nome):
+        with self._lock:
+            self._estatistica(nome).execucoes += 1
+
+    def registrar_consulta(self, nome, duracao_ms):
+        with self._lock:
+            estatistica = self._estatistica(nome)
+            estatistica.consultas += 1
+            estatistica.tempo_total_ms += duracao_ms
+            estatistica.tempo_maximo_ms = max(estatistica.tempo_maximo_ms, duracao_ms)
+
+    def registrar_linhas(self, nome, quantidade):
+        with self._lock:
+            self._estatistica(nome).linhas += quantidade
+
+    def registrar_carga_preguicosa(self, nome, relacionamento):
+        with self._lock:
+            self._estatistica(nome).cargas_preguicosas[relacionamento] += 1
+
+    def registrar_n_mais_1(self, nome):
+        with self._lock:
+            self._estatistica(nome).suspeitas_n_mais_1 += 1
+
+    def operacoes(self):
+        """Retorna uma cópia das métricas (lista de dicionários), da operação mais lenta à mais rápida."""
+        with self._lock:
+            copias = [estatistica.como_dict() for estatistica in self._operacoes.values()]
+        return sorted(copias, key=lambda m: m["tempo_total_ms"], reverse=True)
+
+    def limpar(self):
+        with self._lock:
+            self._operacoes.clear()
+
+    def exibir(self):
+        print(f"{'Operação':<40} {'Execuções':>9} {'SQL':>6} {'Total ms':>9} {'Máx ms':>8} {'Linhas':>7} {'Lazy':>5}")
+        for m in self.operacoes():
+            print(f"{m['operacao']:<40} {m['execucoes']:>9} {m['consultas']:>6} {m['tempo_total_ms']:>9.1f} "
+                  f"{m['tempo_maximo_ms']:>8.2f} {m['linhas']:>7} {sum(m['cargas_preguicosas'].values()):>5}")
+
+
+# Registro global usado pelos listeners
+metricas = RegistroMetricas()
+
+
+class _Execucao:
+    """Uma execução de operação; conta as cargas preguiçosas para detectar N+1."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.cargas = Counter()
+        self.avisados = set()
+
+
+_execucao_atual = contextvars.ContextVar("instrumentacao_execucao_atual", default=None)
+_limiar_n_mais_1 = LIMIAR_N_MAIS_1
+_ativa = False
+
+
+def instrumentacao_ativa():
+    return _ativa
+
+
+@contextmanager
+def operacao(nome):
+    """Atribui a `nome` as consultas feitas dentro do bloco (também serve como decorador)."""
+    execucao = _Execucao(nome)
+    token = _execucao_atual.set(execucao)
+    if _ativa:
+        metricas.registrar_execucao(nome)
+    try:
+        yield execucao
+    finally:
+        _execucao_atual.reset(token)
+
+
+def medida(funcao):
+    """Decorador: cada chamada de `funcao` é uma operação com o nome da função."""
+    @functools.wraps(funcao)
+    def envoltorio(*args, **kwargs):
+        with operacao(funcao.__qualname__):
+            return funcao(*args, **kwargs)
+    return envoltorio
+
+
+def _nome_operacao_atual():
+    execucao = _execucao_atual.get()
+    return execucao.nome if execucao is not None else SEM_OPERACAO
+
+
+def _antes_de_executar(conexao, _cursor, _sql, _parametros, _contexto, _executemany):
+    conexao.info.setdefault(_CHAVE_INICIOS_CONEXAO, []).append(time.perf_counter())
+
+
+def _depois_de_executar(conexao, _cursor, _sql, _parametros, _contexto, _executemany):
+    inicio = conexao.info[_CHAVE_INICIOS_CONEXAO].pop()
+    metricas.registrar_consulta(_nome_operacao_atual(), (time.perf_counter() - inicio) * 1000)
+
+
+def _ao_falhar(contexto):
+    # Comando com erro não passa por after_cursor_execute
+    if contexto.connection is not None and contexto.cursor is not None:
+        inicios = contexto.connection.info.get(_CHAVE_INICIOS_CONEXAO)
+        if inicios:
+            inicios.pop()
+
+
+def _execucao_da_sessao(session):
+    # Fora de `operacao(...)` as cargas são agrupadas por transação da sessão
+    execucao = _execucao_atual.get()
+    if execucao is None:
+        execucao = session.info.get(_CHAVE_EXECUCAO_SESSAO)
+        if execucao is None:
+            execucao = session.info[_CHAVE_EXECUCAO_SESSAO] = _Execucao(SEM_OPERACAO)
+    return execucao
+
+
+def _registrar_carga_preguicosa(estado):
+    relacionamento = str(estado.loader_strategy_path.prop)
+    execucao = _execucao_da_sessao(estado.session)
+    metricas.registrar_carga_preguicosa(execucao.nome, relacionamento)
+    execucao.cargas[relacionamento] += 1
+    if execucao.cargas[relacionamento] >= _limiar_n_mais_1 and relacionamento not in execucao.avisados:
+        execucao.avisados.add(relacionamento)
+        metricas.registrar_n_mais_1(execucao.nome)
+        warnings.warn(
+            f"Possível N+1 em '{execucao.nome}': {execucao.cargas[relacionamento]} cargas preguiçosas "
+            f"de {relacionamento}. Considere joinedload/selectinload.",
+            AvisoNMais1,
+        )
+
+
+def _ao_executar_orm(estado):
+    # SQL textual (text()) e DML não têm load_options: só SELECTs entram na contagem de cargas e linhas
+    if not estado.is_select:
+        return None
+    if estado.lazy_loaded_from is not None:
+        _registrar_carga_preguicosa(estado)
+    opcoes = estado.execution_options
+    if opcoes.get("yield_per") or opcoes.get("stream_results"):
+        return None
+    from sqlalchemy.engine import ChunkedIteratorResult
+
+    resultado = estado.invoke_statement()
+    if isinstance(resultado, ChunkedIteratorResult):
+        # Resultado do ORM: conta cada bloco lido do cursor (sem yield_per, um só) quando
+        # ele é consumido, sem copiar as linhas; select() de tabelas Core não entra na contagem
+        blocos = _contar_blocos(resultado.chunks(None), _nome_operacao_atual())
+        resultado.iterator = itertools.chain.from_iterable(blocos)
+    return resultado
+
+
+def _contar_blocos(blocos, nome):
+    for bloco in blocos:
+        metricas.registrar_linhas(nome, len(bloco))
+        yield bloco
+
+
+def _fim_de_transacao(session, *_args):
+    session.info.pop(_CHAVE_EXECUCAO_SESSAO, None)
+
+
+def instrumentar(fabrica_sessao, engine=None, limiar_n_mais_1=LIMIAR_N_MAIS_1):
+    """Registra os listeners no engine e na fábrica de sessões (sessionmaker)."""
+    global _ativa, _limiar_n_mais_1
+    # Importado aqui: operacao/medida/metricas não dependem do SQLAlchemy e o main.py
+    # os usa antes de carregá-lo
+    from sqlalchemy import event
+
+    engine = engine if engine is not None else fabrica_sessao.kw["bind"]
+    _limiar_n_mais_1 = limiar_n_mais_1
+    if not event.contains(engine, "before_cursor_execute", _antes_de_executar):
+        event.listen(engine, "before_cursor_execute", _antes_de_executar)
+        event.listen(engine, "after_cursor_execute", _depois_de_executar)
+        event.listen(engine, "handle_error", _ao_falhar)
+    if not event.contains(fabrica_sessao, "do_orm_execute", _ao_executar_orm):
+        event.listen(fabrica_sessao, "do_orm_execute", _ao_executar_orm)
+        event.listen(fabrica_sessao, "after_commit", _fim_de_transacao)
+        event.listen(fabrica_sessao, "after_rollback", _fim_de_transacao)
+    _ativa = True
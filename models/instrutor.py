@@ -1,11 +1,13 @@
 from sqlalchemy import Column, Integer, ForeignKey, String
 from models.pessoa import Pessoa
+from models.resultados import DadosInstrutor
 
 class Instrutor(Pessoa):
     __tablename__ = "instrutores"
 
-    id = Column(Integer, ForeignKey("pessoas.id"), primary_key=True)
+    id = Column(Integer, ForeignKey("pessoas.id", ondelete="CASCADE"), primary_key=True)
     _cref = Column("cref", String, unique=True)
+    especializacao = Column(String(100))
 
     __mapper_args__ = {
         "polymorphic_identity": "instrutor",
@@ -21,9 +23,13 @@ class Instrutor(Pessoa):
 
     @cref.setter
     def cref(self, valor):
+        self._cref = Instrutor.validar_cref(valor)
+
+    @staticmethod
+    def validar_cref(valor):
         if not valor or len(valor.strip()) < 5:
             raise ValueError("CREF inválido, deve ter ao menos 5 caracteres.")
-        self._cref = valor.strip()
+        return valor.strip()
 
-    def exibir_detalhes(self):
-        print(f"Instrutor: {self.nome}, Idade: {self.idade}, CREF: {self.cref}")
+    def dados(self):
+        return DadosInstrutor(self.id, self.nome, self.idade, self.cref)
@@ -0,0 +1,133 @@
+"""Planejamento da manutenção dos equipamentos do ginásio.
+
+Cada tipo de equipamento tem um intervalo entre manutenções
+(Equipamento.DIAS_ENTRE_MANUTENCOES) e cada equipamento guarda o vencimento da
+próxima em `proxima_manutencao`, coluna indexada e recalculada a cada
+registar_manutencao. "O que vence esta semana" vira uma leitura de faixa no
+índice, já na ordem do vencimento, sem percorrer os equipamentos.
+
+A fila de trabalho dos técnicos (FilaManutencao) é um heap pelo vencimento: o
+mais atrasado sai primeiro, e itens devolvidos ou acrescentados durante o dia
+entram na posição certa em O(log n). Equipamentos nunca revisados vencem na data
+do cadastro.
+"""
+
+import datetime
+import heapq
+import threading
+from collections import namedtuple
+
+from sqlalchemy import select, update, case, func
+
+from models.models import Equipamento
+from models.transacao import confirmar
+from models.exclusao import em_blocos
+
+# dias_atraso: dias desde o vencimento (negativo se ainda não venceu)
+ItemManutencao = namedtuple(
+    "ItemManutencao", ["id", "nome", "tipo", "data_ultima_manutencao", "proxima_manutencao", "dias_atraso"]
+)
+
+
+def _prioridade(item):
+    # Vencimento mais antigo primeiro; o id desempata (e evita comparar os itens)
+    return (item.proxima_manutencao, item.id)
+
+
+class FilaManutencao:
+    """Fila de trabalho dos técnicos, do equipamento mais atrasado para o menos; segura para threads."""
+
+    def __init__(self, itens=()):
+        self._heap = [(_prioridade(item), item) for item in itens]
+        heapq.heapify(self._heap)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def adicionar(self, item):
+        """Acrescenta (ou devolve à fila) um ItemManutencao."""
+        with self._lock:
+            heapq.heappush(self._heap, (_prioridade(item), item))
+
+    def proximo(self):
+        """Retira o item mais atrasado, ou None se a fila estiver vazia."""
+        with self._lock:
+            return heapq.heappop(self._heap)[1] if self._heap else None
+
+    def proximos(self, quantidade):
+        """Retira até `quantidade` itens, do mais atrasado para o menos (o lote de um técnico)."""
+        with self._lock:
+            return [heapq.heappop(self._heap)[1] for _ in range(min(quantidade, len(self._heap)))]
+
+    def espiar(self, quantidade=1):
+        """Os próximos itens, sem retirá-los."""
+        with self._lock:
+            return [item for _prioridade_item, item in heapq.nsmallest(quantidade, self._heap)]
+
+
+class ManutencaoService:
+    @staticmethod
+    def pendentes(session, ate=None, limite=None):
+        """ItemManutencao dos equipamentos com manutenção vencida até `ate` (hoje, por padrão), mais atrasados primeiro."""
+        ate = ate or datetime.date.today()
+        proxima = Equipamento.proxima_manutencao
+        consulta = (
+            select(Equipamento.id, Equipamento.nome, Equipamento.tipo, Equipamento.data_ultima_manutencao, proxima)
+            .where(proxima <= ate)
+            .order_by(proxima, Equipamento.id)
+        )
+        if limite is not None:
+            consulta = consulta.limit(limite)
+        hoje = datetime.date.today()
+        return [ItemManutencao(*linha, (hoje - linha.proxima_manutencao).days) for linha in session.execute(consulta)]
+
+    @staticmethod
+    def fila(session, ate=None):
+        """FilaManutencao com tudo o que vence até `ate` (por padrão, os próximos 7 dias)."""
+        ate = ate or datetime.date.today() + datetime.timedelta(days=7)
+        return FilaManutencao(ManutencaoService.pendentes(session, ate))
+
+    @staticmethod
+    def registrar_em_lote(session, equipamento_ids, data=None):
+        """Registra a manutenção de vários equipamentos em uma transação. Retorna quantos foram atualizados.
+
+        A próxima manutenção de cada um é recalculada pelo intervalo do seu tipo
+        no mesmo UPDATE; ids inexistentes são ignorados.
+        """
+        data = data or datetime.date.today()
+        if data > datetime.date.today():
+            raise ValueError("A data da manutenção não pode estar no futuro.")
+        proxima = case(
+            {tipo: data + datetime.timedelta(days=dias) for tipo, dias in Equipamento.DIAS_ENTRE_MANUTENCOES.items()},
+            value=Equipamento.tipo,
+            else_=data + datetime.timedelta(days=Equipamento.DIAS_ENTRE_MANUTENCOES_PADRAO),
+        )
+        atualizados = 0
+        for bloco in em_blocos(sorted(set(equipamento_ids))):
+            atualizados += session.execute(
+                update(Equipamento)
+                .where(Equipamento.id.in_(bloco))
+                .values(data_ultima_manutencao=data, proxima_manutencao=proxima)
+            ).rowcount
+        confirmar(session)
+        return atualizados
+
+    @staticmethod
+    def recalcular_proximas(session):
+        """Recalcula todas as próximas manutenções, depois de mudar Equipamento.DIAS_ENTRE_MANUTENCOES."""
+        def mais_dias(dias):
+            # Nunca revisados mantêm o vencimento que já tinham
+            return func.coalesce(func.date(Equipamento.data_ultima_manutencao, f"+{dias} days"),
+                                 Equipamento.proxima_manutencao)
+
+        atualizados = session.execute(
+            update(Equipamento)
+            .values(proxima_manutencao=case(
+                {tipo: mais_dias(dias) for tipo, dias in Equipamento.DIAS_ENTRE_MANUTENCOES.items()},
+                value=Equipamento.tipo,
+                else_=mais_dias(Equipamento.DIAS_ENTRE_MANUTENCOES_PADRAO),
+            ))
+        ).rowcount
+        confirmar(session)
+        return atualizados
@@ -1,22 +1,34 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from models.base import Base
+from models.resultados import DadosMatricula, formatar
 
 class Matricula(Base):
     __tablename__ = "matriculas"
 
     id = Column(Integer, primary_key=True)
-    aluno_id = Column(Integer, ForeignKey("alunos.id"), nullable=False)
-    modalidade_id = Column(Integer, ForeignKey("modalidades.id"), nullable=False)
+    # ON DELETE CASCADE: apagar o aluno ou a modalidade remove as matrículas no próprio banco
+    aluno_id = Column(Integer, ForeignKey("alunos.id", ondelete="CASCADE"), nullable=False)
+    modalidade_id = Column(Integer, ForeignKey("modalidades.id", ondelete="CASCADE"), nullable=False)
 
     aluno = relationship("Aluno", back_populates="matriculas")
     modalidade = relationship("Modalidade", back_populates="matriculas")
 
+    __table_args__ = (
+        # Um aluno só pode ter uma matrícula por modalidade; o índice também atende buscas por aluno_id
+        Index("uq_matriculas_aluno_modalidade", "aluno_id", "modalidade_id", unique=True),
+        Index("ix_matriculas_modalidade_id", "modalidade_id"),
+        {"sqlite_autoincrement": True},
+    )
+
     def __init__(self, aluno, modalidade):
         if aluno is None or modalidade is None:
             raise ValueError("Aluno e Modalidade não podem ser None")
         self.aluno = aluno
         self.modalidade = modalidade
 
+    def dados(self):
+        return DadosMatricula(self.aluno.id, self.aluno.nome, self.modalidade.id, self.modalidade.nome)
+
     def exibir_detalhes(self):
-        print(f"Aluno: {self.aluno.nome} matriculado em: {self.modalidade.nome}")
+        print(formatar(self.dados()))
@@ -0,0 +1,407 @@
+"""Migrações versionadas para bancos academia.db e ginásio.db já existentes.
+
+`Base.metadata.create_all` só cria tabelas que ainda não existem; ele não adiciona
+índices nem restrições a tabelas antigas. Cada migração abaixo é idempotente e a
+versão aplicada fica registrada em `PRAGMA user_version`.
+
+MIGRACOES evolui o academia.db; a partir da v5 ele também contém as tabelas do
+ginásio (models/models.py), e models/unificacao.py copia os dados de um
+ginásio.db para dentro dele. MIGRACOES_GINASIO evolui um ginásio.db separado.
+
+Sempre que possível as migrações só acrescentam (ADD COLUMN, CREATE INDEX IF NOT
+EXISTS): no SQLite o ADD COLUMN altera apenas o esquema, sem reescrever a tabela,
+e com WAL os leitores continuam atendidos durante a migração. Recriar tabela
+(_recriar_tabela) fica reservado para o que o ALTER não faz, como chaves estrangeiras.
+"""
+
+import datetime
+
+from sqlalchemy import text
+
+
+def _v1_indices_matriculas_e_pessoas(conexao):
+    # Remove matrículas duplicadas (mantém a mais antiga) antes de criar o índice único
+    conexao.execute(text(
+        "DELETE FROM matriculas WHERE id NOT IN ("
+        " SELECT MIN(id) FROM matriculas GROUP BY aluno_id, modalidade_id)"
+    ))
+    conexao.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_matriculas_aluno_modalidade"
+        " ON matriculas (aluno_id, modalidade_id)"
+    ))
+    conexao.execute(text("CREATE INDEX IF NOT EXISTS ix_matriculas_modalidade_id ON matriculas (modalidade_id)"))
+    conexao.execute(text("CREATE INDEX IF NOT EXISTS ix_pessoas_nome ON pessoas (nome)"))
+    conexao.execute(text("CREATE INDEX IF NOT EXISTS ix_pessoas_tipo ON pessoas (tipo)"))
+
+
+def _v2_busca_textual_pessoas(conexao):
+    # Índice FTS5 externo (content=pessoas): guarda só o índice invertido dos nomes.
+    # remove_diacritics 2 faz "Joao" encontrar "João"; prefix acelera buscas por início de palavra
+    conexao.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS pessoas_fts USING fts5("
+        " nome, content='pessoas', content_rowid='id',"
+        " tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    # Gatilhos mantêm o índice em dia com qualquer escrita em pessoas (ORM, importação ou SQL direto)
+    conexao.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS pessoas_fts_ai AFTER INSERT ON pessoas BEGIN"
+        " INSERT INTO pessoas_fts(rowid, nome) VALUES (new.id, new.nome);"
+        " END"
+    ))
+    conexao.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS pessoas_fts_ad AFTER DELETE ON pessoas BEGIN"
+        " INSERT INTO pessoas_fts(pessoas_fts, rowid, nome) VALUES ('delete', old.id, old.nome);"
+        " END"
+    ))
+    conexao.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS pessoas_fts_au AFTER UPDATE OF nome ON pessoas BEGIN"
+        " INSERT INTO pessoas_fts(pessoas_fts, rowid, nome) VALUES ('delete', old.id, old.nome);"
+        " INSERT INTO pessoas_fts(rowid, nome) VALUES (new.id, new.nome);"
+        " END"
+    ))
+    # Indexa as pessoas já cadastradas
+    conexao.execute(text("INSERT INTO pessoas_fts(pessoas_fts) VALUES ('rebuild')"))
+
+
+def colunas_da_tabela(conexao, tabela):
+    return {linha[1] for linha in conexao.execute(text(f"PRAGMA table_info({tabela})"))}
+
+
+def adicionar_coluna(conexao, tabela, coluna, definicao):
+    """ALTER TABLE ... ADD COLUMN, se a coluna ainda não existir (não reescreve a tabela)."""
+    if coluna not in colunas_da_tabela(conexao, tabela):
+        conexao.execute(text(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}"))
+
+
+def _recriar_tabela(conexao, tabela, definicao, colunas, indices=()):
+    """Recria `tabela` com nova definição (SQLite não altera chaves estrangeiras com ALTER)."""
+    conexao.execute(text(f"CREATE TABLE {tabela}_nova ({definicao})"))
+    conexao.execute(text(f"INSERT INTO {tabela}_nova ({colunas}) SELECT {colunas} FROM {tabela}"))
+    conexao.execute(text(f"DROP TABLE {tabela}"))
+    conexao.execute(text(f"ALTER TABLE {tabela}_nova RENAME TO {tabela}"))
+    for indice in indices:
+        conexao.execute(text(indice))
+
+
+def _v3_exclusao_em_cascata(conexao):
+    # Remove matrículas órfãs (sem aluno ou modalidade, inclusive as anuladas pelo ORM
+    # em exclusões antigas), que violariam as chaves estrangeiras e o NOT NULL
+    conexao.execute(text(
+        "DELETE FROM matriculas WHERE aluno_id IS NULL OR aluno_id NOT IN (SELECT id FROM alunos)"
+        " OR modalidade_id IS NULL OR modalidade_id NOT IN (SELECT id FROM modalidades)"
+    ))
+    _recriar_tabela(
+        conexao, "alunos",
+        "id INTEGER NOT NULL, matricula INTEGER, PRIMARY KEY (id), UNIQUE (matricula),"
+        " FOREIGN KEY(id) REFERENCES pessoas (id) ON DELETE CASCADE",
+        "id, matricula",
+    )
+    _recriar_tabela(
+        conexao, "instrutores",
+        "id INTEGER NOT NULL, cref VARCHAR, PRIMARY KEY (id), UNIQUE (cref),"
+        " FOREIGN KEY(id) REFERENCES pessoas (id) ON DELETE CASCADE",
+        "id, cref",
+    )
+    _recriar_tabela(
+        conexao, "matriculas",
+        "id INTEGER NOT NULL, aluno_id INTEGER NOT NULL, modalidade_id INTEGER NOT NULL, PRIMARY KEY (id),"
+        " FOREIGN KEY(aluno_id) REFERENCES alunos (id) ON DELETE CASCADE,"
+        " FOREIGN KEY(modalidade_id) REFERENCES modalidades (id) ON DELETE CASCADE",
+        "id, aluno_id, modalidade_id",
+        indices=(
+            "CREATE UNIQUE INDEX uq_matriculas_aluno_modalidade ON matriculas (aluno_id, modalidade_id)",
+            "CREATE INDEX ix_matriculas_modalidade_id ON matriculas (modalidade_id)",
+        ),
+    )
+
+
+# Migrações que recriam tabelas precisam das chaves estrangeiras desligadas durante a cópia
+_v3_exclusao_em_cascata.desliga_chaves_estrangeiras = True
+
+
+def _v4_presencas_somente_insercao(conexao):
+    # O log de check-ins é só de inserção: correções entram como novos eventos e os
+    # agregados (presencas_por_hora/dia) continuam batendo com o log
+    for operacao in ("UPDATE", "DELETE"):
+        conexao.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS presencas_bloqueia_{operacao.lower()} BEFORE {operacao} ON presencas"
+            " BEGIN SELECT RAISE(ABORT, 'presencas aceita apenas inserções'); END"
+        ))
+
+
+def _v5_esquema_ginasio(conexao):
+    # Colunas do ginásio nas tabelas compartilhadas (pessoas e instrutores)
+    adicionar_coluna(conexao, "pessoas", "contacto", "VARCHAR(100)")
+    adicionar_coluna(conexao, "instrutores", "especializacao", "VARCHAR(100)")
+    # Tabelas só do ginásio, com as mesmas colunas de models/models.py; as exclusões
+    # feitas pelo banco (ON DELETE) seguem a regra da v3
+    conexao.execute(text(
+        "CREATE TABLE IF NOT EXISTS membros ("
+        " id INTEGER NOT NULL, data_adesao DATE, tipo_subscricao VARCHAR(50), estado_pagamento VARCHAR(20),"
+        " PRIMARY KEY (id), FOREIGN KEY(id) REFERENCES pessoas (id) ON DELETE CASCADE)"
+    ))
+    conexao.execute(text(
+        "CREATE TABLE IF NOT EXISTS aulas ("
+        " id INTEGER NOT NULL, nome VARCHAR(100) NOT NULL, horario VARCHAR(50), capacidade_max INTEGER,"
+        " vagas_ocupadas INTEGER DEFAULT '0' NOT NULL, instrutor_id INTEGER, PRIMARY KEY (id),"
+        " FOREIGN KEY(instrutor_id) REFERENCES instrutores (id) ON DELETE SET NULL)"
+    ))
+    for tabela, coluna_data in (("reservas", "data_reserva"), ("lista_espera", "data_entrada")):
+        conexao.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {tabela} ("
+            f" id INTEGER NOT NULL, {coluna_data} DATETIME, membro_id INTEGER NOT NULL, aula_id INTEGER NOT NULL,"
+            " PRIMARY KEY (id), FOREIGN KEY(membro_id) REFERENCES membros (id) ON DELETE CASCADE,"
+            " FOREIGN KEY(aula_id) REFERENCES aulas (id) ON DELETE CASCADE)"
+        ))
+    conexao.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_reservas_membro_aula ON reservas (membro_id, aula_id)"
+    ))
+    conexao.execute(text("CREATE INDEX IF NOT EXISTS ix_reservas_aula_id ON reservas (aula_id)"))
+    conexao.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_lista_espera_membro_aula ON lista_espera (membro_id, aula_id)"
+    ))
+    conexao.execute(text("CREATE INDEX IF NOT EXISTS ix_lista_espera_aula_id ON lista_espera (aula_id)"))
+    conexao.execute(text(
+        "CREATE TABLE IF NOT EXISTS equipamentos ("
+        " id INTEGER NOT NULL, nome VARCHAR(100) NOT NULL, tipo VARCHAR(50), data_ultima_manutencao DATE,"
+        " PRIMARY KEY (id))"
+    ))
+    # De-para dos ids copiados de um ginásio.db (models/unificacao.py); também marca o
+    # ponto de retomada de uma cópia interrompida
+    conexao.execute(text(
+        "CREATE TABLE IF NOT EXISTS unificacao_ids ("
+        " tabela VARCHAR(50) NOT NULL, id_origem INTEGER NOT NULL, id_destino INTEGER NOT NULL,"
+        " PRIMARY KEY (tabela, id_origem)) WITHOUT ROWID"
+    ))
+
+
+def _v6_contadores_de_matriculas(conexao):
+    adicionar_coluna(conexao, "modalidades", "total_matriculas", "INTEGER NOT NULL DEFAULT 0")
+    adicionar_coluna(conexao, "alunos", "total_modalidades", "INTEGER NOT NULL DEFAULT 0")
+    conexao.execute(text(
+        "UPDATE modalidades SET total_matriculas ="
+        " (SELECT COUNT(*) FROM matriculas WHERE matriculas.modalidade_id = modalidades.id)"
+    ))
+    conexao.execute(text(
+        "UPDATE alunos SET total_modalidades ="
+        " (SELECT COUNT(*) FROM matriculas WHERE matriculas.aluno_id = alunos.id)"
+    ))
+
+
+def _criar_horarios_aulas(conexao):
+    """Grade estruturada das aulas (HorarioAula), preenchida a partir do texto de `aulas.horario`."""
+    from models.grade import interpretar_horario, DURACAO_PADRAO
+
+    conexao.execute(text(
+        "CREATE TABLE IF NOT EXISTS horarios_aulas ("
+        " id INTEGER NOT NULL, aula_id INTEGER NOT NULL, dia_semana INTEGER NOT NULL,"
+        " inicio INTEGER NOT NULL, fim INTEGER NOT NULL, sala VARCHAR(50), PRIMARY KEY (id),"
+        " CONSTRAINT ck_horarios_aulas_dia_semana CHECK (dia_semana BETWEEN 0 AND 6),"
+        " CONSTRAINT ck_horarios_aulas_intervalo CHECK (inicio >= 0 AND inicio < fim AND fim <= 1440),"
+        " FOREIGN KEY(aula_id) REFERENCES aulas (id) ON DELETE CASCADE)"
+    ))
+    conexao.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_horarios_aulas_dia_inicio ON horarios_aulas (dia_semana, inicio, fim)"
+    ))
+    conexao.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_horarios_aulas_sala_dia ON horarios_aulas (sala, dia_semana, inicio)"
+    ))
+    conexao.execute(text("CREATE INDEX IF NOT EXISTS ix_horarios_aulas_aula_id ON horarios_aulas (aula_id)"))
+    conexao.execute(text("CREATE INDEX IF NOT EXISTS ix_aulas_instrutor_id ON aulas (instrutor_id)"))
+
+    # Aulas sem grade cujo texto é reconhecido ("Seg 07:00") ganham uma ocorrência de DURACAO_PADRAO
+    sem_grade = conexao.execute(text(
+        "SELECT id, horario FROM aulas WHERE horario IS NOT NULL"
+        " AND NOT EXISTS (SELECT 1 FROM horarios_aulas WHERE horarios_aulas.aula_id = aulas.id)"
+    )).all()
+    novos = []
+    for aula_id, horario in sem_grade:
+        interpretado = interpretar_horario(horario)
+        if interpretado is not None:
+            dia, inicio = interpretado
+            novos.append({"aula_id": aula_id, "dia": dia, "inicio": inicio,
+                          "fim": min(inicio + DURACAO_PADRAO, 1440)})
+    if novos:
+        conexao.execute(text(
+            "INSERT INTO horarios_aulas (aula_id, dia_semana, inicio, fim) VALUES (:aula_id, :dia, :inicio, :fim)"
+        ), novos)
+
+
+def _v7_horarios_aulas(conexao):
+    _criar_horarios_aulas(conexao)
+
+
+def _criar_cobranca(conexao):
+    """Índice do job de cobrança (models/cobranca.py) e o histórico das execuções."""
+    conexao.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_membros_estado_adesao ON membros (estado_pagamento, data_adesao)"
+    ))
+    conexao.execute(text(
+        "CREATE TABLE IF NOT EXISTS execucoes_cobranca ("
+        " id INTEGER NOT NULL, data_referencia DATE NOT NULL, executada_em DATETIME,"
+        " novos_pendentes INTEGER NOT NULL, novos_atrasados INTEGER NOT NULL, PRIMARY KEY (id))"
+    ))
+    conexao.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_execucoes_cobranca_data ON execucoes_cobranca (data_referencia)"
+    ))
+
+
+def _v8_cobranca(conexao):
+    _criar_cobranca(conexao)
+
+
+def _criar_pago_ate(conexao):
+    """Vencimento até o qual o membro pagou; nulo nos registros antigos (o job cobra pelo vencimento)."""
+    adicionar_coluna(conexao, "membros", "pago_ate", "DATE")
+    # O job filtra por estado, data de adesão e pago_ate: a coluna entra no índice do job
+    conexao.execute(text("DROP INDEX IF EXISTS ix_membros_estado_adesao"))
+    conexao.execute(text(
+        "CREATE INDEX ix_membros_estado_adesao ON membros (estado_pagamento, data_adesao, pago_ate)"
+    ))
+
+
+def _criar_proxima_manutencao(conexao):
+    """Vencimento da próxima manutenção dos equipamentos, calculado pelo intervalo do tipo."""
+    from models.models import Equipamento
+
+    adicionar_coluna(conexao, "equipamentos", "proxima_manutencao", "DATE")
+    conexao.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_equipamentos_proxima_manutencao ON equipamentos (proxima_manutencao)"
+    ))
+    for tipo, dias in Equipamento.DIAS_ENTRE_MANUTENCOES.items():
+        conexao.execute(text(
+            "UPDATE equipamentos SET proxima_manutencao = date(data_ultima_manutencao, :dias)"
+            " WHERE tipo = :tipo AND proxima_manutencao IS NULL"
+        ), {"dias": f"+{dias} days", "tipo": tipo})
+    # Demais tipos pelo intervalo padrão; nunca revisados vencem na data da migração
+    conexao.execute(text(
+        "UPDATE equipamentos SET proxima_manutencao = coalesce(date(data_ultima_manutencao, :dias), :hoje)"
+        " WHERE proxima_manutencao IS NULL"
+    ), {"dias": f"+{Equipamento.DIAS_ENTRE_MANUTENCOES_PADRAO} days", "hoje": datetime.date.today().isoformat()})
+
+
+def _v9_proxima_manutencao(conexao):
+    _criar_proxima_manutencao(conexao)
+
+
+def _v10_tipo_instrutor_ginasio(conexao):
+    # Instrutores do ginásio foram copiados com o tipo "instrutor" da academia. Eles vêm
+    # de um ginásio.db (unificacao_ids) ou foram cadastrados pelo ginásio (têm contacto)
+    conexao.execute(text(
+        "UPDATE pessoas SET tipo = 'instrutor_ginasio' WHERE tipo = 'instrutor' AND (contacto IS NOT NULL"
+        " OR id IN (SELECT id_destino FROM unificacao_ids WHERE tabela = 'pessoas'))"
+    ))
+
+
+def _v11_pago_ate(conexao):
+    _criar_pago_ate(conexao)
+
+
+# Lista ordenada: a posição (começando em 1) é o número da versão
+MIGRACOES = [
+    _v1_indices_matriculas_e_pessoas,
+    _v2_busca_textual_pessoas,
+    _v3_exclusao_em_cascata,
+    _v4_presencas_somente_insercao,
+    _v5_esquema_ginasio,
+    _v6_contadores_de_matriculas,
+    _v7_horarios_aulas,
+    _v8_cobranca,
+    _v9_proxima_manutencao,
+    _v10_tipo_instrutor_ginasio,
+    _v11_pago_ate,
+]
+
+
+def _g1_reservas_unicas_e_vagas_ocupadas(conexao):
+    # Mantém a reserva mais antiga de cada membro/aula antes de criar o índice único
+    conexao.execute(text(
+        "DELETE FROM reservas WHERE id NOT IN ("
+        " SELECT MIN(id) FROM reservas GROUP BY membro_id, aula_id)"
+    ))
+    conexao.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_reservas_membro_aula ON reservas (membro_id, aula_id)"
+    ))
+    conexao.execute(text("CREATE INDEX IF NOT EXISTS ix_reservas_aula_id ON reservas (aula_id)"))
+    adicionar_coluna(conexao, "aulas", "vagas_ocupadas", "INTEGER NOT NULL DEFAULT 0")
+    conexao.execute(text(
+        "UPDATE aulas SET vagas_ocupadas ="
+        " (SELECT COUNT(*) FROM reservas WHERE reservas.aula_id = aulas.id)"
+    ))
+
+
+def _g2_horarios_aulas(conexao):
+    _criar_horarios_aulas(conexao)
+
+
+def _g3_cobranca(conexao):
+    _criar_cobranca(conexao)
+
+
+def _g4_proxima_manutencao(conexao):
+    _criar_proxima_manutencao(conexao)
+
+
+def _g5_tipo_instrutor_ginasio(conexao):
+    conexao.execute(text("UPDATE pessoas SET tipo = 'instrutor_ginasio' WHERE tipo = 'instrutor'"))
+
+
+def _g6_pago_ate(conexao):
+    _criar_pago_ate(conexao)
+
+
+# Migrações de um ginásio.db separado (setup_database em models/models.py)
+MIGRACOES_GINASIO = [
+    _g1_reservas_unicas_e_vagas_ocupadas,
+    _g2_horarios_aulas,
+    _g3_cobranca,
+    _g4_proxima_manutencao,
+    _g5_tipo_instrutor_ginasio,
+    _g6_pago_ate,
+]
+
+
+def versao_atual(conexao):
+    return conexao.execute(text("PRAGMA user_version")).scalar()
+
+
+def _definir_chaves_estrangeiras(conexao, ligadas):
+    # PRAGMA foreign_keys não tem efeito dentro de uma transação: usa a conexão do
+    # driver diretamente, antes do BEGIN emitido pelo SQLAlchemy
+    conexao.connection.dbapi_connection.execute(f"PRAGMA foreign_keys={'ON' if ligadas else 'OFF'}")
+
+
+def migracoes_pendentes(engine, migracoes=None):
+    """Nomes das migrações ainda não aplicadas ao banco do `engine`."""
+    migracoes = MIGRACOES if migracoes is None else migracoes
+    with engine.connect() as conexao:
+        versao = versao_atual(conexao)
+    return [migracao.__name__ for migracao in migracoes[versao:]]
+
+
+def aplicar_migracoes(engine, migracoes=None):
+    """Aplica as migrações pendentes (MIGRACOES por padrão), cada uma em sua própria transação."""
+    migracoes = MIGRACOES if migracoes is None else migracoes
+    aplicadas = []
+    for versao, migracao in enumerate(migracoes, start=1):
+        desliga_chaves = getattr(migracao, "desliga_chaves_estrangeiras", False)
+        with engine.connect() as conexao:
+            if desliga_chaves:
+                _definir_chaves_estrangeiras(conexao, False)
+            try:
+                with conexao.begin():
+                    # O driver sqlite3 só abre transação antes de INSERT/UPDATE/DELETE;
+                    # o BEGIN explícito torna também o DDL da migração atômico
+                    conexao.exec_driver_sql("BEGIN")
+                    if versao_atual(conexao) >= versao:
+                        continue
+                    migracao(conexao)
+                    if desliga_chaves and conexao.execute(text("PRAGMA foreign_key_check")).first():
+                        raise RuntimeError(f"Migração {migracao.__name__} deixou chaves estrangeiras inválidas.")
+                    # PRAGMA não aceita parâmetros; versao é sempre um inteiro nosso
+                    conexao.execute(text(f"PRAGMA user_version = {int(versao)}"))
+                    aplicadas.append(migracao.__name__)
+            finally:
+                if desliga_chaves:
+                    _definir_chaves_estrangeiras(conexao, True)
+    return aplicadas
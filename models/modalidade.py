@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 from models.base import Base
+from models.resultados import DadosModalidade, formatar
 
 class Modalidade(Base):
     __tablename__ = "modalidades"
@@ -8,13 +9,28 @@ class Modalidade(Base):
     id = Column(Integer, primary_key=True)
     nome = Column(String, unique=True, nullable=False)  # nome obrigatório e único
     descricao = Column(String, nullable=True)  # descrição opcional
+    # Contador desnormalizado de matrículas, mantido pelo MatriculaService (models/servicos.py)
+    # no mesmo commit da matrícula; MatriculaService.reconciliar_contadores corrige desvios
+    total_matriculas = Column(Integer, nullable=False, default=0, server_default="0")
 
-    matriculas = relationship("Matricula", back_populates="modalidade", cascade="all, delete-orphan")
-    # Cascade para remover matrículas quando modalidade for removida, se desejado
+    matriculas = relationship("Matricula", back_populates="modalidade", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}
+    # Cascade para remover matrículas quando modalidade for removida; passive_deletes evita
+    # carregar as matrículas e deixa o ON DELETE CASCADE do banco fazer a remoção
 
     def __init__(self, nome, descricao=""):
         self.nome = nome
         self.descricao = descricao
 
+    @staticmethod
+    def validar_nome(valor):
+        if not valor or not valor.strip():
+            raise ValueError("Nome da modalidade não pode ser vazio.")
+        return valor.strip()
+
+    def dados(self):
+        return DadosModalidade(self.id, self.nome, self.descricao)
+
     def exibir_detalhes(self):
-        print(f"Modalidade: {self.nome}, Descrição: {self.descricao if self.descricao else 'Sem descrição'}")
+        print(formatar(self.dados()))
@@ -4,11 +4,16 @@
 import datetime
 from abc import ABC, abstractmethod
 
-from sqlalchemy import (Column, Integer, String, Date, DateTime, ForeignKey,
-                    create_engine, event)
-from sqlalchemy.orm import relationship, declarative_base, sessionmaker, validates
+from sqlalchemy import (Column, Integer, String, Date, DateTime, ForeignKey, Index, CheckConstraint,
+                    event)
+from sqlalchemy.orm import (relationship, declarative_base, sessionmaker, validates, object_session,
+                            Session as SessaoOrm, with_loader_criteria)
 from sqlalchemy.ext.hybrid import hybrid_property
 
+from models.base import criar_engine
+from models.migracoes import aplicar_migracoes, MIGRACOES_GINASIO
+from models.resultados import DadosMembro, DadosInstrutorGinasio, DadosAula, DadosEquipamento, formatar
+
 # Base declarativa para os modelos SQLAlchemy
 Base = declarative_base()
 
@@ -30,6 +35,8 @@ class Pessoa(Base):
         'polymorphic_identity': 'pessoa',
         'polymorphic_on': tipo
     }
+    # AUTOINCREMENT (bancos novos): ids excluídos não são reaproveitados (exportação incremental, models/exportacao.py)
+    __table_args__ = {'sqlite_autoincrement': True}
 
     def __init__(self, nome, contacto):
         self.nome = nome
@@ -37,10 +44,29 @@ class Pessoa(Base):
 
     # Método abstrato (não diretamente mapeado, mas define o contrato)
     @abstractmethod
-    def display_details(self):
-        """Método abstrato para exibir detalhes específicos da subclasse."""
+    def dados(self):
+        """Método abstrato que retorna os dados da subclasse (models/resultados.py)."""
         pass
 
+    def display_details(self):
+        print(formatar(self.dados()))
+
+
+# No academia.db unificado `pessoas` e `instrutores` também guardam alunos e instrutores
+# da academia (models/pessoa.py); as consultas do ginásio não os carregam
+_SOMENTE_PESSOAS_DO_GINASIO = with_loader_criteria(
+    Pessoa, Pessoa.tipo.not_in(("aluno", "instrutor")), include_aliases=True
+)
+
+
+def _filtrar_pessoas_da_academia(estado):
+    if estado.is_select and not estado.is_column_load and not estado.is_relationship_load:
+        estado.statement = estado.statement.options(_SOMENTE_PESSOAS_DO_GINASIO)
+
+
+if not event.contains(SessaoOrm, "do_orm_execute", _filtrar_pessoas_da_academia):
+    event.listen(SessaoOrm, "do_orm_execute", _filtrar_pessoas_da_academia, insert=True)
+
 # --- Classes Concretas ---
 
 class Membro(Pessoa):
@@ -51,6 +77,9 @@ class Membro(Pessoa):
     data_adesao = Column(Date, default=datetime.date.today)
     tipo_subscricao = Column(String(50))
     _estado_pagamento = Column("estado_pagamento", String(20), default='Pendente') # Mapeia para coluna 'estado_pagamento'
+    # Vencimento até o qual o ciclo está pago, gravado quando o estado passa a 'Pago';
+    # o job de cobrança (models/cobranca.py) só volta o membro a 'Pendente' a partir dele
+    pago_ate = Column(Date)
 
     # Relacionamento com Reservas (um membro pode ter várias reservas)
     reservas = relationship("Reserva", back_populates="membro")
@@ -64,20 +93,22 @@ class Membro(Pessoa):
         'polymorphic_identity': 'membro',
     }
 
+    # Usado pelo job de cobrança (models/cobranca.py), que atualiza os estados por conjunto
+    __table_args__ = (
+        Index("ix_membros_estado_adesao", "estado_pagamento", "data_adesao", "pago_ate"),
+    )
+
     def __init__(self, nome, contacto, data_adesao=None, tipo_subscricao='Mensal', estado_pagamento='Pendente'):
         super().__init__(nome, contacto)
         self.data_adesao = data_adesao if data_adesao else datetime.date.today()
         self.tipo_subscricao = tipo_subscricao
-        self._estado_pagamento = estado_pagamento
+        self.estado_pagamento = estado_pagamento
         Membro.total_membros += 1 # Incrementa o contador da classe Python
 
     # Implementação do método 'abstrato' (Polimorfismo)
-    def display_details(self):
-        print(f"Membro: {self.nome} (ID: {self.id})")
-        print(f"  Contacto: {self.contacto}")
-        print(f"  Adesão: {self.data_adesao.strftime('%Y-%m-%d')}")
-        print(f"  Subscrição: {self.tipo_subscricao}")
-        print(f"  Pagamento: {self.estado_pagamento}")
+    def dados(self):
+        return DadosMembro(self.id, self.nome, self.contacto, self.data_adesao, self.tipo_subscricao,
+                           self.estado_pagamento)
 
     # Encapsulamento com property (getter)
     @hybrid_property
@@ -89,6 +120,10 @@ class Membro(Pessoa):
     def estado_pagamento(self, estado):
         if estado not in ['Pago', 'Pendente', 'Atrasado']:
             raise ValueError("Estado de pagamento inválido.")
+        if estado == 'Pago':
+            # Pagar quita o ciclo em curso (o que começou no último vencimento, inclusive hoje)
+            from models.cobranca import proximo_vencimento
+            self.pago_ate = proximo_vencimento(self.data_adesao, self.tipo_subscricao)
         self._estado_pagamento = estado
 
     # Método de classe (requisito POO)
@@ -116,7 +151,8 @@ class Instrutor(Pessoa):
     aulas_lecionadas = relationship("AulaGinastica", back_populates="instrutor")
 
     __mapper_args__ = {
-        'polymorphic_identity': 'instrutor',
+        # Diferente do 'instrutor' da academia: no academia.db unificado as duas hierarquias dividem pessoas
+        'polymorphic_identity': 'instrutor_ginasio',
     }
 
     def __init__(self, nome, contacto, especializacao):
@@ -124,10 +160,13 @@ class Instrutor(Pessoa):
         self.especializacao = especializacao
 
     # Implementação do método 'abstrato' (Polimorfismo)
-    def display_details(self):
-        print(f"Instrutor: {self.nome} (ID: {self.id})")
-        print(f"  Contacto: {self.contacto}")
-        print(f"  Especialização: {self.especializacao}")
+    def dados(self):
+        return DadosInstrutorGinasio(self.id, self.nome, self.contacto, self.especializacao)
+
+    def conflitos_de_horario(self):
+        """Pares de horários sobrepostos entre as aulas deste instrutor (veja models/grade.py)."""
+        from models.grade import GradeService
+        return GradeService.conflitos_do_instrutor(object_session(self), self.id)
 
 class AulaGinastica(Base):
     """Representa uma Aula oferecida pelo ginásio."""
@@ -136,6 +175,9 @@ class AulaGinastica(Base):
     nome = Column(String(100), nullable=False)
     horario = Column(String(50)) # Simplificado como String, poderia ser DateTime
     capacidade_max = Column(Integer, default=20)
+    # Contador desnormalizado de reservas; mantido pelo ReservaService (models/reservas.py)
+    # com UPDATE condicional, para não carregar todas as reservas só para contar
+    vagas_ocupadas = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Chave estrangeira para Instrutor
     instrutor_id = Column(Integer, ForeignKey('instrutores.id'))
@@ -144,23 +186,64 @@ class AulaGinastica(Base):
 
     # Relacionamento com Reservas (uma aula pode ter várias reservas)
     reservas = relationship("Reserva", back_populates="aula", cascade="all, delete-orphan")
+    # Grade semanal estruturada; `horario` fica como texto livre para exibição
+    horarios = relationship("HorarioAula", back_populates="aula", cascade="all, delete-orphan",
+                            passive_deletes=True, order_by="[HorarioAula.dia_semana, HorarioAula.inicio]")
+
+    __table_args__ = (
+        Index("ix_aulas_instrutor_id", "instrutor_id"),
+        {'sqlite_autoincrement': True},
+    )
 
     def __init__(self, nome, horario, capacidade_max, instrutor_id):
         self.nome = nome
         self.horario = horario
         self.capacidade_max = capacidade_max
         self.instrutor_id = instrutor_id
+        self.vagas_ocupadas = 0
+
+    def dados(self):
+        instrutor_nome = self.instrutor.nome if self.instrutor else None
+        return DadosAula(self.id, self.nome, self.horario, instrutor_nome, self.vagas_ocupadas, self.capacidade_max)
 
     def display_details(self):
-        instrutor_nome = self.instrutor.nome if self.instrutor else 'N/A'
-        vagas = self.capacidade_max - len(self.reservas)
-        print(f"Aula: {self.nome} (ID: {self.id})")
-        print(f"  Horário: {self.horario}")
-        print(f"  Instrutor: {instrutor_nome}")
-        print(f"  Capacidade: {len(self.reservas)}/{self.capacidade_max} (Vagas: {vagas})")
+        print(formatar(self.dados()))
 
     def esta_cheia(self):
-        return len(self.reservas) >= self.capacidade_max
+        return self.vagas_ocupadas >= self.capacidade_max
+
+class HorarioAula(Base):
+    """Ocorrência semanal de uma aula: dia da semana, início, fim e sala.
+
+    `dia_semana` segue datetime.weekday() (0 = segunda) e `inicio`/`fim` são
+    minutos desde 00:00, o que deixa as consultas de sobreposição em comparações
+    de inteiros cobertas pelo índice (dia_semana, inicio, fim).
+    """
+    __tablename__ = 'horarios_aulas'
+    id = Column(Integer, primary_key=True)
+    aula_id = Column(Integer, ForeignKey('aulas.id', ondelete='CASCADE'), nullable=False)
+    dia_semana = Column(Integer, nullable=False)
+    inicio = Column(Integer, nullable=False)
+    fim = Column(Integer, nullable=False)
+    sala = Column(String(50))
+
+    aula = relationship("AulaGinastica", back_populates="horarios")
+
+    __table_args__ = (
+        CheckConstraint("dia_semana BETWEEN 0 AND 6", name="ck_horarios_aulas_dia_semana"),
+        CheckConstraint("inicio >= 0 AND inicio < fim AND fim <= 1440", name="ck_horarios_aulas_intervalo"),
+        Index("ix_horarios_aulas_dia_inicio", "dia_semana", "inicio", "fim"),
+        Index("ix_horarios_aulas_sala_dia", "sala", "dia_semana", "inicio"),
+        Index("ix_horarios_aulas_aula_id", "aula_id"),
+        {'sqlite_autoincrement': True},
+    )
+
+    def __init__(self, aula_id, dia_semana, inicio, fim, sala=None):
+        self.aula_id = aula_id
+        self.dia_semana = dia_semana
+        self.inicio = inicio
+        self.fim = fim
+        self.sala = sala
 
 class Reserva(Base):
     """Representa a associação entre um Membro e uma Aula (reserva)."""
@@ -176,10 +259,49 @@ class Reserva(Base):
     membro = relationship("Membro", back_populates="reservas")
     aula = relationship("AulaGinastica", back_populates="reservas")
 
+    __table_args__ = (
+        # Um membro só ocupa uma vaga por aula
+        Index("uq_reservas_membro_aula", "membro_id", "aula_id", unique=True),
+        Index("ix_reservas_aula_id", "aula_id"),
+        {'sqlite_autoincrement': True},
+    )
+
+    def __init__(self, membro_id, aula_id):
+        self.membro_id = membro_id
+        self.aula_id = aula_id
+
+class ListaEspera(Base):
+    """Membro aguardando vaga em uma aula cheia; a ordem de chegada é a do id."""
+    __tablename__ = 'lista_espera'
+    id = Column(Integer, primary_key=True)
+    data_entrada = Column(DateTime, default=datetime.datetime.utcnow)
+
+    membro_id = Column(Integer, ForeignKey('membros.id'), nullable=False)
+    aula_id = Column(Integer, ForeignKey('aulas.id'), nullable=False)
+
+    __table_args__ = (
+        Index("uq_lista_espera_membro_aula", "membro_id", "aula_id", unique=True),
+        Index("ix_lista_espera_aula_id", "aula_id"),
+        {'sqlite_autoincrement': True},
+    )
+
     def __init__(self, membro_id, aula_id):
         self.membro_id = membro_id
         self.aula_id = aula_id
 
+class ExecucaoCobranca(Base):
+    """Registro de cada execução do job de cobrança; a última data marca até onde os ciclos já foram cobrados."""
+    __tablename__ = 'execucoes_cobranca'
+    id = Column(Integer, primary_key=True)
+    data_referencia = Column(Date, nullable=False)
+    executada_em = Column(DateTime, default=datetime.datetime.now)
+    novos_pendentes = Column(Integer, nullable=False)
+    novos_atrasados = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_execucoes_cobranca_data", "data_referencia"),
+    )
+
 class Equipamento(Base):
     """Representa um Equipamento do ginásio."""
     __tablename__ = 'equipamentos'
@@ -187,27 +309,56 @@ class Equipamento(Base):
     nome = Column(String(100), nullable=False)
     tipo = Column(String(50))
     data_ultima_manutencao = Column(Date, nullable=True)
+    # Vencimento da próxima manutenção (a data do cadastro, se o equipamento nunca foi
+    # revisado). Indexada para o planejador de manutenção (models/manutencao.py)
+    proxima_manutencao = Column(Date, nullable=True)
+
+    # Dias entre manutenções por tipo de equipamento (atributo de classe, não persistido)
+    DIAS_ENTRE_MANUTENCOES = {"Cardio": 90, "Musculação": 180, "Peso Livre": 365, "Funcional": 120}
+    DIAS_ENTRE_MANUTENCOES_PADRAO = 180
+
+    __table_args__ = (
+        Index("ix_equipamentos_proxima_manutencao", "proxima_manutencao"),
+        {'sqlite_autoincrement': True},
+    )
 
     def __init__(self, nome, tipo, data_ultima_manutencao=None):
         self.nome = nome
         self.tipo = tipo
         self.data_ultima_manutencao = data_ultima_manutencao
+        self.proxima_manutencao = self.calcular_proxima_manutencao(tipo, data_ultima_manutencao)
+
+    @classmethod
+    def intervalo_manutencao(cls, tipo):
+        """Dias entre manutenções do tipo de equipamento."""
+        return cls.DIAS_ENTRE_MANUTENCOES.get(tipo, cls.DIAS_ENTRE_MANUTENCOES_PADRAO)
+
+    @classmethod
+    def calcular_proxima_manutencao(cls, tipo, data_ultima_manutencao):
+        """Vencimento da próxima manutenção; sem nenhuma manutenção registrada, vence hoje."""
+        if data_ultima_manutencao is None:
+            return datetime.date.today()
+        return data_ultima_manutencao + datetime.timedelta(days=cls.intervalo_manutencao(tipo))
+
+    def dados(self):
+        return DadosEquipamento(self.id, self.nome, self.tipo, self.data_ultima_manutencao, self.proxima_manutencao)
 
     def display_details(self):
-        data_manut = self.data_ultima_manutencao.strftime('%Y-%m-%d') if self.data_ultima_manutencao else 'Nenhuma'
-        print(f"Equipamento: {self.nome} (ID: {self.id})")
-        print(f"  Tipo: {self.tipo}")
-        print(f"  Última Manutenção: {data_manut}")
+        print(formatar(self.dados()))
 
     def registar_manutencao(self, data=None):
         self.data_ultima_manutencao = data if data else datetime.date.today()
+        self.proxima_manutencao = self.calcular_proxima_manutencao(self.tipo, self.data_ultima_manutencao)
 
 # --- Configuração do Banco de Dados e Sessão ---
 
 def setup_database(db_name='ginásio.db'):
     """Configura o engine e cria as tabelas no banco de dados SQLite."""
-    engine = create_engine(f'sqlite:///{db_name}')
+    # Mesma configuração de produção (WAL, PRAGMAs, pool) usada pelo academia.db
+    engine = criar_engine(f'sqlite:///{db_name}')
     Base.metadata.create_all(engine) # Cria as tabelas se não existirem
+    # Índices e colunas que o create_all não acrescenta a bancos já existentes
+    aplicar_migracoes(engine, MIGRACOES_GINASIO)
     return engine
 
 def create_session(engine):
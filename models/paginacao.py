@@ -0,0 +1,62 @@
+"""Listagem paginada por cursor (keyset) ordenada por (nome, id).
+
+Em vez de OFFSET, cada página continua a partir do último (nome, id) recebido,
+aproveitando o índice ix_pessoas_nome: o custo de uma página não depende de
+quantas páginas vieram antes.
+"""
+
+from collections import namedtuple
+
+from sqlalchemy import select, tuple_
+
+from models.pessoa import Pessoa
+
+TAMANHO_PAGINA_PADRAO = 20
+
+# itens: linhas leves (não objetos ORM); proximo_cursor: (nome, id) ou None na última página
+Pagina = namedtuple("Pagina", ["itens", "proximo_cursor"])
+
+
+def _limite_superior_prefixo(prefixo):
+    # Menor texto maior que todos os que começam com `prefixo` ("Ana" -> "Anb")
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+
+def consulta_pagina(modelo, colunas, limite=TAMANHO_PAGINA_PADRAO, cursor=None,
+                    prefixo_nome=None, idade_min=None, idade_max=None):
+    """Monta o SELECT de uma página (com uma linha a mais); veja paginar_pessoas.
+
+    O filtro por prefixo é uma faixa no índice de nome (sensível a maiúsculas).
+    Ordem e cursor usam pessoas.id, a coluna que acompanha o nome no índice: com
+    alunos.id/instrutores.id o SQLite ordena de novo cada grupo de nomes iguais.
+    """
+    if limite <= 0:
+        raise ValueError("Limite da página deve ser inteiro positivo.")
+    consulta = select(modelo.id, modelo._nome.label("nome"), *colunas)
+    if prefixo_nome:
+        consulta = consulta.where(
+            modelo._nome >= prefixo_nome, modelo._nome < _limite_superior_prefixo(prefixo_nome)
+        )
+    if idade_min is not None:
+        consulta = consulta.where(modelo._idade >= idade_min)
+    if idade_max is not None:
+        consulta = consulta.where(modelo._idade <= idade_max)
+    if cursor is not None:
+        consulta = consulta.where(tuple_(modelo._nome, Pessoa.id) > tuple_(*cursor))
+    # Busca uma linha a mais só para saber se existe próxima página
+    return consulta.order_by(modelo._nome, Pessoa.id).limit(limite + 1)
+
+
+def montar_pagina(itens, limite):
+    """Converte as linhas de consulta_pagina em uma Pagina com o cursor seguinte."""
+    if len(itens) <= limite:
+        return Pagina(itens, None)
+    itens = itens[:limite]
+    return Pagina(itens, (itens[-1].nome, itens[-1].id))
+
+
+def paginar_pessoas(session, modelo, colunas, limite=TAMANHO_PAGINA_PADRAO, cursor=None,
+                    prefixo_nome=None, idade_min=None, idade_max=None):
+    """Retorna uma Pagina de `modelo` (Aluno ou Instrutor) com as `colunas` pedidas."""
+    consulta = consulta_pagina(modelo, colunas, limite, cursor, prefixo_nome, idade_min, idade_max)
+    return montar_pagina(session.execute(consulta).all(), limite)
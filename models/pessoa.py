@@ -1,18 +1,24 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, event
+from sqlalchemy.orm import Session as SessaoOrm, with_loader_criteria
 from models.base import Base
+from models.resultados import DadosPessoa, formatar
 
 class Pessoa(Base):
     __tablename__ = "pessoas"
 
     id = Column(Integer, primary_key=True)
-    _nome = Column("nome", String)
+    _nome = Column("nome", String, index=True)  # usado nas listagens ordenadas por nome
     _idade = Column("idade", Integer)
-    tipo = Column(String)
+    tipo = Column(String, index=True)
+    # Preenchido para os membros do ginásio (models/models.py), que compartilham esta tabela
+    contacto = Column(String(100))
 
     __mapper_args__ = {
         "polymorphic_on": tipo,
         "polymorphic_identity": "pessoa",
     }
+    # AUTOINCREMENT (bancos novos): ids de pessoas excluídas não são reaproveitados (exportação incremental)
+    __table_args__ = {"sqlite_autoincrement": True}
 
     def __init__(self, nome, idade):
         self.nome = nome
@@ -24,9 +30,7 @@ class Pessoa(Base):
 
     @nome.setter
     def nome(self, valor):
-        if not valor or len(valor) < 3:
-            raise ValueError("Nome deve ter ao menos 3 caracteres.")
-        self._nome = valor.strip()
+        self._nome = Pessoa.validar_nome(valor)
 
     @property
     def idade(self):
@@ -34,9 +38,53 @@ class Pessoa(Base):
 
     @idade.setter
     def idade(self, valor):
+        self._idade = Pessoa.validar_idade(valor)
+
+    # Regras de validação reaproveitadas pelos setters e pela importação em lote
+    @staticmethod
+    def validar_nome(valor):
+        if not valor or len(valor) < 3:
+            raise ValueError("Nome deve ter ao menos 3 caracteres.")
+        return valor.strip()
+
+    @staticmethod
+    def validar_idade(valor):
         if not isinstance(valor, int) or valor < 0:
             raise ValueError("Idade deve ser inteiro positivo.")
-        self._idade = valor
+        return valor
+
+    def dados(self):
+        return DadosPessoa(self.id, self.nome, self.idade)
 
     def exibir_detalhes(self):
-        print(f"Pessoa: {self.nome}, Idade: {self.idade}")
+        print(formatar(self.dados()))
+
+
+# Depois da unificação (models/unificacao.py) membros e instrutores do ginásio ficam
+# nesta mesma tabela, com os tipos de models/models.py. As classes abaixo só
+# registram esses tipos para a carga polimórfica não falhar; as consultas da
+# academia não os enxergam (_filtrar_pessoas_do_ginasio).
+IDENTIDADES_GINASIO = ("membro", "instrutor_ginasio")
+
+
+class MembroDoGinasio(Pessoa):
+    __mapper_args__ = {"polymorphic_identity": "membro"}
+
+
+class InstrutorDoGinasio(Pessoa):
+    __mapper_args__ = {"polymorphic_identity": "instrutor_ginasio"}
+
+
+_SOMENTE_PESSOAS_DA_ACADEMIA = with_loader_criteria(
+    Pessoa, Pessoa.tipo.not_in(IDENTIDADES_GINASIO), include_aliases=True
+)
+
+
+def _filtrar_pessoas_do_ginasio(estado):
+    # Vale também para Aluno e Instrutor; instrutores do ginásio dividem a tabela `instrutores`
+    if estado.is_select and not estado.is_column_load and not estado.is_relationship_load:
+        estado.statement = estado.statement.options(_SOMENTE_PESSOAS_DA_ACADEMIA)
+
+
+if not event.contains(SessaoOrm, "do_orm_execute", _filtrar_pessoas_do_ginasio):
+    event.listen(SessaoOrm, "do_orm_execute", _filtrar_pessoas_do_ginasio, insert=True)
@@ -0,0 +1,52 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, CheckConstraint, Index
+from sqlalchemy.orm import relationship
+from models.base import Base
+
+# modalidade_id usado nos agregados para check-ins sem modalidade (entrada geral da academia)
+SEM_MODALIDADE = 0
+
+
+class Presenca(Base):
+    """Check-in registrado por uma catraca. Tabela só de inserção (ver migração v4).
+
+    Sem chave estrangeira em aluno_id: o histórico de frequência continua válido
+    depois que o aluno é excluído, e um id desconhecido não derruba o lote inteiro
+    da catraca. membro_id aponta para os membros do ginásio (models/models.py),
+    que ficam em outro banco.
+    """
+    __tablename__ = "presencas"
+
+    id = Column(Integer, primary_key=True)
+    momento = Column(DateTime, nullable=False)
+    aluno_id = Column(Integer)
+    membro_id = Column(Integer)
+    modalidade_id = Column(Integer)
+    origem = Column(String(50))  # identificação da catraca/quiosque
+
+    aluno = relationship("Aluno", primaryjoin="foreign(Presenca.aluno_id) == Aluno.id", viewonly=True)
+
+    __table_args__ = (
+        CheckConstraint("(aluno_id IS NULL) <> (membro_id IS NULL)", name="ck_presencas_uma_pessoa"),
+        Index("ix_presencas_momento", "momento"),
+        # Histórico de uma pessoa, do mais recente para o mais antigo
+        Index("ix_presencas_aluno_momento", "aluno_id", "momento"),
+        Index("ix_presencas_membro_momento", "membro_id", "momento"),
+    )
+
+
+class PresencaPorHora(Base):
+    """Quantidade de check-ins por hora cheia e modalidade, mantida a cada lote gravado."""
+    __tablename__ = "presencas_por_hora"
+
+    hora = Column(DateTime, primary_key=True)
+    modalidade_id = Column(Integer, primary_key=True, default=SEM_MODALIDADE)
+    quantidade = Column(Integer, nullable=False, default=0)
+
+
+class PresencaPorDia(Base):
+    """Quantidade de check-ins por dia e modalidade, mantida a cada lote gravado."""
+    __tablename__ = "presencas_por_dia"
+
+    dia = Column(Date, primary_key=True)
+    modalidade_id = Column(Integer, primary_key=True, default=SEM_MODALIDADE)
+    quantidade = Column(Integer, nullable=False, default=0)
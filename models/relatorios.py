@@ -0,0 +1,88 @@
+"""Relatórios calculados direto no banco (GROUP BY / JOIN), sem carregar objetos ORM.
+
+Todas as consultas retornam linhas leves (tuplas nomeadas do SQLAlchemy) em vez de
+instâncias de Aluno/Modalidade, evitando os carregamentos preguiçosos (N+1).
+As contagens de matrículas leem os contadores desnormalizados
+(Modalidade.total_matriculas, Aluno.total_modalidades) em vez de agregar a
+tabela de matrículas.
+"""
+
+from sqlalchemy import select, func
+
+from models.aluno import Aluno
+from models.modalidade import Modalidade
+from models.matricula import Matricula
+
+
+class RelatorioService:
+    # As consultas ficam públicas para a versão assíncrona (models/servicos_async.py)
+    @staticmethod
+    def consulta_quantidade_alunos_por_modalidade():
+        return (
+            select(Modalidade.id, Modalidade.nome, Modalidade.total_matriculas.label("quantidade"))
+            .order_by(Modalidade.nome)
+        )
+
+    @staticmethod
+    def quantidade_alunos_por_modalidade(session):
+        """Retorna (id, nome, quantidade) de cada modalidade, inclusive as vazias."""
+        return session.execute(RelatorioService.consulta_quantidade_alunos_por_modalidade()).all()
+
+    @staticmethod
+    def consulta_alunos_da_modalidade(modalidade_id):
+        return (
+            select(Aluno.id, Aluno._nome.label("nome"), Aluno._matricula.label("matricula"))
+            .join(Matricula, Matricula.aluno_id == Aluno.id)
+            .where(Matricula.modalidade_id == modalidade_id)
+        )
+
+    @staticmethod
+    def alunos_por_modalidade(session, modalidade_id, limite=100, apos_id=None):
+        """Página de (id, nome, matricula) dos alunos de uma modalidade, ordenada por id.
+
+        Para a próxima página, passe em `apos_id` o id da última linha recebida.
+        """
+        return session.execute(RelatorioService.consulta_pagina_alunos_da_modalidade(modalidade_id, limite, apos_id)).all()
+
+    @staticmethod
+    def consulta_pagina_alunos_da_modalidade(modalidade_id, limite=100, apos_id=None):
+        consulta = RelatorioService.consulta_alunos_da_modalidade(modalidade_id)
+        if apos_id is not None:
+            consulta = consulta.where(Aluno.id > apos_id)
+        return consulta.order_by(Aluno.id).limit(limite)
+
+    @staticmethod
+    def iterar_alunos_por_modalidade(session, modalidade_id, tamanho_lote=1000):
+        """Percorre todos os alunos de uma modalidade em memória limitada.
+
+        As linhas são buscadas do cursor em blocos de `tamanho_lote`.
+        """
+        consulta = RelatorioService.consulta_alunos_da_modalidade(modalidade_id).order_by(Aluno._nome)
+        resultado = session.execute(consulta.execution_options(yield_per=tamanho_lote))
+        for linha in resultado:
+            yield linha
+
+    @staticmethod
+    def matriculas_por_faixa_etaria(session, largura_faixa=10):
+        """Retorna (idade_inicial, alunos, matriculas) por faixa etária de `largura_faixa` anos."""
+        faixa = ((Aluno._idade // largura_faixa) * largura_faixa).label("idade_inicial")
+        consulta = (
+            select(
+                faixa,
+                func.count(Aluno.id).label("alunos"),
+                func.coalesce(func.sum(Aluno.total_modalidades), 0).label("matriculas"),
+            )
+            .group_by(faixa)
+            .order_by(faixa)
+        )
+        return session.execute(consulta).all()
+
+    @staticmethod
+    def alunos_sem_modalidade(session):
+        """Retorna (id, nome, matricula) dos alunos sem nenhuma matrícula."""
+        consulta = (
+            select(Aluno.id, Aluno._nome.label("nome"), Aluno._matricula.label("matricula"))
+            .where(Aluno.total_modalidades == 0)
+            .order_by(Aluno._nome)
+        )
+        return session.execute(consulta).all()
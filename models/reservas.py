@@ -0,0 +1,174 @@
+"""Reservas de aulas (AulaGinastica) com controle atômico de capacidade e lista de espera.
+
+A vaga é obtida com um único UPDATE condicional sobre o contador
+`aulas.vagas_ocupadas`:
+
+    UPDATE aulas SET vagas_ocupadas = vagas_ocupadas + 1
+    WHERE id = :aula AND vagas_ocupadas < capacidade_max
+
+O banco só deixa um escritor executar esse comando por vez, então duas reservas
+simultâneas nunca ocupam a mesma última vaga: a segunda encontra a condição
+falsa (rowcount 0) e o membro vai para a lista de espera. No cancelamento, o
+primeiro da lista herda a vaga na mesma transação.
+"""
+
+from collections import namedtuple
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+
+from models.models import AulaGinastica, Reserva, ListaEspera
+from models.transacao import confirmar, em_unidade_de_trabalho
+
+CONFIRMADA = "confirmada"
+LISTA_ESPERA = "lista_espera"
+CHEIA = "cheia"
+JA_RESERVADA = "ja_reservada"
+JA_NA_LISTA = "ja_na_lista"
+
+# situacao: uma das constantes acima; posicao_espera só é preenchida na lista de espera
+ResultadoReserva = namedtuple("ResultadoReserva", ["situacao", "reserva_id", "posicao_espera"])
+
+# cancelada: havia reserva ou lugar na lista; promovido_id: membro que herdou a vaga (ou None)
+ResultadoCancelamento = namedtuple("ResultadoCancelamento", ["cancelada", "promovido_id"])
+
+
+def _desfazer(session):
+    if not em_unidade_de_trabalho(session):
+        session.rollback()
+
+
+def _posicao_na_lista(session, aula_id, entrada_id):
+    return session.scalar(
+        select(func.count(ListaEspera.id)).where(ListaEspera.aula_id == aula_id, ListaEspera.id <= entrada_id)
+    )
+
+
+class ReservaService:
+    @staticmethod
+    def reservar(session, membro_id, aula_id, lista_espera=True):
+        """Reserva uma vaga; se a aula estiver cheia, entra na lista de espera (se `lista_espera`).
+
+        Retorna um ResultadoReserva. Levanta ValueError se a aula ou o membro não existirem.
+        """
+        ja_reservada = session.scalar(
+            select(Reserva.id).where(Reserva.membro_id == membro_id, Reserva.aula_id == aula_id)
+        )
+        if ja_reservada is not None:
+            return ResultadoReserva(JA_RESERVADA, ja_reservada, None)
+
+        ocupou = session.execute(
+            update(AulaGinastica)
+            .where(AulaGinastica.id == aula_id, AulaGinastica.vagas_ocupadas < AulaGinastica.capacidade_max)
+            .values(vagas_ocupadas=AulaGinastica.vagas_ocupadas + 1)
+        ).rowcount
+        try:
+            if ocupou:
+                reserva = Reserva(membro_id, aula_id)
+                session.add(reserva)
+                session.flush()
+                # Quem estava na lista e conseguiu a vaga por aqui sai da lista
+                session.execute(delete(ListaEspera).where(
+                    ListaEspera.membro_id == membro_id, ListaEspera.aula_id == aula_id
+                ))
+                confirmar(session)
+                return ResultadoReserva(CONFIRMADA, reserva.id, None)
+
+            if session.get(AulaGinastica, aula_id) is None:
+                raise ValueError(f"Aula com ID {aula_id} não encontrada.")
+            if not lista_espera:
+                # Encerra a transação aberta pelo UPDATE (que não alterou nada)
+                confirmar(session)
+                return ResultadoReserva(CHEIA, None, None)
+            entrada_id = session.scalar(
+                select(ListaEspera.id).where(ListaEspera.membro_id == membro_id, ListaEspera.aula_id == aula_id)
+            )
+            situacao = JA_NA_LISTA
+            if entrada_id is None:
+                entrada = ListaEspera(membro_id, aula_id)
+                session.add(entrada)
+                session.flush()
+                entrada_id, situacao = entrada.id, LISTA_ESPERA
+            posicao = _posicao_na_lista(session, aula_id, entrada_id)
+            confirmar(session)
+            return ResultadoReserva(situacao, None, posicao)
+        except IntegrityError:
+            _desfazer(session)
+            raise ValueError(f"Reserva inválida: membro {membro_id} inexistente ou reserva simultânea duplicada.")
+        except ValueError:
+            _desfazer(session)
+            raise
+
+    @staticmethod
+    def cancelar(session, membro_id, aula_id):
+        """Cancela a reserva (ou a posição na lista de espera) do membro.
+
+        Se uma vaga for liberada e houver lista de espera, o primeiro da fila
+        recebe a reserva na mesma transação e o contador não muda.
+        """
+        removida = session.execute(
+            delete(Reserva).where(Reserva.membro_id == membro_id, Reserva.aula_id == aula_id)
+        ).rowcount
+        if not removida:
+            saiu_da_lista = session.execute(
+                delete(ListaEspera).where(ListaEspera.membro_id == membro_id, ListaEspera.aula_id == aula_id)
+            ).rowcount
+            confirmar(session)
+            return ResultadoCancelamento(bool(saiu_da_lista), None)
+
+        # O DELETE acima já deu à transação o lock de escrita; a fila não muda até o commit
+        proximo = session.execute(
+            select(ListaEspera.id, ListaEspera.membro_id)
+            .where(ListaEspera.aula_id == aula_id)
+            .order_by(ListaEspera.id)
+            .limit(1)
+            .with_for_update()
+        ).first()
+        if proximo is None:
+            session.execute(
+                update(AulaGinastica)
+                .where(AulaGinastica.id == aula_id, AulaGinastica.vagas_ocupadas > 0)
+                .values(vagas_ocupadas=AulaGinastica.vagas_ocupadas - 1)
+            )
+            confirmar(session)
+            return ResultadoCancelamento(True, None)
+
+        session.execute(delete(ListaEspera).where(ListaEspera.id == proximo.id))
+        session.add(Reserva(proximo.membro_id, aula_id))
+        confirmar(session)
+        return ResultadoCancelamento(True, proximo.membro_id)
+
+    @staticmethod
+    def vagas_disponiveis(session, aula_id):
+        """Vagas livres da aula, lidas do contador (sem carregar as reservas)."""
+        linha = session.execute(
+            select(AulaGinastica.capacidade_max, AulaGinastica.vagas_ocupadas).where(AulaGinastica.id == aula_id)
+        ).first()
+        if linha is None:
+            raise ValueError(f"Aula com ID {aula_id} não encontrada.")
+        return max(linha.capacidade_max - linha.vagas_ocupadas, 0)
+
+    @staticmethod
+    def lista_de_espera(session, aula_id):
+        """Membros na lista de espera da aula, em ordem de chegada: (posição, membro_id)."""
+        membros = session.scalars(
+            select(ListaEspera.membro_id).where(ListaEspera.aula_id == aula_id).order_by(ListaEspera.id)
+        )
+        return list(enumerate(membros, start=1))
+
+    @staticmethod
+    def reconciliar_ocupacao(session):
+        """Recalcula `vagas_ocupadas` a partir das reservas (após cargas ou SQL feitos fora do serviço).
+
+        Retorna quantas aulas estavam com o contador divergente.
+        """
+        contagem = (
+            select(func.count(Reserva.id)).where(Reserva.aula_id == AulaGinastica.id).scalar_subquery()
+        )
+        divergentes = session.execute(
+            update(AulaGinastica)
+            .where(AulaGinastica.vagas_ocupadas != contagem)
+            .values(vagas_ocupadas=contagem)
+        ).rowcount
+        confirmar(session)
+        return divergentes
@@ -0,0 +1,84 @@
+"""Registros de dados retornados pelos modelos e serviços, sem formatação.
+
+Os serviços (models/servicos.py) e os métodos `dados()` dos modelos retornam
+estas tuplas nomeadas em vez de imprimir: quem chama recebe valores simples,
+desligados da sessão, e decide como apresentar. O texto do menu (main.py) e dos
+antigos exibir_detalhes/display_details sai de `formatar`.
+"""
+
+from collections import namedtuple
+
+# --- academia.db ---
+DadosPessoa = namedtuple("DadosPessoa", ["id", "nome", "idade"])
+# modalidades: tupla com os nomes, em ordem alfabética
+DadosAluno = namedtuple("DadosAluno", ["id", "nome", "idade", "matricula", "modalidades"])
+DadosInstrutor = namedtuple("DadosInstrutor", ["id", "nome", "idade", "cref"])
+DadosModalidade = namedtuple("DadosModalidade", ["id", "nome", "descricao"])
+DadosMatricula = namedtuple("DadosMatricula", ["aluno_id", "aluno", "modalidade_id", "modalidade"])
+# alunos: iterável de (id, nome, matricula), lido do banco em blocos à medida que é percorrido
+AlunosDaModalidade = namedtuple("AlunosDaModalidade", ["id", "nome", "alunos"])
+# rejeitados: tupla de (numero_linha, motivo), na ordem do arquivo (models/importacao.py)
+ResumoImportacao = namedtuple("ResumoImportacao", ["inseridos", "rejeitados"])
+
+# --- Ginásio (models/models.py) ---
+DadosMembro = namedtuple(
+    "DadosMembro", ["id", "nome", "contacto", "data_adesao", "tipo_subscricao", "estado_pagamento"]
+)
+DadosInstrutorGinasio = namedtuple("DadosInstrutorGinasio", ["id", "nome", "contacto", "especializacao"])
+DadosAula = namedtuple("DadosAula", ["id", "nome", "horario", "instrutor", "vagas_ocupadas", "capacidade_max"])
+DadosEquipamento = namedtuple(
+    "DadosEquipamento", ["id", "nome", "tipo", "data_ultima_manutencao", "proxima_manutencao"]
+)
+
+
+def _data(valor, vazio):
+    return valor.strftime("%Y-%m-%d") if valor else vazio
+
+
+_FORMATOS = {
+    DadosPessoa: lambda d: f"Pessoa: {d.nome}, Idade: {d.idade}",
+    DadosAluno: lambda d: (
+        f"Aluno: {d.nome}, Idade: {d.idade}, Matrícula: {d.matricula}, "
+        f"Modalidades: {' | '.join(d.modalidades) or 'Nenhuma modalidade cadastrada'}"
+    ),
+    DadosInstrutor: lambda d: f"Instrutor: {d.nome}, Idade: {d.idade}, CREF: {d.cref}",
+    DadosModalidade: lambda d: f"Modalidade: {d.nome}, Descrição: {d.descricao or 'Sem descrição'}",
+    DadosMatricula: lambda d: f"Aluno: {d.aluno} matriculado em: {d.modalidade}",
+    ResumoImportacao: lambda d: "\n".join([
+        f"Registros inseridos: {d.inseridos}",
+        f"Registros rejeitados: {len(d.rejeitados)}",
+        *(f"  Linha {numero}: {motivo}" for numero, motivo in d.rejeitados),
+    ]),
+    DadosMembro: lambda d: (
+        f"Membro: {d.nome} (ID: {d.id})\n"
+        f"  Contacto: {d.contacto}\n"
+        f"  Adesão: {_data(d.data_adesao, '')}\n"
+        f"  Subscrição: {d.tipo_subscricao}\n"
+        f"  Pagamento: {d.estado_pagamento}"
+    ),
+    DadosInstrutorGinasio: lambda d: (
+        f"Instrutor: {d.nome} (ID: {d.id})\n"
+        f"  Contacto: {d.contacto}\n"
+        f"  Especialização: {d.especializacao}"
+    ),
+    DadosAula: lambda d: (
+        f"Aula: {d.nome} (ID: {d.id})\n"
+        f"  Horário: {d.horario}\n"
+        f"  Instrutor: {d.instrutor or 'N/A'}\n"
+        f"  Capacidade: {d.vagas_ocupadas}/{d.capacidade_max} (Vagas: {d.capacidade_max - d.vagas_ocupadas})"
+    ),
+    DadosEquipamento: lambda d: (
+        f"Equipamento: {d.nome} (ID: {d.id})\n"
+        f"  Tipo: {d.tipo}\n"
+        f"  Última Manutenção: {_data(d.data_ultima_manutencao, 'Nenhuma')}\n"
+        f"  Próxima Manutenção: {_data(d.proxima_manutencao, 'Não agendada')}"
+    ),
+}
+
+
+def formatar(dados):
+    """Texto de exibição de um registro deste módulo (uma ou mais linhas)."""
+    try:
+        return _FORMATOS[type(dados)](dados)
+    except KeyError:
+        raise ValueError(f"Sem formato de exibição para {type(dados).__name__}.") from None
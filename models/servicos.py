@@ -1,124 +1,326 @@
+from collections import namedtuple
+
+from sqlalchemy import delete, update, select, func
+from sqlalchemy.orm.exc import StaleDataError
+
+from models.base import insert_com_conflito
+from models.pessoa import Pessoa
 from models.aluno import Aluno
 from models.instrutor import Instrutor
 from models.modalidade import Modalidade
 from models.matricula import Matricula
+from models.relatorios import RelatorioService
+from models.cache import CacheService
+from models.paginacao import paginar_pessoas, TAMANHO_PAGINA_PADRAO
+from models.transacao import confirmar, em_unidade_de_trabalho
+from models.resultados import AlunosDaModalidade
+from models.exclusao import simular_exclusao, excluir_em_cascata
+
+
+def _preparar_alteracoes(alteracoes, campos):
+    """Valida as alterações em lote e converte para parâmetros de UPDATE por id.
+
+    `campos` mapeia o nome do campo para (atributo mapeado, função de validação).
+    Qualquer valor inválido interrompe o lote antes de gravar algo.
+    """
+    parametros = []
+    for alteracao in alteracoes:
+        if "id" not in alteracao:
+            raise ValueError("Cada alteração em lote precisa informar o 'id'.")
+        linha = {"id": alteracao["id"]}
+        for campo, valor in alteracao.items():
+            if campo == "id":
+                continue
+            if campo not in campos:
+                raise ValueError(f"Campo desconhecido na alteração em lote: {campo}")
+            atributo, validar = campos[campo]
+            linha[atributo] = validar(valor)
+        if len(linha) > 1:
+            parametros.append(linha)
+    return parametros
+
+
+def _aplicar_alteracoes(session, modelo, parametros):
+    """Executa o UPDATE em lote; um id inexistente invalida o lote inteiro."""
+    try:
+        session.execute(update(modelo), parametros)
+    except StaleDataError:
+        if not em_unidade_de_trabalho(session):
+            session.rollback()
+        raise ValueError("Alteração em lote com id inexistente; nada foi gravado.")
+    confirmar(session)
+
+
+def _excluir(session, modelo, ids, simular):
+    """Exclusão por conjunto (veja models.exclusao); com `simular` só conta."""
+    if simular:
+        return simular_exclusao(session, modelo, ids)
+    contagem = excluir_em_cascata(session, modelo, ids)
+    confirmar(session)
+    return contagem
+
+
+def comando_inserir_matricula(session, aluno_id, modalidade_id):
+    """INSERT ... ON CONFLICT DO NOTHING da matrícula (usado também pela versão assíncrona).
+
+    Marcado com `indice_matricula` para o índice de matrículas (models/indice_matriculas.py)
+    aplicar só esta matrícula em vez de ser remontado.
+    """
+    return (
+        insert_com_conflito(session, Matricula)
+        .values(aluno_id=aluno_id, modalidade_id=modalidade_id)
+        .on_conflict_do_nothing(index_elements=["aluno_id", "modalidade_id"])
+        .execution_options(indice_matricula=(aluno_id, modalidade_id))
+    )
+
+
+def comando_excluir_matricula(aluno_id, modalidade_id):
+    """DELETE da matrícula (usado também pela versão assíncrona)."""
+    return (
+        delete(Matricula)
+        .where(Matricula.aluno_id == aluno_id, Matricula.modalidade_id == modalidade_id)
+        .execution_options(indice_matricula=(aluno_id, modalidade_id))
+    )
+
+
+def comandos_contadores_matricula(aluno_id, modalidade_id, delta):
+    """UPDATEs dos contadores desnormalizados para uma matrícula criada (+1) ou cancelada (-1).
+
+    Executados na mesma transação da matrícula; marcados com `apenas_contadores`
+    para o cache não descartar o catálogo de modalidades a cada matrícula.
+    """
+    modalidades = Modalidade.__table__
+    alunos = Aluno.__table__
+    return (
+        update(modalidades)
+        .where(modalidades.c.id == modalidade_id)
+        .values(total_matriculas=modalidades.c.total_matriculas + delta)
+        .execution_options(apenas_contadores=True),
+        update(alunos)
+        .where(alunos.c.id == aluno_id)
+        .values(total_modalidades=alunos.c.total_modalidades + delta)
+        .execution_options(apenas_contadores=True),
+    )
+
+
+# Quantidade de linhas cujo contador estava diferente da contagem real de matrículas
+DivergenciasContadores = namedtuple("DivergenciasContadores", ["modalidades", "alunos"])
+
+
+def _validar_descricao(valor):
+    return valor or ""
+
+
+CAMPOS_ALUNO = {
+    "nome": ("_nome", Pessoa.validar_nome),
+    "idade": ("_idade", Pessoa.validar_idade),
+    "matricula": ("_matricula", Aluno.validar_matricula),
+}
+
+CAMPOS_INSTRUTOR = {
+    "nome": ("_nome", Pessoa.validar_nome),
+    "idade": ("_idade", Pessoa.validar_idade),
+    "cref": ("_cref", Instrutor.validar_cref),
+}
+
+CAMPOS_MODALIDADE = {
+    "nome": ("nome", Modalidade.validar_nome),
+    "descricao": ("descricao", _validar_descricao),
+}
 
 
 class AlunoService:
+    @staticmethod
+    def listar(session, limite=TAMANHO_PAGINA_PADRAO, cursor=None, prefixo_nome=None, idade_min=None, idade_max=None):
+        """Retorna uma Pagina de (id, nome, idade, matricula); veja models.paginacao."""
+        colunas = (Aluno._idade.label("idade"), Aluno._matricula.label("matricula"))
+        return paginar_pessoas(session, Aluno, colunas, limite, cursor, prefixo_nome, idade_min, idade_max)
+
     @staticmethod
     def editar(session, aluno_id, nome=None, idade=None, matricula=None):
-        aluno = session.query(Aluno).get(aluno_id)
+        """Altera os campos informados. Retorna DadosAluno atualizado, ou None se o aluno não existe."""
+        aluno = session.get(Aluno, aluno_id)
         if not aluno:
-            print("Aluno não encontrado.")
-            return
+            return None
         if nome:
             aluno.nome = nome
         if idade:
             aluno.idade = idade
         if matricula:
             aluno.matricula = matricula
-        session.commit()
-        print("Aluno atualizado com sucesso.")
+        # Montado antes do commit, que expiraria o objeto e forçaria um novo SELECT
+        dados = aluno.dados()
+        confirmar(session)
+        return dados
 
     @staticmethod
     def excluir(session, aluno_id):
-        aluno = session.query(Aluno).get(aluno_id)
-        if aluno:
-            session.delete(aluno)
-            session.commit()
-            print("Aluno excluído com sucesso.")
-        else:
-            print("Aluno não encontrado.")
+        """Apaga o aluno e suas matrículas; ContagemExclusao com registros=0 se ele não existe."""
+        return _excluir(session, Aluno, [aluno_id], simular=False)
+
+    @staticmethod
+    def editar_em_lote(session, alteracoes):
+        """Aplica várias edições com UPDATEs em lote pela chave primária.
+
+        `alteracoes` é uma lista de dicts com "id" e os campos a alterar
+        (nome, idade, matricula). Um valor inválido ou id inexistente cancela o
+        lote inteiro com ValueError. Retorna a quantidade de alunos alterados.
+        """
+        parametros = _preparar_alteracoes(alteracoes, CAMPOS_ALUNO)
+        if parametros:
+            _aplicar_alteracoes(session, Aluno, parametros)
+        return len(parametros)
+
+    @staticmethod
+    def excluir_em_lote(session, aluno_ids, simular=False):
+        """Apaga vários alunos e suas matrículas com DELETEs por conjunto de ids.
+
+        Com `simular=True` nada é apagado; apenas retorna a ContagemExclusao prevista.
+        """
+        return _excluir(session, Aluno, aluno_ids, simular)
 
 
 class InstrutorService:
+    @staticmethod
+    def listar(session, limite=TAMANHO_PAGINA_PADRAO, cursor=None, prefixo_nome=None, idade_min=None, idade_max=None):
+        """Retorna uma Pagina de (id, nome, idade, cref); veja models.paginacao."""
+        colunas = (Instrutor._idade.label("idade"), Instrutor._cref.label("cref"))
+        return paginar_pessoas(session, Instrutor, colunas, limite, cursor, prefixo_nome, idade_min, idade_max)
+
     @staticmethod
     def editar(session, instrutor_id, nome=None, idade=None, cref=None):
-        instrutor = session.query(Instrutor).get(instrutor_id)
+        """Como AlunoService.editar; retorna DadosInstrutor ou None."""
+        instrutor = session.get(Instrutor, instrutor_id)
         if not instrutor:
-            print("Instrutor não encontrado.")
-            return
+            return None
         if nome:
             instrutor.nome = nome
         if idade:
             instrutor.idade = idade
         if cref:
             instrutor.cref = cref
-        session.commit()
-        print("Instrutor atualizado com sucesso.")
+        dados = instrutor.dados()
+        confirmar(session)
+        return dados
 
     @staticmethod
     def excluir(session, instrutor_id):
-        instrutor = session.query(Instrutor).get(instrutor_id)
-        if instrutor:
-            session.delete(instrutor)
-            session.commit()
-            print("Instrutor excluído com sucesso.")
-        else:
-            print("Instrutor não encontrado.")
+        return _excluir(session, Instrutor, [instrutor_id], simular=False)
+
+    @staticmethod
+    def editar_em_lote(session, alteracoes):
+        """Como AlunoService.editar_em_lote, com os campos nome, idade e cref."""
+        parametros = _preparar_alteracoes(alteracoes, CAMPOS_INSTRUTOR)
+        if parametros:
+            _aplicar_alteracoes(session, Instrutor, parametros)
+        return len(parametros)
+
+    @staticmethod
+    def excluir_em_lote(session, instrutor_ids, simular=False):
+        return _excluir(session, Instrutor, instrutor_ids, simular)
 
 
 class ModalidadeService:
     @staticmethod
     def editar(session, modalidade_id, nome=None, descricao=None):
-        modalidade = session.query(Modalidade).get(modalidade_id)
+        """Como AlunoService.editar; retorna DadosModalidade ou None."""
+        modalidade = session.get(Modalidade, modalidade_id)
         if not modalidade:
-            print("Modalidade não encontrada.")
-            return
+            return None
         if nome:
             modalidade.nome = nome
         if descricao is not None:
             modalidade.descricao = descricao
-        session.commit()
-        print("Modalidade atualizada com sucesso.")
+        dados = modalidade.dados()
+        confirmar(session)
+        return dados
 
     @staticmethod
     def excluir(session, modalidade_id):
-        modalidade = session.query(Modalidade).get(modalidade_id)
-        if modalidade:
-            session.delete(modalidade)
-            session.commit()
-            print("Modalidade excluída com sucesso.")
-        else:
-            print("Modalidade não encontrada.")
+        return _excluir(session, Modalidade, [modalidade_id], simular=False)
+
+    @staticmethod
+    def editar_em_lote(session, alteracoes):
+        """Como AlunoService.editar_em_lote, com os campos nome e descricao."""
+        parametros = _preparar_alteracoes(alteracoes, CAMPOS_MODALIDADE)
+        if parametros:
+            _aplicar_alteracoes(session, Modalidade, parametros)
+        return len(parametros)
+
+    @staticmethod
+    def excluir_em_lote(session, modalidade_ids, simular=False):
+        """Como AlunoService.excluir_em_lote, para modalidades e suas matrículas."""
+        return _excluir(session, Modalidade, modalidade_ids, simular)
 
 
 class MatriculaService:
+    @staticmethod
+    def inserir(session, aluno_id, modalidade_id):
+        """Insere a matrícula em um único comando (INSERT ... ON CONFLICT DO NOTHING).
+
+        Retorna False se o aluno já estava matriculado; o índice único
+        uq_matriculas_aluno_modalidade garante isso mesmo com acessos concorrentes.
+        """
+        if session.execute(comando_inserir_matricula(session, aluno_id, modalidade_id)).rowcount == 0:
+            return False
+        for comando in comandos_contadores_matricula(aluno_id, modalidade_id, 1):
+            session.execute(comando)
+        return True
+
     @staticmethod
     def matricular(session, aluno_id, modalidade_id):
-        matricula_existente = session.query(Matricula).filter_by(aluno_id=aluno_id, modalidade_id=modalidade_id).first()
-        if matricula_existente:
-            print("Aluno já está matriculado nessa modalidade.")
-            return
-        nova_matricula = Matricula(aluno_id=aluno_id, modalidade_id=modalidade_id)
-        session.add(nova_matricula)
-        session.commit()
-        print("Aluno matriculado com sucesso.")
+        """Matricula e confirma. Retorna False se o aluno já estava matriculado."""
+        if not MatriculaService.inserir(session, aluno_id, modalidade_id):
+            return False
+        confirmar(session)
+        return True
 
     @staticmethod
     def cancelar(session, aluno_id, modalidade_id):
-        matricula = session.query(Matricula).filter_by(aluno_id=aluno_id, modalidade_id=modalidade_id).first()
-        if matricula:
-            session.delete(matricula)
-            session.commit()
-            print("Matrícula cancelada com sucesso.")
-        else:
-            print("Matrícula não encontrada.")
+        """Remove a matrícula e confirma. Retorna False se ela não existia."""
+        if session.execute(comando_excluir_matricula(aluno_id, modalidade_id)).rowcount:
+            for comando in comandos_contadores_matricula(aluno_id, modalidade_id, -1):
+                session.execute(comando)
+            confirmar(session)
+            return True
+        return False
+
+    @staticmethod
+    def reconciliar_contadores(session, corrigir=True):
+        """Confere total_matriculas e total_modalidades com as matrículas gravadas.
+
+        Com `corrigir`, regrava em massa só as linhas divergentes (um UPDATE por
+        tabela); sem ele, apenas conta. Retorna DivergenciasContadores.
+        """
+        divergencias = []
+        for tabela, contador, coluna in (
+            (Modalidade.__table__, "total_matriculas", Matricula.modalidade_id),
+            (Aluno.__table__, "total_modalidades", Matricula.aluno_id),
+        ):
+            real = select(func.count(Matricula.id)).where(coluna == tabela.c.id).scalar_subquery()
+            divergente = tabela.c[contador] != real
+            if corrigir:
+                quantidade = session.execute(update(tabela).where(divergente).values({contador: real})).rowcount
+            else:
+                quantidade = session.scalar(select(func.count()).select_from(tabela).where(divergente))
+            divergencias.append(quantidade)
+        if corrigir:
+            confirmar(session)
+        return DivergenciasContadores(*divergencias)
 
     @staticmethod
     def listar_alunos_por_modalidade(session, modalidade_id):
-        modalidade = session.query(Modalidade).get(modalidade_id)
+        """AlunosDaModalidade com os alunos em ordem de nome, ou None se a modalidade não existe.
+
+        Os alunos são lidos em blocos à medida que `alunos` é percorrido.
+        """
+        modalidade = CacheService.modalidade(session, modalidade_id)
         if not modalidade:
-            print("Modalidade não encontrada.")
-            return
-        print(f"\nAlunos matriculados em {modalidade.nome}:")
-        for matricula in modalidade.matriculas:
-            print(f"- {matricula.aluno.nome} (ID: {matricula.aluno.id})")
+            return None
+        alunos = RelatorioService.iterar_alunos_por_modalidade(session, modalidade_id)
+        return AlunosDaModalidade(modalidade.id, modalidade.nome, alunos)
 
     @staticmethod
     def relatorio_quantidade_alunos_por_modalidade(session):
-        modalidades = session.query(Modalidade).all()
-        print("\nRelatório - Quantidade de alunos por modalidade:")
-        for modalidade in modalidades:
-            qtd = len(modalidade.matriculas)
-            print(f"{modalidade.nome}: {qtd} aluno(s)")
+        """(id, nome, quantidade) de cada modalidade, por nome."""
+        return CacheService.quantidade_alunos_por_modalidade(session)
@@ -0,0 +1,133 @@
+"""Versão assíncrona dos serviços (AsyncSession) para o quiosque e as catracas de check-in.
+
+Requer as dependências opcionais: pip install "sqlalchemy[asyncio]" aiosqlite
+
+As leituras (listagens, consulta do aluno na catraca, relatórios) executam as
+mesmas consultas dos serviços síncronos, de forma nativamente assíncrona. As
+gravações reaproveitam os serviços de models/servicos.py com AsyncSession.run_sync,
+então validações, lotes e exclusões em cascata têm uma única implementação.
+
+    fabrica = criar_fabrica_sessoes_async()
+    async with fabrica() as session:
+        aluno = await AlunoServiceAsync.buscar_por_matricula(session, 1234)
+"""
+
+import functools
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from models.base import criar_engine_async
+from models.aluno import Aluno
+from models.modalidade import Modalidade
+from models.matricula import Matricula
+from models.instrutor import Instrutor
+from models.servicos import (
+    AlunoService, InstrutorService, ModalidadeService, MatriculaService,
+)
+from models.relatorios import RelatorioService
+from models.busca import consulta_busca
+from models.paginacao import consulta_pagina, montar_pagina, TAMANHO_PAGINA_PADRAO
+
+
+def criar_fabrica_sessoes_async(url=None, **sobrescritas):
+    """Cria o engine assíncrono (mesma configuração do síncrono) e a fábrica de AsyncSession."""
+    # expire_on_commit=False: atributos lidos após o commit não disparam I/O implícito
+    return async_sessionmaker(criar_engine_async(url, **sobrescritas), expire_on_commit=False)
+
+
+def _via_run_sync(metodo):
+    """Expõe um método síncrono de serviço como corrotina executada com run_sync."""
+    @functools.wraps(metodo)
+    async def executar(session, *args, **kwargs):
+        return await session.run_sync(lambda sessao: metodo(sessao, *args, **kwargs))
+    return staticmethod(executar)
+
+
+async def _pagina(session, modelo, colunas, limite, cursor, prefixo_nome, idade_min, idade_max):
+    consulta = consulta_pagina(modelo, colunas, limite, cursor, prefixo_nome, idade_min, idade_max)
+    return montar_pagina((await session.execute(consulta)).all(), limite)
+
+
+class AlunoServiceAsync:
+    @staticmethod
+    async def listar(session, limite=TAMANHO_PAGINA_PADRAO, cursor=None, prefixo_nome=None, idade_min=None, idade_max=None):
+        """Como AlunoService.listar."""
+        colunas = (Aluno._idade.label("idade"), Aluno._matricula.label("matricula"))
+        return await _pagina(session, Aluno, colunas, limite, cursor, prefixo_nome, idade_min, idade_max)
+
+    @staticmethod
+    async def buscar_por_matricula(session, matricula):
+        """Consulta da catraca: (id, nome, matricula) do aluno ou None (índice único de matrícula)."""
+        consulta = select(Aluno.id, Aluno._nome.label("nome"), Aluno._matricula.label("matricula")).where(
+            Aluno._matricula == matricula
+        )
+        return (await session.execute(consulta)).first()
+
+    @staticmethod
+    async def modalidades(session, aluno_id):
+        """(id, nome) das modalidades do aluno, em ordem alfabética."""
+        consulta = (
+            select(Modalidade.id, Modalidade.nome)
+            .join(Matricula, Matricula.modalidade_id == Modalidade.id)
+            .where(Matricula.aluno_id == aluno_id)
+            .order_by(Modalidade.nome)
+        )
+        return (await session.execute(consulta)).all()
+
+    @staticmethod
+    async def buscar(session, termo, limite=20):
+        """Busca de alunos por nome (FTS5), como BuscaService.buscar."""
+        busca = consulta_busca(termo, "aluno", limite)
+        if busca is None:
+            return []
+        return (await session.execute(*busca)).all()
+
+    editar = _via_run_sync(AlunoService.editar)
+    excluir = _via_run_sync(AlunoService.excluir)
+    editar_em_lote = _via_run_sync(AlunoService.editar_em_lote)
+    excluir_em_lote = _via_run_sync(AlunoService.excluir_em_lote)
+
+
+class InstrutorServiceAsync:
+    @staticmethod
+    async def listar(session, limite=TAMANHO_PAGINA_PADRAO, cursor=None, prefixo_nome=None, idade_min=None, idade_max=None):
+        """Como InstrutorService.listar."""
+        colunas = (Instrutor._idade.label("idade"), Instrutor._cref.label("cref"))
+        return await _pagina(session, Instrutor, colunas, limite, cursor, prefixo_nome, idade_min, idade_max)
+
+    editar = _via_run_sync(InstrutorService.editar)
+    excluir = _via_run_sync(InstrutorService.excluir)
+    editar_em_lote = _via_run_sync(InstrutorService.editar_em_lote)
+    excluir_em_lote = _via_run_sync(InstrutorService.excluir_em_lote)
+
+
+class ModalidadeServiceAsync:
+    @staticmethod
+    async def listar(session):
+        """(id, nome, descricao) de todas as modalidades, por nome."""
+        consulta = select(Modalidade.id, Modalidade.nome, Modalidade.descricao).order_by(Modalidade.nome)
+        return (await session.execute(consulta)).all()
+
+    editar = _via_run_sync(ModalidadeService.editar)
+    excluir = _via_run_sync(ModalidadeService.excluir)
+    editar_em_lote = _via_run_sync(ModalidadeService.editar_em_lote)
+    excluir_em_lote = _via_run_sync(ModalidadeService.excluir_em_lote)
+
+
+class MatriculaServiceAsync:
+    @staticmethod
+    async def listar_alunos_por_modalidade(session, modalidade_id, limite=100, apos_id=None):
+        """Página de (id, nome, matricula), como RelatorioService.alunos_por_modalidade."""
+        consulta = RelatorioService.consulta_pagina_alunos_da_modalidade(modalidade_id, limite, apos_id)
+        return (await session.execute(consulta)).all()
+
+    @staticmethod
+    async def relatorio_quantidade_alunos_por_modalidade(session):
+        """(id, nome, quantidade) por modalidade, inclusive as vazias."""
+        consulta = RelatorioService.consulta_quantidade_alunos_por_modalidade()
+        return (await session.execute(consulta)).all()
+
+    inserir = _via_run_sync(MatriculaService.inserir)
+    matricular = _via_run_sync(MatriculaService.matricular)
+    cancelar = _via_run_sync(MatriculaService.cancelar)
@@ -0,0 +1,47 @@
+"""Unidade de trabalho: agrupa várias chamadas de serviço em um único commit.
+
+Os serviços chamam `confirmar(session)` no lugar de `session.commit()`. Fora de
+uma unidade de trabalho o efeito é o mesmo (commit imediato); dentro dela as
+alterações só recebem flush e o commit (um único fsync) acontece no final.
+
+    with unidade_de_trabalho(session):
+        for aluno_id, nome in alteracoes:
+            AlunoService.editar(session, aluno_id, nome=nome)
+"""
+
+from contextlib import contextmanager
+
+_CHAVE_PROFUNDIDADE = "unidade_de_trabalho"
+
+
+@contextmanager
+def unidade_de_trabalho(session):
+    """Abre uma unidade de trabalho; blocos aninhados participam da mais externa.
+
+    Em caso de exceção tudo o que foi feito dentro do bloco é desfeito.
+    """
+    profundidade = session.info.get(_CHAVE_PROFUNDIDADE, 0)
+    session.info[_CHAVE_PROFUNDIDADE] = profundidade + 1
+    try:
+        yield session
+        if profundidade == 0:
+            session.commit()
+    except Exception:
+        if profundidade == 0:
+            session.rollback()
+        raise
+    finally:
+        session.info[_CHAVE_PROFUNDIDADE] = profundidade
+
+
+def em_unidade_de_trabalho(session):
+    return session.info.get(_CHAVE_PROFUNDIDADE, 0) > 0
+
+
+def confirmar(session):
+    """Faz commit, ou apenas flush se houver uma unidade de trabalho aberta."""
+    if em_unidade_de_trabalho(session):
+        session.flush()
+    else:
+        session.commit()
+
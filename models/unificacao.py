@@ -0,0 +1,242 @@
+"""Cópia dos dados de um ginásio.db (models/models.py) para o academia.db unificado.
+
+A partir da migração v5 o academia.db tem as tabelas do ginásio, e pessoas e
+instrutores passam a ser compartilhados (colunas contacto e especializacao). Os
+ids dos dois bancos colidem, então cada registro copiado recebe um id novo e o
+par (id de origem, id de destino) fica em `unificacao_ids`; as chaves
+estrangeiras (instrutor da aula, membro e aula da reserva) são traduzidas por ele.
+
+A cópia é feita em lotes, cada um em sua própria transação curta, para que o
+balcão continue gravando durante a unificação. O de-para é gravado no mesmo
+commit do lote: se a cópia for interrompida, rodar de novo continua de onde
+parou, sem duplicar registros.
+"""
+
+import os
+import pathlib
+import sqlite3
+import time
+from collections import namedtuple
+
+from sqlalchemy import create_engine, select, insert, update, func
+from sqlalchemy.sql import table, column
+
+from models.pessoa import Pessoa, IDENTIDADES_GINASIO
+from models.instrutor import Instrutor
+from models import models as ginasio, preparar_banco
+from models.migracoes import MIGRACOES_GINASIO, versao_atual
+
+TAMANHO_LOTE_PADRAO = 1000
+
+# copiados: registros gravados no destino; ignorados: sem correspondência (ex.: reserva de membro inexistente)
+ResultadoUnificacao = namedtuple("ResultadoUnificacao", ["tabela", "copiados", "ignorados"])
+
+_unificacao_ids = table(
+    "unificacao_ids", column("tabela"), column("id_origem"), column("id_destino")
+)
+
+
+def _marca_dagua(conexao, tabela):
+    """Maior id de origem já copiado da tabela (0 se nenhum)."""
+    return conexao.scalar(
+        select(func.coalesce(func.max(_unificacao_ids.c.id_origem), 0)).where(_unificacao_ids.c.tabela == tabela)
+    )
+
+
+def _traduzir(conexao, tabela, ids_origem):
+    """{id de origem: id de destino} dos ids informados."""
+    ids_origem = {id_origem for id_origem in ids_origem if id_origem is not None}
+    if not ids_origem:
+        return {}
+    return dict(conexao.execute(
+        select(_unificacao_ids.c.id_origem, _unificacao_ids.c.id_destino)
+        .where(_unificacao_ids.c.tabela == tabela, _unificacao_ids.c.id_origem.in_(ids_origem))
+    ).all())
+
+
+def _inserir(conexao, tabela, tabela_destino, linhas, valores):
+    """Insere `valores` (um dict por linha de origem) e registra o de-para dos ids."""
+    novos_ids = conexao.execute(
+        insert(tabela_destino).returning(tabela_destino.c.id, sort_by_parameter_order=True), valores
+    ).scalars().all()
+    conexao.execute(insert(_unificacao_ids), [
+        {"tabela": tabela, "id_origem": linha.id, "id_destino": novo_id}
+        for linha, novo_id in zip(linhas, novos_ids)
+    ])
+    return dict(zip((linha.id for linha in linhas), novos_ids))
+
+
+def _copiar_pessoas(conexao, linhas):
+    validas = [linha for linha in linhas if linha.tipo in IDENTIDADES_GINASIO]
+    if not validas:
+        return 0
+    novos = _inserir(conexao, "pessoas", Pessoa.__table__, validas, [
+        {"nome": linha.nome, "contacto": linha.contacto, "tipo": linha.tipo} for linha in validas
+    ])
+    membros = [linha for linha in validas if linha.tipo == "membro"]
+    instrutores = [linha for linha in validas if linha.tipo == "instrutor_ginasio"]
+    if membros:
+        conexao.execute(insert(ginasio.Membro.__table__), [
+            {"id": novos[linha.id], "data_adesao": linha.data_adesao, "tipo_subscricao": linha.tipo_subscricao,
+             "estado_pagamento": linha.estado_pagamento, "pago_ate": linha.pago_ate}
+            for linha in membros
+        ])
+    if instrutores:
+        # Instrutores do ginásio não têm CREF: entram com cref NULL
+        conexao.execute(insert(Instrutor.__table__), [
+            {"id": novos[linha.id], "especializacao": linha.especializacao} for linha in instrutores
+        ])
+    return len(validas)
+
+
+def _copiar_aulas(conexao, linhas):
+    instrutores = _traduzir(conexao, "pessoas", (linha.instrutor_id for linha in linhas))
+    _inserir(conexao, "aulas", ginasio.AulaGinastica.__table__, linhas, [
+        {"nome": linha.nome, "horario": linha.horario, "capacidade_max": linha.capacidade_max,
+         "vagas_ocupadas": linha.vagas_ocupadas, "instrutor_id": instrutores.get(linha.instrutor_id)}
+        for linha in linhas
+    ])
+    return len(linhas)
+
+
+def _copiar_horarios_aulas(conexao, linhas):
+    aulas = _traduzir(conexao, "aulas", (linha.aula_id for linha in linhas))
+    validas = [linha for linha in linhas if linha.aula_id in aulas]
+    if validas:
+        _inserir(conexao, "horarios_aulas", ginasio.HorarioAula.__table__, validas, [
+            {"aula_id": aulas[linha.aula_id], "dia_semana": linha.dia_semana, "inicio": linha.inicio,
+             "fim": linha.fim, "sala": linha.sala}
+            for linha in validas
+        ])
+    return len(validas)
+
+
+def _copiador_de_inscricoes(nome_tabela, tabela_destino, coluna_data):
+    """Reservas e lista de espera: traduz membro e aula; descarta as que não têm correspondência."""
+    def copiar(conexao, linhas):
+        membros = _traduzir(conexao, "pessoas", (linha.membro_id for linha in linhas))
+        aulas = _traduzir(conexao, "aulas", (linha.aula_id for linha in linhas))
+        validas = [linha for linha in linhas if linha.membro_id in membros and linha.aula_id in aulas]
+        if validas:
+            _inserir(conexao, nome_tabela, tabela_destino, validas, [
+                {coluna_data: getattr(linha, coluna_data), "membro_id": membros[linha.membro_id],
+                 "aula_id": aulas[linha.aula_id]}
+                for linha in validas
+            ])
+        return len(validas)
+    return copiar
+
+
+def _copiar_equipamentos(conexao, linhas):
+    _inserir(conexao, "equipamentos", ginasio.Equipamento.__table__, linhas, [
+        {"nome": linha.nome, "tipo": linha.tipo, "data_ultima_manutencao": linha.data_ultima_manutencao,
+         "proxima_manutencao": linha.proxima_manutencao}
+        for linha in linhas
+    ])
+    return len(linhas)
+
+
+def abrir_ginasio_somente_leitura(caminho_ginasio):
+    """Engine somente leitura sobre o ginásio.db, que precisa existir e estar migrado (ValueError).
+
+    Usado pela unificação e pela exportação (exportar.py --ginasio). Não usa
+    criar_engine: os PRAGMAs de produção (journal_mode=WAL) gravariam no arquivo.
+    """
+    if not os.path.isfile(caminho_ginasio):
+        raise ValueError(f"Banco do ginásio não encontrado: {caminho_ginasio}")
+    uri = pathlib.Path(caminho_ginasio).resolve().as_uri() + "?mode=ro"
+    engine_origem = create_engine("sqlite://", creator=lambda: sqlite3.connect(uri, uri=True))
+    try:
+        with engine_origem.connect() as conexao:
+            versao = versao_atual(conexao)
+    except Exception:
+        engine_origem.dispose()
+        raise
+    if versao < len(MIGRACOES_GINASIO):
+        engine_origem.dispose()
+        raise ValueError(
+            f"{caminho_ginasio} está na versão {versao} de {len(MIGRACOES_GINASIO)}; migre antes:"
+            f" python migrar.py aplicar --ginasio {caminho_ginasio}"
+        )
+    return engine_origem
+
+
+def _consultas_de_origem():
+    """(tabela, consulta de origem com as colunas usadas, função que grava um lote), na ordem das dependências."""
+    pessoas = ginasio.Pessoa.__table__
+    membros = ginasio.Membro.__table__
+    instrutores = ginasio.Instrutor.__table__
+    aulas = ginasio.AulaGinastica.__table__
+    horarios_aulas = ginasio.HorarioAula.__table__
+    reservas = ginasio.Reserva.__table__
+    lista_espera = ginasio.ListaEspera.__table__
+    equipamentos = ginasio.Equipamento.__table__
+    consulta_pessoas = (
+        select(pessoas.c.id, pessoas.c.nome, pessoas.c.contacto, pessoas.c.tipo, membros.c.data_adesao,
+               membros.c.tipo_subscricao, membros.c.estado_pagamento, membros.c.pago_ate,
+               instrutores.c.especializacao)
+        .select_from(pessoas.outerjoin(membros, membros.c.id == pessoas.c.id)
+                     .outerjoin(instrutores, instrutores.c.id == pessoas.c.id))
+    )
+    return [
+        ("pessoas", consulta_pessoas, _copiar_pessoas),
+        ("aulas", select(aulas), _copiar_aulas),
+        ("horarios_aulas", select(horarios_aulas), _copiar_horarios_aulas),
+        ("reservas", select(reservas), _copiador_de_inscricoes("reservas", reservas, "data_reserva")),
+        ("lista_espera", select(lista_espera),
+         _copiador_de_inscricoes("lista_espera", lista_espera, "data_entrada")),
+        ("equipamentos", select(equipamentos), _copiar_equipamentos),
+    ]
+
+
+def unificar_ginasio(engine_destino, caminho_ginasio, tamanho_lote=TAMANHO_LOTE_PADRAO, pausa=0.0, ao_lote=None):
+    """Copia o ginásio.db em `caminho_ginasio` para o banco de `engine_destino`.
+
+    O ginásio.db é aberto somente leitura e precisa estar com todas as
+    MIGRACOES_GINASIO aplicadas (ValueError se não existir ou estiver atrasado).
+    `pausa` (segundos) entre lotes dá folga a outros escritores; `ao_lote(tabela,
+    copiados_ate_agora)` é chamado após cada lote. Retorna uma lista de
+    ResultadoUnificacao, uma por tabela.
+    """
+    if tamanho_lote <= 0:
+        raise ValueError("Tamanho do lote deve ser inteiro positivo.")
+    engine_origem = abrir_ginasio_somente_leitura(caminho_ginasio)
+    resultados = []
+    try:
+        preparar_banco(engine_destino)
+        with engine_origem.connect() as origem:
+            for nome_tabela, consulta, copiar in _consultas_de_origem():
+                with engine_destino.connect() as conexao:
+                    apos = _marca_dagua(conexao, nome_tabela)
+                copiados = ignorados = 0
+                coluna_id = consulta.selected_columns.id
+                while True:
+                    linhas = origem.execute(
+                        consulta.where(coluna_id > apos).order_by(coluna_id).limit(tamanho_lote)
+                    ).all()
+                    if not linhas:
+                        break
+                    with engine_destino.begin() as conexao:
+                        gravados = copiar(conexao, linhas)
+                    copiados += gravados
+                    ignorados += len(linhas) - gravados
+                    apos = linhas[-1].id
+                    if ao_lote is not None:
+                        ao_lote(nome_tabela, copiados)
+                    if pausa:
+                        time.sleep(pausa)
+                resultados.append(ResultadoUnificacao(nome_tabela, copiados, ignorados))
+    finally:
+        engine_origem.dispose()
+
+    # O contador desnormalizado das aulas copiadas passa a refletir as reservas que vieram
+    aulas = ginasio.AulaGinastica.__table__
+    reservas = ginasio.Reserva.__table__
+    copiadas = select(_unificacao_ids.c.id_destino).where(_unificacao_ids.c.tabela == "aulas")
+    with engine_destino.begin() as conexao:
+        conexao.execute(
+            update(aulas)
+            .where(aulas.c.id.in_(copiadas))
+            .values(vagas_ocupadas=select(func.count()).where(reservas.c.aula_id == aulas.c.id).scalar_subquery())
+        )
+    return resultados
@@ -0,0 +1,197 @@
+"""Modo servidor: API HTTP/JSON para vários balcões e quiosques usarem o mesmo banco.
+
+Exemplos:
+    python servidor.py                       # http://127.0.0.1:8080, 8 trabalhadores
+    python servidor.py --porta 9000 --trabalhadores 16
+    python servidor.py --instantaneo 60      # relatórios leem uma cópia em memória, renovada a cada minuto
+
+Cada requisição usa a sua própria sessão (descartada ao final, sem identity map
+velho entre balcões). As requisições são atendidas por um pool fixo de threads,
+e as escritas passam uma de cada vez por uma trava no processo. Assim o SQLite
+(WAL) atende leituras em paralelo sem que escritores disputem o lock do arquivo.
+Com --instantaneo, os relatórios e listagens pesadas (rotas marcadas em
+models/api.py) leem um instantâneo em memória do banco (models/instantaneo.py).
+As rotas estão em models/api.py.
+"""
+
+import argparse
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import scoped_session
+
+from models import garantir_esquema
+from models.base import Session, configurar_logging
+from models.api import resolver, ErroApi
+from models.instantaneo import Instantaneo
+
+TRABALHADORES_PADRAO = 8
+# Tempo máximo (s) que uma escrita espera na fila antes de responder 503
+ESPERA_MAXIMA_ESCRITA = 10
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+
+# Uma sessão por thread, removida ao fim de cada requisição
+SessaoRequisicao = scoped_session(Session)
+
+logger = logging.getLogger("academia.servidor")
+
+
+class ManipuladorAcademia(BaseHTTPRequestHandler):
+    server_version = "Academia/1.0"
+
+    def do_GET(self):
+        self._atender(escrita=False)
+
+    def do_POST(self):
+        self._atender(escrita=True)
+
+    def do_PATCH(self):
+        self._atender(escrita=True)
+
+    def do_DELETE(self):
+        self._atender(escrita=True)
+
+    def _ler_corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            raise ErroApi(413, "Corpo da requisição muito grande.")
+        if not tamanho:
+            return {}
+        try:
+            corpo = json.loads(self.rfile.read(tamanho).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ErroApi(400, "Corpo da requisição não é um JSON válido.")
+        if not isinstance(corpo, dict):
+            raise ErroApi(400, "Corpo da requisição deve ser um objeto JSON.")
+        return corpo
+
+    def _atender(self, escrita):
+        try:
+            partes = urlsplit(self.path)
+            rota, ids = resolver(self.command, partes.path)
+            consulta = dict(parse_qsl(partes.query))
+            corpo = self._ler_corpo()
+            if escrita:
+                status, dados = self._executar_escrita(rota.funcao, consulta, corpo, ids)
+            elif rota.instantaneo and self.server.instantaneo is not None:
+                status, dados = self._executar_no_instantaneo(rota.funcao, consulta, corpo, ids)
+            else:
+                status, dados = self._executar(rota.funcao, consulta, corpo, ids)
+        except ErroApi as e:
+            status, dados = e.status, {"erro": e.mensagem}
+        except ValueError as e:
+            # Validações dos modelos (nome, idade, matrícula, CREF...)
+            status, dados = 400, {"erro": str(e)}
+        except IntegrityError:
+            status, dados = 409, {"erro": "Operação viola uma restrição do banco (registro duplicado ou inexistente)."}
+        except OperationalError:
+            logger.exception("Erro de banco em %s %s", self.command, self.path)
+            status, dados = 503, {"erro": "Banco de dados ocupado; tente novamente."}
+        except Exception:
+            logger.exception("Erro inesperado em %s %s", self.command, self.path)
+            status, dados = 500, {"erro": "Erro interno do servidor."}
+        self._responder(status, dados)
+
+    def _executar(self, funcao, consulta, corpo, ids):
+        sessao = SessaoRequisicao()
+        try:
+            return funcao(sessao, consulta, corpo, *ids)
+        finally:
+            SessaoRequisicao.remove()
+
+    def _executar_no_instantaneo(self, funcao, consulta, corpo, ids):
+        with self.server.instantaneo.sessao() as sessao:
+            return funcao(sessao, consulta, corpo, *ids)
+
+    def _executar_escrita(self, funcao, consulta, corpo, ids):
+        trava = self.server.trava_escrita
+        if not trava.acquire(timeout=ESPERA_MAXIMA_ESCRITA):
+            raise ErroApi(503, "Servidor ocupado com outras gravações; tente novamente.")
+        try:
+            return self._executar(funcao, consulta, corpo, ids)
+        finally:
+            trava.release()
+
+    def _responder(self, status, dados):
+        conteudo = json.dumps(dados, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, formato, *args):
+        logger.info("%s - %s", self.address_string(), formato % args)
+
+
+class ServidorAcademia(HTTPServer):
+    """HTTPServer que atende cada conexão em um pool fixo de threads."""
+
+    # Fila de conexões do socket; o padrão (5) recusa conexões em picos de vários balcões
+    request_queue_size = 128
+
+    def __init__(self, endereco, trabalhadores=TRABALHADORES_PADRAO, instantaneo=None):
+        super().__init__(endereco, ManipuladorAcademia)
+        self.trava_escrita = threading.Lock()
+        self.instantaneo = instantaneo
+        self._pool = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="academia")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._processar, request, client_address)
+
+    def _processar(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+        if self.instantaneo is not None:
+            self.instantaneo.fechar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON da academia.")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta (padrão: só esta máquina)")
+    parser.add_argument("--porta", type=int, default=8080)
+    parser.add_argument("--trabalhadores", type=int, default=TRABALHADORES_PADRAO, help="Threads do pool")
+    parser.add_argument("--instantaneo", type=float, metavar="SEGUNDOS",
+                        help="Relatórios leem uma cópia em memória do banco, renovada a cada SEGUNDOS")
+    args = parser.parse_args()
+    if args.instantaneo is not None and args.instantaneo <= 0:
+        parser.error("--instantaneo deve ser positivo.")
+
+    configurar_logging()
+    logging.getLogger("academia").setLevel(logging.INFO)
+    try:
+        garantir_esquema()
+    except RuntimeError as e:
+        parser.exit(1, f"Erro: {e}\n")
+    instantaneo = None
+    if args.instantaneo:
+        instantaneo = Instantaneo()
+        instantaneo.iniciar(args.instantaneo)
+    servidor = ServidorAcademia((args.host, args.porta), args.trabalhadores, instantaneo)
+    print(f"Servidor da academia em http://{args.host}:{args.porta} ({args.trabalhadores} trabalhadores). Ctrl+C encerra.")
+    if instantaneo is not None:
+        print(f"Relatórios no instantâneo em memória, renovado a cada {args.instantaneo:g}s.")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        print("Servidor encerrado.")
+
+
+if __name__ == "__main__":
+    main()